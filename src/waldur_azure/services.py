@@ -0,0 +1,30 @@
+from waldur_core.structure import services as structure_services
+
+from . import executors, serializers
+
+
+def create_virtual_machine(user, data):
+    return structure_services.create_resource(
+        user,
+        serializers.VirtualMachineSerializer,
+        executors.VirtualMachineCreateExecutor,
+        data,
+    )
+
+
+def delete_virtual_machine(user, virtual_machine):
+    structure_services.delete_resource(
+        user, virtual_machine, executors.VirtualMachineDeleteExecutor
+    )
+
+
+def create_sql_server(user, data):
+    return structure_services.create_resource(
+        user, serializers.SQLServerSerializer, executors.SQLServerCreateExecutor, data,
+    )
+
+
+def delete_sql_server(user, sql_server):
+    structure_services.delete_resource(
+        user, sql_server, executors.SQLServerDeleteExecutor
+    )
@@ -1,3 +1,4 @@
+from celery import signals as celery_signals
 from django.apps import AppConfig
 from django.contrib.auth import get_user_model
 from django.db.models import signals
@@ -42,6 +43,12 @@ class CoreConfig(AppConfig):
             dispatch_uid='waldur_core.core.handlers.set_default_token_lifetime',
         )
 
+        signals.post_save.connect(
+            handlers.invalidate_cached_user_token,
+            sender=User,
+            dispatch_uid='waldur_core.core.handlers.invalidate_cached_user_token',
+        )
+
         signals.post_delete.connect(
             handlers.log_user_delete,
             sender=User,
@@ -66,6 +73,18 @@ class CoreConfig(AppConfig):
             dispatch_uid='waldur_core.core.handlers.log_token_create',
         )
 
+        signals.post_save.connect(
+            handlers.invalidate_cached_token,
+            sender=Token,
+            dispatch_uid='waldur_core.core.handlers.invalidate_cached_token_on_save',
+        )
+
+        signals.post_delete.connect(
+            handlers.invalidate_cached_token,
+            sender=Token,
+            dispatch_uid='waldur_core.core.handlers.invalidate_cached_token_on_delete',
+        )
+
         for index, model in enumerate(StateMixin.get_all_models()):
             fsm_signals.post_transition.connect(
                 handlers.delete_error_message,
@@ -74,5 +93,10 @@ class CoreConfig(AppConfig):
                 % (model.__name__, index),
             )
 
+        celery_signals.task_revoked.connect(
+            handlers.release_background_task_lease,
+            dispatch_uid='waldur_core.core.handlers.release_background_task_lease',
+        )
+
         # Database fields should be patched only after database models are initialized
         monkey_patch_fields()
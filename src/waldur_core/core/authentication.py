@@ -1,13 +1,134 @@
+import logging
+
 import rest_framework.authentication
 from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
 
 import waldur_core.logging.middleware
+from waldur_core.core.utils import CacheLockTimeout, cache_lock, chunks
+
+logger = logging.getLogger(__name__)
 
 TOKEN_KEY = settings.WALDUR_CORE.get('TOKEN_KEY', 'x-auth-token')
 
+TOKEN_CACHE_KEY = 'token:%s'
+TOKEN_LAST_SEEN_CACHE_KEY = 'token_last_seen:%s'
+# Last-seen timestamp should outlive flush interval
+TOKEN_LAST_SEEN_CACHE_TIMEOUT = 24 * 60 * 60
+TOKEN_FLUSH_CHUNK_SIZE = 1000
+# Keys of tokens touched since last flush are collected in a set per generation
+TOKEN_DIRTY_GENERATION_CACHE_KEY = 'token_dirty_generation'
+TOKEN_DIRTY_KEYS_CACHE_KEY = 'token_dirty_keys:%s'
+TOKEN_DIRTY_MARKER_CACHE_KEY = 'token_dirty:%s:%s'
+TOKEN_DIRTY_LOCK_KEY = 'token_dirty_lock'
+
+
+def get_token_last_seen(token):
+    """
+    Return time when token has been used last time.
+    It is stored in cache and flushed to token creation time in bulk.
+    """
+    last_seen = cache.get(TOKEN_LAST_SEEN_CACHE_KEY % token.key)
+    if last_seen and last_seen > token.created:
+        return last_seen
+    return token.created
+
+
+def touch_token(token):
+    """
+    Slide token expiration time.
+    If write-behind is disabled, token creation time is updated immediately.
+    """
+    now = timezone.now()
+    cache.set(TOKEN_LAST_SEEN_CACHE_KEY % token.key, now, TOKEN_LAST_SEEN_CACHE_TIMEOUT)
+    if not settings.WALDUR_CORE['TOKEN_WRITE_BEHIND']:
+        token.created = now
+        token.save(update_fields=['created'])
+    else:
+        mark_token_dirty(token.key)
+
+
+def _get_dirty_generation():
+    return cache.get(TOKEN_DIRTY_GENERATION_CACHE_KEY) or 0
+
+
+def mark_token_dirty(key):
+    """
+    Add token key to the set of tokens which should be flushed.
+    Set is changed only once per token and generation, so that lock
+    is not acquired on every request.
+    """
+    marker = TOKEN_DIRTY_MARKER_CACHE_KEY % (_get_dirty_generation(), key)
+    if not cache.add(marker, 1, TOKEN_LAST_SEEN_CACHE_TIMEOUT):
+        return
+    try:
+        with cache_lock(TOKEN_DIRTY_LOCK_KEY):
+            keys_key = TOKEN_DIRTY_KEYS_CACHE_KEY % _get_dirty_generation()
+            keys = cache.get(keys_key) or set()
+            keys.add(key)
+            cache.set(keys_key, keys, None)
+    except CacheLockTimeout:
+        # Token is marked as dirty again on the next request
+        cache.delete(marker)
+        logger.warning('Unable to mark token as dirty because lock is busy.')
+
+
+def pop_dirty_token_keys():
+    """
+    Switch to the next generation and return keys of tokens touched in the previous one.
+    """
+    with cache_lock(TOKEN_DIRTY_LOCK_KEY):
+        generation = _get_dirty_generation()
+        cache.set(TOKEN_DIRTY_GENERATION_CACHE_KEY, generation + 1, None)
+        keys_key = TOKEN_DIRTY_KEYS_CACHE_KEY % generation
+        keys = cache.get(keys_key) or set()
+        cache.delete(keys_key)
+    return keys
+
+
+def flush_token_last_seen():
+    """
+    Copy last-seen timestamps of tokens touched since last flush
+    from cache to database using bulk update.
+    """
+    keys = pop_dirty_token_keys()
+    for chunk in chunks(list(keys), TOKEN_FLUSH_CHUNK_SIZE):
+        created_map = dict(
+            Token.objects.filter(key__in=chunk).values_list('key', 'created')
+        )
+        cache_keys = {TOKEN_LAST_SEEN_CACHE_KEY % key: key for key in created_map}
+        last_seen_map = cache.get_many(list(cache_keys.keys()))
+        changed_tokens = [
+            Token(key=cache_keys[cache_key], created=last_seen)
+            for cache_key, last_seen in last_seen_map.items()
+            if last_seen > created_map[cache_keys[cache_key]]
+        ]
+        if changed_tokens:
+            Token.objects.bulk_update(changed_tokens, ['created'])
+
+
+def get_cached_token(key):
+    """
+    Return token with related user.
+    Token is cached for a short time in order to avoid database query on every request.
+    """
+    cache_key = TOKEN_CACHE_KEY % key
+    token = cache.get(cache_key)
+    if token is None:
+        token = Token.objects.select_related('user').get(key=key)
+        timeout = settings.WALDUR_CORE['TOKEN_CACHE_TIMEOUT']
+        if timeout:
+            cache.set(cache_key, token, timeout.total_seconds())
+    return token
+
+
+def invalidate_cached_token(key):
+    cache.delete(TOKEN_CACHE_KEY % key)
+
 
 def can_access_admin_site(user):
     return user.is_active and (user.is_staff or user.is_support)
@@ -45,10 +166,9 @@ class TokenAuthentication(rest_framework.authentication.TokenAuthentication):
         return auth
 
     def authenticate_credentials(self, key):
-        model = self.get_model()
         try:
-            token = model.objects.select_related('user').get(key=key)
-        except model.DoesNotExist:
+            token = get_cached_token(key)
+        except Token.DoesNotExist:
             raise exceptions.AuthenticationFailed(_('Invalid token.'))
 
         if not token.user.is_active:
@@ -57,7 +177,7 @@ class TokenAuthentication(rest_framework.authentication.TokenAuthentication):
         if token.user.token_lifetime:
             lifetime = timezone.timedelta(seconds=token.user.token_lifetime)
 
-            if token.created < timezone.now() - lifetime:
+            if get_token_last_seen(token) < timezone.now() - lifetime:
                 raise exceptions.AuthenticationFailed(_('Token has expired.'))
 
         return token.user, token
@@ -91,12 +211,11 @@ def user_capturing_auth(auth):
         def authenticate(self, request):
             result = super(CapturingAuthentication, self).authenticate(request)
             if result is not None:
-                user, _ = result
+                user, auth = result
                 waldur_core.logging.middleware.set_current_user(user)
-                token = user.auth_token
+                token = auth if isinstance(auth, Token) else user.auth_token
                 if token:
-                    token.created = timezone.now()
-                    token.save()
+                    touch_token(token)
             return result
 
     return CapturingAuthentication
@@ -8,6 +8,7 @@ from django.urls import resolve
 from django_filters.constants import EMPTY_VALUES
 from django_filters.filters import MultipleChoiceFilter
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import exceptions as rf_exceptions
 from rest_framework.filters import BaseFilterBackend
 
 from waldur_core.core import fields as core_fields
@@ -293,6 +294,13 @@ class SummaryFilter(DjangoFilterBackend):
             filtered_querysets.append(queryset)
 
         summary_queryset.querysets = filtered_querysets
+
+        cursor = request.query_params.get('after')
+        if cursor:
+            try:
+                summary_queryset.after(cursor)
+            except ValueError as e:
+                raise rf_exceptions.ValidationError({'after': str(e)})
         return summary_queryset
 
 
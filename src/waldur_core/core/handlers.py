@@ -132,3 +132,27 @@ def log_token_create(sender, instance, created=False, **kwargs):
             event_type='token_created',
             event_context={'affected_user': instance.user},
         )
+
+
+def release_background_task_lease(sender=None, request=None, **kwargs):
+    """ Release lease of background task which has been revoked before completion """
+    from waldur_core.core.tasks import BackgroundTask
+
+    if isinstance(sender, BackgroundTask) and request is not None:
+        sender.registry.release(request.id)
+
+
+def invalidate_cached_token(sender, instance, **kwargs):
+    from waldur_core.core.authentication import invalidate_cached_token
+
+    invalidate_cached_token(instance.key)
+
+
+def invalidate_cached_user_token(sender, instance, created=False, **kwargs):
+    if created:
+        return
+
+    from waldur_core.core.authentication import invalidate_cached_token
+
+    for key in Token.objects.filter(user=instance).values_list('key', flat=True):
+        invalidate_cached_token(key)
@@ -0,0 +1,34 @@
+import prettytable
+from django.core.management.base import BaseCommand
+
+from waldur_core.core.tasks import BackgroundTask
+
+
+def format_age(value):
+    return '-' if value is None else '%.0f' % value
+
+
+class Command(BaseCommand):
+    help = "Show suppressed duplicates and lease age of background tasks."
+
+    def handle(self, *args, **options):
+        stats = BackgroundTask.registry.get_stats()
+        columns = [
+            'Task',
+            'Active leases',
+            'Suppressed duplicates',
+            'Max lease age, s',
+            'Max heartbeat age, s',
+        ]
+        table = prettytable.PrettyTable(columns)
+        for task_name, item in sorted(stats.items()):
+            table.add_row(
+                [
+                    task_name,
+                    item['leases'],
+                    item['suppressed'],
+                    format_age(item['max_lease_age']),
+                    format_age(item['max_heartbeat_age']),
+                ]
+            )
+        self.stdout.write(table.get_string())
@@ -1,10 +1,18 @@
+import base64
+import collections
 import copy
+import datetime
 import functools
-import heapq
-import itertools
+import json
+import operator
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.expressions import OrderBy
+from django.db.models.functions import Lower
 
 
 class GenericKeyMixin:
@@ -99,11 +107,29 @@ class GenericKeyMixin:
 
 
 class SummaryQuerySet:
-    """ Fake queryset that emulates union of different models querysets """
+    """
+    Fake queryset that emulates union of different models querysets.
+
+    Querysets are combined using SQL UNION ALL over primary key, model index and
+    ordering columns, so ordering, limit and offset are applied by database.
+    Model instances are fetched only for the requested page.
+    Ordering by field name matches previous merge of querysets in Python:
+    strings are compared case-insensitively and NULL values come first
+    with ascending order.
+
+    Queryset supports keyset pagination: cursor of the object contains values of
+    its ordering columns, model index and primary key, and after() selects
+    objects which follow the cursor in the combined ordering.
+    """
+
+    MODEL_FIELD = 'summary_model'
+    ORDER_FIELD = 'summary_order_%s'
 
     def __init__(self, summary_models):
         self.querysets = [model.objects.all() for model in summary_models]
         self._order_by = None
+        self._after = None
+        self._cursors = {}
 
     def filter(self, *args, **kwargs):
         self.querysets = [
@@ -126,13 +152,37 @@ class SummaryQuerySet:
         ]
         return self
 
-    def order_by(self, order_by):
+    def order_by(self, *order_by):
         self._order_by = order_by
-        self.querysets = [qs.order_by(copy.deepcopy(order_by)) for qs in self.querysets]
+        self.querysets = [
+            qs.order_by(*copy.deepcopy(order_by)) for qs in self.querysets
+        ]
         return self
 
+    def after(self, cursor):
+        """
+        Select objects which follow object with given cursor.
+        Cursor should be obtained with the same ordering.
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError):
+            raise ValueError('Cursor is invalid.')
+        _, columns = self._get_projection(self._get_ordering())
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('Cursor does not match ordering.')
+        self._after = values
+        return self
+
+    def get_cursor(self, obj):
+        """ Return cursor of the object fetched from queryset """
+        return self._cursors[(type(obj), obj.pk)]
+
     def count(self):
-        return sum([qs.count() for qs in self.querysets])
+        # Ordering columns are needed only for comparison with cursor
+        ordering = self._get_ordering() if self._after is not None else ()
+        union, _ = self._get_union(ordering)
+        return union.count() if union is not None else 0
 
     def all(self):
         return self
@@ -144,101 +194,182 @@ class SummaryQuerySet:
             return
 
     def __getitem__(self, val):
-        chained_querysets = self._get_chained_querysets()
         if isinstance(val, slice):
-            return list(itertools.islice(chained_querysets, val.start, val.stop))
+            return self._fetch(val.start, val.stop)
         else:
             try:
-                return next(itertools.islice(chained_querysets, val, val + 1))
-            except StopIteration:
-                raise IndexError
+                return self._fetch(val, val + 1)[0]
+            except IndexError:
+                raise IndexError('SummaryQuerySet index out of range')
 
-    def __len__(self):
-        return sum([q.count() for q in self.querysets])
+    def __iter__(self):
+        return iter(self._fetch())
 
-    def _get_chained_querysets(self):
-        if self._order_by:
-            return self._merge(
-                [qs.iterator() for qs in self.querysets], compared_attr=self._order_by
+    def __len__(self):
+        return self.count()
+
+    def _get_ordering(self):
+        if self._order_by is not None:
+            return self._order_by
+        # Ordering could be applied to each queryset separately by filter backends
+        if self.querysets:
+            return self.querysets[0].query.order_by
+        return ()
+
+    def _get_projection(self, ordering):
+        """
+        Return annotations for ordering columns and ordering of combined query
+        as list of pairs of column name and descending flag.
+        """
+        annotations = {}
+        columns = []
+        for index, field in enumerate(ordering):
+            if field == '?':
+                continue
+            name = self.ORDER_FIELD % index
+            if isinstance(field, OrderBy):
+                # Combined query could be ordered only by column names,
+                # so position of NULL values is defined by separate column.
+                expression = field.expression
+                if (field.nulls_first or field.nulls_last) and isinstance(
+                    expression, models.F
+                ):
+                    nulls_name = name + '_isnull'
+                    annotations[nulls_name] = self._get_isnull_expression(
+                        expression.name
+                    )
+                    columns.append((nulls_name, not field.nulls_last))
+                annotations[name] = expression
+                columns.append((name, field.descending))
+            elif isinstance(field, str):
+                descending = field.startswith('-')
+                field_name = field.lstrip('-')
+                nulls_name = name + '_isnull'
+                annotations[nulls_name] = self._get_isnull_expression(field_name)
+                columns.append((nulls_name, not descending))
+                expression = models.F(field_name)
+                if self._is_text_field(field_name):
+                    expression = Lower(expression)
+                annotations[name] = expression
+                columns.append((name, descending))
+            else:
+                annotations[name] = field
+                columns.append((name, False))
+        columns += [(self.MODEL_FIELD, False), ('pk', False)]
+        return annotations, columns
+
+    def _get_keyset_filter(self, columns, cursor):
+        """
+        Select rows following cursor in the combined ordering. Row follows cursor
+        if it is equal to cursor in leading columns and follows it in the next one.
+        """
+        if len(cursor) != len(columns):
+            raise ValueError('Cursor does not match ordering.')
+        conditions = []
+        equal = models.Q()
+        for (name, descending), value in zip(columns, cursor):
+            if value is None:
+                # NULL values are positioned by separate column, so they are equal
+                equal &= models.Q(**{name + '__isnull': True})
+                continue
+            lookup = name + ('__lt' if descending else '__gt')
+            conditions.append(equal & models.Q(**{lookup: value}))
+            equal &= models.Q(**{name: value})
+        return functools.reduce(operator.or_, conditions, models.Q(pk__in=[]))
+
+    def _get_union(self, ordering=()):
+        """
+        Project each queryset to the common columns set and combine them using UNION ALL.
+        """
+        if not self.querysets:
+            return None, []
+
+        annotations, columns = self._get_projection(ordering)
+        projected = []
+        for index, qs in enumerate(self.querysets):
+            qs = (
+                qs.order_by()
+                .prefetch_related(None)
+                .annotate(
+                    **{self.MODEL_FIELD: models.Value(index, models.IntegerField())},
+                    **copy.deepcopy(annotations)
+                )
             )
-        else:
-            return itertools.chain(*[qs.iterator() for qs in self.querysets])
+            if self._after is not None:
+                qs = qs.filter(self._get_keyset_filter(columns, self._after))
+            projected.append(qs.values('pk', self.MODEL_FIELD, *annotations.keys()))
+        union = projected[0].union(*projected[1:], all=True)
+        return (
+            union.order_by(
+                *['-' + name if descending else name for name, descending in columns]
+            ),
+            columns,
+        )
 
-    def _merge(self, subsequences, compared_attr='pk'):
-        @functools.total_ordering
-        class Compared:
-            """ Order objects by their attributes, reverse ordering if <reverse> is True """
+    def _get_isnull_expression(self, field_name):
+        return models.Case(
+            models.When(**{field_name + '__isnull': True}, then=models.Value(1)),
+            default=models.Value(0),
+            output_field=models.IntegerField(),
+        )
 
-            def __init__(self, obj, attr, reverse=False):
-                self.attr = functools.reduce(
-                    Compared.get_obj_attr, attr.split("__"), obj
-                )
-                if isinstance(self.attr, str):
-                    self.attr = self.attr.lower()
-                self.reverse = reverse
-
-            @staticmethod
-            def get_obj_attr(obj, attr):
-                # for m2m relationship support - get first instance of manager.
-                # for example: get first project group if resource has to be ordered by project groups.
-                if isinstance(obj, models.Manager):
-                    obj = obj.first()
-                return getattr(obj, attr) if obj else None
-
-            def __eq__(self, other):
-                return self.attr == other.attr
-
-            def __le__(self, other):
-                # In MySQL NULL values come *first* with ascending sort order.
-                # We use the same behaviour.
-                if self.attr is None:
-                    return not self.reverse
-                elif other.attr is None:
-                    return self.reverse
-                else:
-                    return (
-                        self.attr < other.attr
-                        if not self.reverse
-                        else self.attr >= other.attr
+    def _is_text_field(self, field_name):
+        """ Check if field is stored as string in each model """
+        for qs in self.querysets:
+            model = qs.model
+            field = None
+            for part in field_name.split(LOOKUP_SEP):
+                if model is None:
+                    return False
+                try:
+                    field = (
+                        model._meta.pk if part == 'pk' else model._meta.get_field(part)
                     )
-
-        reverse = compared_attr.startswith('-')
-        if reverse:
-            compared_attr = compared_attr[1:]
-
-        # prepare a heap whose items are
-        # (compared, current-value, iterator), one each per (non-empty) subsequence
-        # <compared> is used for model instances comparison based on given attribute
-        heap = []
-        for subseq in subsequences:
-            iterator = iter(subseq)
-            for current_value in iterator:
-                # subseq is not empty, therefore add this subseq's item to the list
-                heapq.heappush(
-                    heap,
-                    (
-                        Compared(current_value, compared_attr, reverse=reverse),
-                        current_value,
-                        iterator,
-                    ),
-                )
-                break
-
-        while heap:
-            # get and yield lowest current value (and corresponding iterator)
-            _, current_value, iterator = heap[0]
-            yield current_value
-            for current_value in iterator:
-                # subseq is not finished, therefore add this subseq's item back into the priority queue
-                heapq.heapreplace(
-                    heap,
-                    (
-                        Compared(current_value, compared_attr, reverse=reverse),
-                        current_value,
-                        iterator,
-                    ),
-                )
-                break
-            else:
-                # subseq has been exhausted, therefore remove it from the queue
-                heapq.heappop(heap)
+                except FieldDoesNotExist:
+                    return False
+                model = field.related_model
+            if not isinstance(field, (models.CharField, models.TextField)):
+                return False
+        return True
+
+    def _fetch(self, start=None, stop=None):
+        union, columns = self._get_union(self._get_ordering())
+        if union is None:
+            return []
+        rows = list(union[start:stop])
+        self._cursors = {
+            (self.querysets[row[self.MODEL_FIELD]].model, row['pk']): (
+                self._encode_cursor(row, columns)
+            )
+            for row in rows
+        }
+        return self._hydrate(rows)
+
+    def _encode_cursor(self, row, columns):
+        values = [row[name] for name, _ in columns]
+        return base64.urlsafe_b64encode(
+            json.dumps(values, default=self._encode_cursor_value).encode()
+        ).decode()
+
+    def _encode_cursor_value(self, value):
+        # Microseconds are kept, otherwise objects could be skipped or repeated
+        if isinstance(value, (datetime.datetime, datetime.time)):
+            return value.isoformat()
+        return DjangoJSONEncoder().default(value)
+
+    def _hydrate(self, rows):
+        """ Fetch model instances for given union rows preserving their order """
+        pks = collections.defaultdict(list)
+        for row in rows:
+            pks[row[self.MODEL_FIELD]].append(row['pk'])
+
+        instances = {}
+        for index, model_pks in pks.items():
+            for obj in self.querysets[index].order_by().filter(pk__in=model_pks):
+                instances[(index, obj.pk)] = obj
+
+        return [
+            instances[(row[self.MODEL_FIELD], row['pk'])]
+            for row in rows
+            if (row[self.MODEL_FIELD], row['pk']) in instances
+        ]
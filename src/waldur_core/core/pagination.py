@@ -29,6 +29,11 @@ class LinkHeaderPagination(pagination.PageNumberPagination):
             'X-Result-Count': self.page.paginator.count,
             'Link': link,
         }
+        # Cursor of the last object could be passed as after query parameter
+        # in order to get the next page using keyset pagination.
+        queryset = self.page.paginator.object_list
+        if hasattr(queryset, 'get_cursor') and self.page.object_list:
+            headers['X-Next-Cursor'] = queryset.get_cursor(self.page.object_list[-1])
 
         return Response(data, headers=headers)
 
@@ -1,8 +1,15 @@
+import hashlib
+import json
 import logging
+import time
 from uuid import uuid4
 
+from celery import shared_task, signature, states
+from celery.exceptions import Ignore
 from celery.task import Task as CeleryTask
 from celery.worker.request import Request
+from django.conf import settings
+from django.core.cache import cache
 from django.db import IntegrityError
 from django.db import models as django_models
 from django.db.models import ObjectDoesNotExist
@@ -310,6 +317,134 @@ class PreApplyExecutorTask(Task):
         self.executor.pre_apply(instance, **kwargs)
 
 
+class BackgroundTaskRegistry:
+    """ Lease-based registry of background tasks which are scheduled or running.
+
+        Lease is identified by task name and normalized task arguments.
+        It is acquired when task is scheduled and released by worker when task
+        succeeds, fails or is revoked. If worker dies, lease expires after timeout.
+        Long-running tasks should extend their lease via heartbeat.
+    """
+
+    key_prefix = 'background_task'
+
+    def get_timeout(self):
+        timeout = settings.WALDUR_CORE['BACKGROUND_TASK_LEASE_TIMEOUT']
+        return int(timeout.total_seconds())
+
+    def get_lease_key(self, task_name, args=None, kwargs=None):
+        payload = json.dumps(
+            [task_name, list(args or []), kwargs or {}], sort_keys=True, default=str
+        )
+        digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()
+        return '%s_lease:%s' % (self.key_prefix, digest)
+
+    def _get_owner_key(self, task_id):
+        return '%s_owner:%s' % (self.key_prefix, task_id)
+
+    def _get_suppressed_key(self, task_name):
+        return '%s_suppressed:%s' % (self.key_prefix, task_name)
+
+    @property
+    def _index_key(self):
+        return '%s_index' % self.key_prefix
+
+    def _update_index(self, task_name, lease_key):
+        # Index is used only for reporting, so it is updated on best effort basis.
+        index = cache.get(self._index_key) or {}
+        if index.get(lease_key) != task_name:
+            index[lease_key] = task_name
+            cache.set(self._index_key, index, None)
+
+    def _increment_suppressed(self, task_name):
+        key = self._get_suppressed_key(task_name)
+        if not cache.add(key, 1, None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Counter has been deleted concurrently
+                cache.set(key, 1, None)
+
+    def acquire(self, task_name, lease_key, task_id):
+        """ Return True if lease is acquired and False if it is held by another task """
+        now = time.time()
+        lease = {
+            'task_name': task_name,
+            'task_id': task_id,
+            'acquired': now,
+            'heartbeat': now,
+        }
+        timeout = self.get_timeout()
+        acquired = cache.add(lease_key, lease, timeout)
+        if not acquired:
+            # Retry of the task is scheduled with the same task ID
+            current = cache.get(lease_key)
+            acquired = bool(current and current['task_id'] == task_id)
+        if acquired:
+            cache.set(self._get_owner_key(task_id), lease_key, timeout)
+        else:
+            self._increment_suppressed(task_name)
+        self._update_index(task_name, lease_key)
+        return acquired
+
+    def heartbeat(self, task_id):
+        """ Extend lease held by the task. Return False if task does not hold a lease """
+        owner_key = self._get_owner_key(task_id)
+        lease_key = cache.get(owner_key)
+        lease = lease_key and cache.get(lease_key)
+        if not lease or lease['task_id'] != task_id:
+            return False
+        lease['heartbeat'] = time.time()
+        cache.set_many({lease_key: lease, owner_key: lease_key}, self.get_timeout())
+        return True
+
+    def release(self, task_id):
+        owner_key = self._get_owner_key(task_id)
+        lease_key = cache.get(owner_key)
+        if not lease_key:
+            return
+        keys = [owner_key]
+        lease = cache.get(lease_key)
+        # Lease may have expired and may have been acquired by another task already.
+        if lease and lease['task_id'] == task_id:
+            keys.append(lease_key)
+        cache.delete_many(keys)
+
+    def get_stats(self):
+        """ Return number of suppressed duplicates and age of leases per task name """
+        index = cache.get(self._index_key) or {}
+        leases = cache.get_many(list(index.keys()))
+        task_names = set(index.values())
+        suppressed = cache.get_many(
+            [self._get_suppressed_key(task_name) for task_name in task_names]
+        )
+        now = time.time()
+        stats = {
+            task_name: {
+                'suppressed': suppressed.get(self._get_suppressed_key(task_name), 0),
+                'leases': 0,
+                'max_lease_age': None,
+                'max_heartbeat_age': None,
+            }
+            for task_name in task_names
+        }
+        for lease in leases.values():
+            item = stats[lease['task_name']]
+            item['leases'] += 1
+            item['max_lease_age'] = max(
+                item['max_lease_age'] or 0, now - lease['acquired']
+            )
+            item['max_heartbeat_age'] = max(
+                item['max_heartbeat_age'] or 0, now - lease['heartbeat']
+            )
+
+        # Drop expired and released leases from index
+        if len(leases) != len(index):
+            index = {key: name for key, name in index.items() if key in leases}
+            cache.set(self._index_key, index, None)
+        return stats
+
+
 class BackgroundTask(CeleryTask):
     """ Task that is run in background via celerybeat.
 
@@ -321,46 +456,49 @@ class BackgroundTask(CeleryTask):
            should log themselves explicitly and make sure that they will not
            spam error messages.
 
-        Implement "is_equal" method to define what tasks are equal and should
-        be executed simultaneously.
+        Tasks with the same name and input parameters are considered equal.
+        Override "get_lease_key" method to define what tasks are equal and should
+        not be executed simultaneously.
     """
 
     is_background = True
+    registry = BackgroundTaskRegistry()
 
-    def is_equal(self, other_task, *args, **kwargs):
-        """ Return True if task do the same operation as other_task.
-
-            Note! Other task is represented as serialized celery task - dictionary.
-        """
-        raise NotImplementedError(
-            'BackgroundTask should implement "is_equal" method to avoid queue overload.'
-        )
+    def get_lease_key(self, *args, **kwargs):
+        return self.registry.get_lease_key(self.name, args, kwargs)
 
-    def is_previous_task_processing(self, *args, **kwargs):
-        """ Return True if exist task that is equal to current and is uncompleted """
-        app = self._get_app()
-        inspect = app.control.inspect()
-        active = inspect.active() or {}
-        scheduled = inspect.scheduled() or {}
-        reserved = inspect.reserved() or {}
-        uncompleted = sum(
-            list(active.values()) + list(scheduled.values()) + list(reserved.values()),
-            [],
-        )
-        return any(self.is_equal(task, *args, **kwargs) for task in uncompleted)
+    def heartbeat(self):
+        """ Extend lease of the current task. Long-running tasks should call it periodically. """
+        return self.registry.heartbeat(self.request.id)
 
     def apply_async(self, args=None, kwargs=None, **options):
         """ Do not run background task if previous task is uncompleted """
-        if self.is_previous_task_processing(*args, **kwargs):
+        task_id = options.get('task_id') or str(uuid4())
+        options['task_id'] = task_id
+        lease_key = self.get_lease_key(*(args or ()), **(kwargs or {}))
+        if not self.registry.acquire(self.name, lease_key, task_id):
             message = (
                 'Background task %s was not scheduled, because its predecessor is not completed yet.'
                 % self.name
             )
             logger.info(message)
             # It is expected by Celery that apply_async return AsyncResult, otherwise celerybeat dies
-            return self.AsyncResult(options.get('task_id') or str(uuid4()))
-        return super(BackgroundTask, self).apply_async(
-            args=args, kwargs=kwargs, **options
+            return self.AsyncResult(task_id)
+        try:
+            return super(BackgroundTask, self).apply_async(
+                args=args, kwargs=kwargs, **options
+            )
+        except Exception:
+            self.registry.release(task_id)
+            raise
+
+    def after_return(self, status, retval, task_id, args, kwargs, einfo):
+        """ Release lease when task succeeds or fails """
+        # Lease is kept while task is waiting for retry
+        if status != states.RETRY:
+            self.registry.release(task_id)
+        super(BackgroundTask, self).after_return(
+            status, retval, task_id, args, kwargs, einfo
         )
 
 
@@ -393,7 +531,227 @@ def log_celery_task(request):
 Request.__str__ = log_celery_task
 
 
+def get_poll_countdown(attempt):
+    """ Return delay before next poll using exponential backoff """
+    conf = settings.WALDUR_CORE['POLL_BACKOFF']
+    delay = conf['INITIAL_DELAY'] * (2 ** attempt)
+    return min(delay, conf['MAX_DELAY'])
+
+
+class PollScheduler:
+    """ Scheduler of runtime state polls which are pending completion.
+
+        Pending objects are grouped by service settings and backend method,
+        so that each group is checked with one batched backend call per tick.
+        Each object is checked with exponential backoff. When object reaches
+        final state, its poll task is dispatched again to continue the chain.
+        External notification about object change completes the wait early.
+    """
+
+    key_prefix = 'poll_scheduler'
+    DONE = 'done'
+    TIMEOUT = 'timeout'
+
+    @classmethod
+    def get_group(cls, instance, backend_pull_method):
+        service_settings = getattr(instance, 'service_settings', None)
+        if service_settings is None:
+            # Object is not bound to service settings, so it is polled individually
+            return '%s:%s:%s' % (
+                backend_pull_method,
+                instance._meta.label_lower,
+                instance.pk,
+            )
+        return '%s:%s:%s' % (
+            backend_pull_method,
+            instance._meta.label_lower,
+            service_settings.pk,
+        )
+
+    @classmethod
+    def _get_group_key(cls, group):
+        return '%s_group:%s' % (cls.key_prefix, group)
+
+    @classmethod
+    def _get_done_key(cls, owner):
+        return '%s_done:%s' % (cls.key_prefix, owner)
+
+    @classmethod
+    def _get_index_key(cls):
+        return '%s_index' % cls.key_prefix
+
+    @classmethod
+    def _lock(cls, group):
+        return utils.cache_lock('%s_lock:%s' % (cls.key_prefix, group))
+
+    @classmethod
+    def _get_groups(cls):
+        return cache.get(cls._get_index_key()) or set()
+
+    @classmethod
+    def _remove_group(cls, group):
+        with cls._lock(cls.key_prefix):
+            groups = cls._get_groups()
+            groups.discard(group)
+            cache.set(cls._get_index_key(), groups, None)
+
+    @classmethod
+    def register(cls, instance, backend_pull_method, final_states, signature):
+        group = cls.get_group(instance, backend_pull_method)
+        owner = utils.serialize_instance(instance)
+        now = time.time()
+        timeout = settings.WALDUR_CORE['POLL_TIMEOUT'].total_seconds()
+        with cls._lock(group):
+            entries = cache.get(cls._get_group_key(group)) or {}
+            entries[owner] = {
+                'signature': dict(signature),
+                'final_states': list(final_states),
+                'attempt': 0,
+                'next_check': now + get_poll_countdown(0),
+                'deadline': now + timeout,
+            }
+            cache.set(cls._get_group_key(group), entries, None)
+        with cls._lock(cls.key_prefix):
+            groups = cls._get_groups()
+            groups.add(group)
+            cache.set(cls._get_index_key(), groups, None)
+        cache.delete(cls._get_done_key(owner))
+
+    @classmethod
+    def notify(cls, instance, backend_pull_method):
+        """ Check object at the next tick regardless of its backoff """
+        group = cls.get_group(instance, backend_pull_method)
+        owner = utils.serialize_instance(instance)
+        with cls._lock(group):
+            entries = cache.get(cls._get_group_key(group)) or {}
+            if owner not in entries:
+                return False
+            entries[owner]['next_check'] = 0
+            cache.set(cls._get_group_key(group), entries, None)
+        poll_group.delay(group)
+        return True
+
+    @classmethod
+    def pop_result(cls, instance):
+        """ Return DONE or TIMEOUT if scheduler has finished waiting for object """
+        key = cls._get_done_key(utils.serialize_instance(instance))
+        result = cache.get(key)
+        cache.delete(key)
+        return result
+
+    @classmethod
+    def tick(cls):
+        for group in cls._get_groups():
+            poll_group.delay(group)
+
+    @classmethod
+    def poll(cls, group):
+        now = time.time()
+        entries = cache.get(cls._get_group_key(group)) or {}
+        due = {
+            owner: entry
+            for owner, entry in entries.items()
+            if entry['next_check'] <= now or entry['deadline'] <= now
+        }
+        if not due:
+            return
+
+        instances = []
+        for owner in due:
+            try:
+                instances.append(utils.deserialize_instance(owner))
+            except ObjectDoesNotExist:
+                pass
+
+        backend_pull_method = group.split(':', 1)[0]
+        if instances:
+            try:
+                cls._pull(instances, backend_pull_method)
+            except Exception:
+                # Objects are checked again after backoff
+                logger.exception('Unable to poll runtime state of group %s.', group)
+
+        completed = {}
+        states = {
+            utils.serialize_instance(instance): instance.runtime_state
+            for instance in instances
+        }
+        for owner, entry in due.items():
+            state = states.get(owner)
+            if (
+                state is None
+                or state in entry['final_states']
+                or entry['deadline'] <= now
+            ):
+                completed[owner] = entry
+
+        # Only owners removed by this run are dispatched, because
+        # overlapping runs of the same group may complete the same owner.
+        dispatched = {}
+        with cls._lock(group):
+            entries = cache.get(cls._get_group_key(group)) or {}
+            for owner in due:
+                if owner not in entries:
+                    continue
+                if owner in completed:
+                    dispatched[owner] = entries.pop(owner)
+                else:
+                    entry = entries[owner]
+                    entry['attempt'] += 1
+                    entry['next_check'] = now + get_poll_countdown(entry['attempt'])
+            if entries:
+                cache.set(cls._get_group_key(group), entries, None)
+            else:
+                cache.delete(cls._get_group_key(group))
+                cls._remove_group(group)
+
+        for owner, entry in dispatched.items():
+            # Poll task skips backend call if object has reached final state
+            if states.get(owner) in entry['final_states']:
+                result = cls.DONE
+            else:
+                result = cls.TIMEOUT
+            cache.set(cls._get_done_key(owner), result, 60 * 60)
+            signature(entry['signature']).apply_async()
+
+    @classmethod
+    def _pull(cls, instances, backend_pull_method):
+        backend = instances[0].get_backend()
+        batch_method = getattr(backend, 'batch_pull_methods', {}).get(
+            backend_pull_method
+        )
+        if batch_method:
+            getattr(backend, batch_method)(instances)
+        else:
+            for instance in instances:
+                getattr(backend, backend_pull_method)(instance)
+        for instance in instances:
+            instance.refresh_from_db(fields=['runtime_state'])
+
+    @classmethod
+    def get_stats(cls):
+        now = time.time()
+        stats = {}
+        for group in cls._get_groups():
+            entries = cache.get(cls._get_group_key(group)) or {}
+            stats[group] = {
+                'pending': len(entries),
+                'next_check': min(
+                    [entry['next_check'] - now for entry in entries.values()] or [None]
+                ),
+            }
+        return stats
+
+
 class PollRuntimeStateTask(Task):
+    """
+    Poll object runtime state until it reaches final state.
+
+    If object has not reached final state yet, it is registered in poll scheduler
+    and task is dispatched again by scheduler when object reaches final state.
+    """
+
+    # Retries are used only if task is executed eagerly
     max_retries = 1200
     default_retry_delay = 5
 
@@ -412,11 +770,27 @@ class PollRuntimeStateTask(Task):
         erred_state,
         deleted_state=None,
     ):
-        backend = self.get_backend(instance)
-        getattr(backend, backend_pull_method)(instance)
+        final_states = (success_state, erred_state, deleted_state)
+        result = PollScheduler.pop_result(instance)
+        if result != PollScheduler.DONE:
+            backend = self.get_backend(instance)
+            getattr(backend, backend_pull_method)(instance)
         instance.refresh_from_db()
-        if instance.runtime_state not in (success_state, erred_state, deleted_state):
-            self.retry()
+        if instance.runtime_state not in final_states:
+            if self.request.is_eager:
+                self.retry()
+            if result == PollScheduler.TIMEOUT:
+                raise RuntimeStateException(
+                    '%s (PK: %s) runtime state has not become final in time.'
+                    % (instance.__class__.__name__, instance.pk)
+                )
+            PollScheduler.register(
+                instance,
+                backend_pull_method,
+                final_states,
+                self.signature_from_request(),
+            )
+            raise Ignore()
         elif instance.runtime_state == erred_state:
             raise RuntimeStateException(
                 '%s (PK: %s) runtime state become erred: %s'
@@ -438,7 +812,7 @@ class PollStateTask(Task):
 
 
 class PollBackendCheckTask(Task):
-    max_retries = 600
+    max_retries = 60
     default_retry_delay = 5
 
     @classmethod
@@ -452,7 +826,7 @@ class PollBackendCheckTask(Task):
         # backend_check_method should return True if object does not exist at backend
         backend = self.get_backend(instance)
         if not getattr(backend, backend_check_method)(instance):
-            self.retry()
+            self.retry(countdown=get_poll_countdown(self.request.retries))
         return instance
 
 
@@ -476,3 +850,20 @@ class ExtensionTaskMixin(CeleryTask):
         return super(ExtensionTaskMixin, self).apply_async(
             args=args, kwargs=kwargs, **options
         )
+
+
+@shared_task(name='waldur_core.core.flush_token_last_seen')
+def flush_token_last_seen():
+    from waldur_core.core.authentication import flush_token_last_seen
+
+    flush_token_last_seen()
+
+
+@shared_task(name='waldur_core.core.poll_group')
+def poll_group(group):
+    PollScheduler.poll(group)
+
+
+@shared_task(name='waldur_core.core.poll_pending_runtime_states')
+def poll_pending_runtime_states():
+    PollScheduler.tick()
@@ -7,6 +7,8 @@ from freezegun import freeze_time
 from rest_framework import status, test
 from rest_framework.authtoken.models import Token
 
+from waldur_core.core.authentication import flush_token_last_seen, pop_dirty_token_keys
+
 from . import helpers
 
 
@@ -66,9 +68,84 @@ class TokenAuthenticationTest(test.APITransactionTestCase):
 
         self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
         self.client.get(self.test_url)
+        flush_token_last_seen()
         created2 = Token.objects.values_list('created', flat=True).get(key=token)
         self.assertTrue(created1 < created2)
 
+    def test_only_tokens_touched_since_last_flush_are_loaded(self):
+        response = self.client.post(
+            self.auth_url, data={'username': self.username, 'password': self.password}
+        )
+        token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.client.get(self.test_url)
+
+        self.assertEqual(pop_dirty_token_keys(), {token})
+        self.assertEqual(pop_dirty_token_keys(), set())
+
+        self.client.get(self.test_url)
+        self.assertEqual(pop_dirty_token_keys(), {token})
+
+    def test_token_creation_time_is_not_written_to_database_before_flush(self):
+        response = self.client.post(
+            self.auth_url, data={'username': self.username, 'password': self.password}
+        )
+        token = response.data['token']
+        created1 = Token.objects.values_list('created', flat=True).get(key=token)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.client.get(self.test_url)
+        created2 = Token.objects.values_list('created', flat=True).get(key=token)
+        self.assertEqual(created1, created2)
+
+    @helpers.override_waldur_core_settings(TOKEN_WRITE_BEHIND=False)
+    def test_token_creation_time_is_written_immediately_if_write_behind_is_disabled(
+        self,
+    ):
+        response = self.client.post(
+            self.auth_url, data={'username': self.username, 'password': self.password}
+        )
+        token = response.data['token']
+        created1 = Token.objects.values_list('created', flat=True).get(key=token)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        self.client.get(self.test_url)
+        created2 = Token.objects.values_list('created', flat=True).get(key=token)
+        self.assertTrue(created1 < created2)
+
+    def test_token_does_not_expire_if_it_has_been_used_before_flush(self):
+        user = get_user_model().objects.get(username=self.username)
+        response = self.client.post(
+            self.auth_url, data={'username': self.username, 'password': self.password}
+        )
+        token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+
+        half_lifetime = timezone.timedelta(seconds=user.token_lifetime / 2 + 1)
+        with freeze_time(timezone.now() + half_lifetime):
+            response = self.client.get(self.test_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with freeze_time(timezone.now() + 2 * half_lifetime):
+            response = self.client.get(self.test_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_can_not_authenticate_with_cached_token(self):
+        response = self.client.post(
+            self.auth_url, data={'username': self.username, 'password': self.password}
+        )
+        token = response.data['token']
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token)
+        response = self.client.get(self.test_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user = get_user_model().objects.get(username=self.username)
+        user.is_active = False
+        user.save()
+
+        response = self.client.get(self.test_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
     def test_account_is_blocked_after_five_failed_attempts(self):
         for _ in range(5):
             response = self.client.post(
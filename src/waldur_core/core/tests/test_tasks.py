@@ -0,0 +1,162 @@
+from unittest import mock
+
+from celery.task import Task as CeleryTask
+from django.core.cache import cache
+from django.test import TestCase
+
+from waldur_core.core.handlers import release_background_task_lease
+from waldur_core.core.tasks import BackgroundTask, PollScheduler
+from waldur_core.structure.tests import factories as structure_factories
+from waldur_core.structure.tests import models as structure_models
+
+
+class DummyBackgroundTask(BackgroundTask):
+    name = 'waldur_core.core.tests.DummyBackgroundTask'
+
+    def run(self, *args, **kwargs):
+        pass
+
+
+@mock.patch.object(CeleryTask, 'apply_async')
+class BackgroundTaskTest(TestCase):
+    def setUp(self):
+        self.task = DummyBackgroundTask()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_task_is_not_scheduled_if_predecessor_is_not_completed(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={})
+        self.task.apply_async(args=('instance',), kwargs={})
+        self.assertEqual(apply_async.call_count, 1)
+
+    def test_task_with_different_arguments_is_scheduled(self, apply_async):
+        self.task.apply_async(args=('first',), kwargs={})
+        self.task.apply_async(args=('second',), kwargs={})
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_task_is_scheduled_if_predecessor_has_returned(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        self.task.after_return('SUCCESS', None, 'first', ('instance',), {}, None)
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='second')
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_lease_is_kept_while_task_is_waiting_for_retry(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        self.task.after_return('RETRY', None, 'first', ('instance',), {}, None)
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='second')
+        self.assertEqual(apply_async.call_count, 1)
+
+    def test_retry_is_scheduled_with_lease_of_original_task(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_lease_is_released_if_predecessor_is_revoked(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        release_background_task_lease(sender=self.task, request=mock.Mock(id='first'))
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='second')
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_stats_contain_suppressed_duplicates_and_lease_age(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={})
+        self.task.apply_async(args=('instance',), kwargs={})
+        self.task.apply_async(args=('instance',), kwargs={})
+
+        stats = BackgroundTask.registry.get_stats()[self.task.name]
+        self.assertEqual(stats['leases'], 1)
+        self.assertEqual(stats['suppressed'], 2)
+        self.assertGreaterEqual(stats['max_lease_age'], 0)
+
+    def test_heartbeat_is_rejected_if_task_does_not_hold_lease(self, apply_async):
+        self.task.apply_async(args=('instance',), kwargs={}, task_id='first')
+        self.assertTrue(BackgroundTask.registry.heartbeat('first'))
+        self.assertFalse(BackgroundTask.registry.heartbeat('second'))
+
+
+class PollBackend:
+    batch_pull_methods = {'pull_runtime_state': 'pull_runtime_states'}
+
+    def __init__(self, state):
+        self.state = state
+        self.calls = []
+
+    def pull_runtime_states(self, instances):
+        self.calls.append(instances)
+        for instance in instances:
+            instance.runtime_state = self.state
+            instance.save(update_fields=['runtime_state'])
+
+
+@mock.patch('waldur_core.core.tasks.poll_group')
+@mock.patch('waldur_core.core.tasks.signature')
+class PollSchedulerTest(TestCase):
+    def setUp(self):
+        spl = structure_factories.TestServiceProjectLinkFactory()
+        self.instances = structure_factories.TestNewInstanceFactory.create_batch(
+            2, service_project_link=spl, runtime_state='building'
+        )
+        for instance in self.instances:
+            PollScheduler.register(
+                instance, 'pull_runtime_state', ('online', 'erred'), {'task': 'poll'}
+            )
+        self.group = PollScheduler.get_group(self.instances[0], 'pull_runtime_state')
+
+    def tearDown(self):
+        cache.clear()
+
+    def poll(self, state):
+        backend = PollBackend(state)
+        with mock.patch.object(
+            structure_models.TestNewInstance, 'get_backend', return_value=backend
+        ):
+            PollScheduler.poll(self.group)
+        return backend
+
+    def test_objects_of_the_same_settings_are_pulled_in_batch(self, signature, _):
+        PollScheduler.notify(self.instances[0], 'pull_runtime_state')
+        PollScheduler.notify(self.instances[1], 'pull_runtime_state')
+
+        backend = self.poll('online')
+
+        self.assertEqual(len(backend.calls), 1)
+        self.assertEqual(len(backend.calls[0]), 2)
+        self.assertEqual(signature.return_value.apply_async.call_count, 2)
+        self.assertEqual(PollScheduler.pop_result(self.instances[0]), 'done')
+        self.assertEqual(PollScheduler.get_stats(), {})
+
+    def test_pending_object_is_checked_with_backoff(self, signature, _):
+        PollScheduler.notify(self.instances[0], 'pull_runtime_state')
+
+        backend = self.poll('building')
+
+        self.assertEqual(len(backend.calls[0]), 1)
+        self.assertEqual(signature.return_value.apply_async.call_count, 0)
+        self.assertEqual(PollScheduler.get_stats()[self.group]['pending'], 2)
+
+        backend = self.poll('building')
+        self.assertEqual(backend.calls, [])
+
+    def test_notification_triggers_poll_of_group(self, signature, poll_group):
+        self.assertTrue(PollScheduler.notify(self.instances[0], 'pull_runtime_state'))
+        poll_group.delay.assert_called_once_with(self.group)
+
+    def test_continuation_is_dispatched_once_if_polls_overlap(self, signature, _):
+        PollScheduler.notify(self.instances[0], 'pull_runtime_state')
+        backend = PollBackend('online')
+        pull_runtime_states = backend.pull_runtime_states
+
+        def overlapping_pull(instances):
+            pull_runtime_states(instances)
+            if len(backend.calls) == 1:
+                # Another poll of the same group starts before the first one is finished
+                PollScheduler.poll(self.group)
+
+        backend.pull_runtime_states = overlapping_pull
+        with mock.patch.object(
+            structure_models.TestNewInstance, 'get_backend', return_value=backend
+        ):
+            PollScheduler.poll(self.group)
+
+        self.assertEqual(len(backend.calls), 2)
+        self.assertEqual(signature.return_value.apply_async.call_count, 1)
@@ -0,0 +1,79 @@
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase
+
+from waldur_core.core import utils
+from waldur_core.core.tests.helpers import override_waldur_core_settings
+
+
+class SendMessagesTest(TestCase):
+    def get_messages(self, count):
+        return [
+            utils.get_mail_with_attachment(
+                'Subject', 'Body', to=['user%s@example.com' % i]
+            )
+            for i in range(count)
+        ]
+
+    def test_each_recipient_gets_separate_message(self):
+        utils.send_messages(self.get_messages(3))
+        self.assertEqual(len(mail.outbox), 3)
+        for message in mail.outbox:
+            self.assertEqual(len(message.to), 1)
+
+    @override_waldur_core_settings(EMAIL_CHUNK_SIZE=2)
+    @mock.patch('waldur_core.core.utils.get_connection')
+    def test_connection_is_opened_once_per_chunk(self, get_connection):
+        get_connection().send_messages.side_effect = len
+        get_connection.reset_mock()
+
+        sent = utils.send_messages(self.get_messages(5))
+
+        self.assertEqual(sent, 5)
+        self.assertEqual(get_connection.call_count, 3)
+
+
+class BatchFetcherTest(TestCase):
+    @override_waldur_core_settings(HTTP_CHUNK_SIZE=2, HTTP_FETCH_WORKERS=3)
+    def test_chunks_are_merged_in_original_order(self):
+        fetcher = mock.Mock(side_effect=lambda chunk: [item * 10 for item in chunk])
+        fetch = utils.create_batch_fetcher(fetcher)
+
+        self.assertEqual(fetch([1, 2, 3, 4, 5]), [10, 20, 30, 40, 50])
+        self.assertEqual(fetcher.call_count, 3)
+
+    def test_exception_is_raised_in_caller_thread(self):
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            utils.fetch_concurrently({'ok': lambda: 1, 'fail': fail}, workers=2)
+
+
+class CacheLockTest(TestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_critical_section_is_skipped_if_lock_is_busy(self):
+        cache.add('lock', 'other', 10)
+        executed = []
+
+        with self.assertRaises(utils.CacheLockTimeout):
+            with utils.cache_lock('lock', timeout=0):
+                executed.append(True)
+
+        self.assertEqual(executed, [])
+        self.assertEqual(cache.get('lock'), 'other')
+
+    def test_lock_acquired_by_another_worker_is_not_released(self):
+        with utils.cache_lock('lock'):
+            # Lock has expired and it is acquired by another worker
+            cache.set('lock', 'other', 10)
+        self.assertEqual(cache.get('lock'), 'other')
+
+    def test_lock_is_released(self):
+        with utils.cache_lock('lock'):
+            pass
+        self.assertIsNone(cache.get('lock'))
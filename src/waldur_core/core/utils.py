@@ -9,6 +9,8 @@ import unicodedata
 import uuid
 import warnings
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from itertools import chain
 from operator import itemgetter
 
@@ -17,7 +19,8 @@ import requests
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMultiAlternatives
+from django.core.cache import cache
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.core.serializers.json import DjangoJSONEncoder
@@ -200,7 +203,7 @@ def format_text(template_name, context):
     return template.render(Context(context, autoescape=False)).strip()
 
 
-def send_mail_with_attachment(
+def get_mail_with_attachment(
     subject,
     body,
     to,
@@ -220,9 +223,50 @@ def send_mail_with_attachment(
 
     if filename:
         email.attach(filename, attachment, content_type)
+    return email
+
+
+def send_mail_with_attachment(
+    subject,
+    body,
+    to,
+    from_email=None,
+    html_message=None,
+    filename=None,
+    attachment=None,
+    content_type='text/plain',
+):
+    email = get_mail_with_attachment(
+        subject,
+        body,
+        to,
+        from_email=from_email,
+        html_message=html_message,
+        filename=filename,
+        attachment=attachment,
+        content_type=content_type,
+    )
     return email.send()
 
 
+def _send_messages_chunk(messages):
+    return get_connection().send_messages(messages) or 0
+
+
+def send_messages(messages):
+    """
+    Send email messages in chunks. Each chunk is sent over single SMTP connection,
+    chunks are sent concurrently.
+    """
+    message_chunks = list(chunks(messages, settings.WALDUR_CORE['EMAIL_CHUNK_SIZE']))
+    if len(message_chunks) <= 1:
+        return sum(map(_send_messages_chunk, message_chunks))
+
+    workers = min(settings.WALDUR_CORE['EMAIL_WORKERS'], len(message_chunks))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(_send_messages_chunk, message_chunks))
+
+
 def broadcast_mail(
     app,
     event_type,
@@ -244,8 +288,9 @@ def broadcast_mail(
 
     By default, built-in Django send_mail is used, all members
     of the recipient list will see the other recipients in the 'To' field.
-    Contrary to this, we're using explicit loop in order to ensure that
-    recipients would NOT see the other recipients.
+    Contrary to this, we're building separate message for each recipient
+    in order to ensure that recipients would NOT see the other recipients.
+    Templates are rendered once and messages are sent in bulk.
 
     :param app: prefix for template filename.
     :param event_type: postfix for template filename.
@@ -264,8 +309,8 @@ def broadcast_mail(
     html_template_name = '%s/%s_message.html' % (app, event_type)
     html_message = render_to_string(html_template_name, context)
 
-    for recipient in recipient_list:
-        send_mail_with_attachment(
+    messages = [
+        get_mail_with_attachment(
             subject,
             text_message,
             to=[recipient],
@@ -274,6 +319,9 @@ def broadcast_mail(
             attachment=attachment,
             content_type=content_type,
         )
+        for recipient in recipient_list
+    ]
+    return send_messages(messages)
 
 
 def get_ordering(request):
@@ -323,12 +371,30 @@ def chunks(xs, n):
     return [xs[i : i + n] for i in range(0, len(xs), n)]
 
 
+def fetch_concurrently(fetchers, workers=None):
+    """
+    Run independent backend calls concurrently using bounded thread pool.
+    Callables must not access database, because connection is bound to caller thread.
+    Exception raised by any callable is re-raised in caller thread.
+
+    :param fetchers: mapping from name to callable without arguments
+    :return: mapping from name to result of callable
+    """
+    workers = min(workers or settings.WALDUR_CORE['HTTP_FETCH_WORKERS'], len(fetchers))
+    if workers <= 1:
+        return {name: fetcher() for name, fetcher in fetchers.items()}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {name: executor.submit(fetcher) for name, fetcher in fetchers.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
 def create_batch_fetcher(fetcher):
     """
     Decorator to simplify code for chunked fetching.
     It fetches resources from backend API in evenly sized chunks.
     It is needed in order to avoid too long HTTP request error.
     Essentially, it gives the same result as fetcher(items) but does not throw an error.
+    Chunks are fetched concurrently, results are merged in the original order.
 
     :param fetcher: fetcher: function which accepts list of items and returns list of results,
     for example, list of UUIDs and returns list of projects with given UUIDs
@@ -341,14 +407,31 @@ def create_batch_fetcher(fetcher):
         :param items: list of items for request, for example, list of UUIDs
         :return: merged list of results
         """
+        item_chunks = chunks(items, settings.WALDUR_CORE['HTTP_CHUNK_SIZE'])
+        results = fetch_concurrently(
+            {
+                index: functools.partial(fetcher, chunk)
+                for index, chunk in enumerate(item_chunks)
+            }
+        )
         result = []
-        for chunk in chunks(items, settings.WALDUR_CORE['HTTP_CHUNK_SIZE']):
-            result.extend(fetcher(chunk))
+        for index in range(len(item_chunks)):
+            result.extend(results[index])
         return result
 
     return wrapped
 
 
+@contextmanager
+def log_duration(logger, message, *args):
+    """ Log how long execution of the block has taken """
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        logger.info(message + ' took %.2f seconds.', *args, time.monotonic() - start)
+
+
 class DryRunCommand(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
@@ -438,3 +521,76 @@ def get_lat_lon_from_address(address):
 
     if location:
         return location.latitude, location.longitude
+
+
+class CacheLockTimeout(Exception):
+    pass
+
+
+@contextmanager
+def cache_lock(key, timeout=10):
+    """
+    Mutual exclusion between workers based on atomic cache.add.
+    Stale lock expires after timeout. If lock is not acquired within timeout,
+    CacheLockTimeout is raised and critical section is not executed.
+    Lock is released only if it is still held by current owner,
+    so that lock acquired by another worker after expiration is kept.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while not cache.add(key, token, timeout):
+        if time.monotonic() > deadline:
+            raise CacheLockTimeout('Unable to acquire lock %s.' % key)
+        time.sleep(0.01)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+class CacheSemaphore:
+    """
+    Counting semaphore shared by all workers and kept in cache.
+    Each slot is stored as separate cache key which expires after timeout,
+    so that slots held by dead workers are eventually released.
+    """
+
+    def __init__(self, name, limit, timeout):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+
+    def _get_slot_keys(self):
+        return ['semaphore:%s:%s' % (self.name, index) for index in range(self.limit)]
+
+    def _get_owner_key(self, owner):
+        return 'semaphore_owner:%s:%s' % (self.name, owner)
+
+    def acquire(self, owner):
+        """ Return True if slot is acquired by owner and False if all slots are busy """
+        owner_key = self._get_owner_key(owner)
+        key = cache.get(owner_key)
+        if key and cache.get(key) == owner:
+            return True
+
+        for key in self._get_slot_keys():
+            if cache.add(key, owner, self.timeout):
+                cache.set(owner_key, key, self.timeout)
+                return True
+        return False
+
+    def release(self, owner):
+        owner_key = self._get_owner_key(owner)
+        key = cache.get(owner_key)
+        if not key:
+            return False
+        keys = [owner_key]
+        # Slot may have expired and may have been acquired by another owner already.
+        if cache.get(key) == owner:
+            keys.append(key)
+        cache.delete_many(keys)
+        return len(keys) > 1
+
+    def get_usage(self):
+        return len(cache.get_many(self._get_slot_keys()))
@@ -23,6 +23,7 @@ from rest_framework.views import exception_handler as rf_exception_handler
 
 from waldur_core import __version__
 from waldur_core.core import WaldurExtension, permissions
+from waldur_core.core.authentication import get_token_last_seen
 from waldur_core.core.exceptions import ExtensionDisabled, IncorrectStateException
 from waldur_core.core.mixins import ensure_atomic_transaction
 from waldur_core.core.serializers import AuthTokenSerializer
@@ -63,7 +64,7 @@ class RefreshTokenMixin:
         if user.token_lifetime:
             lifetime = timezone.timedelta(seconds=user.token_lifetime)
 
-            if token.created < timezone.now() - lifetime:
+            if get_token_last_seen(token) < timezone.now() - lifetime:
                 token.delete()
                 token = Token.objects.create(user=user)
                 created = True
@@ -124,6 +124,12 @@ class ReportAdmin(UpdateOnlyModelAdmin, ExtraActionsMixin, admin.ModelAdmin):
     create_report.short_description = _('Create report')
 
 
+class HookDeliveryFailureAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    list_display = ('event', 'hook_content_type', 'destination', 'attempts', 'created')
+    list_filter = ('hook_content_type', 'created')
+    search_fields = ('destination', 'error_message')
+
+
 # This hack is needed because core admin is imported several times.
 if admin.site.is_registered(Group):
     admin.site.unregister(Group)
@@ -134,3 +140,4 @@ admin.site.register(models.EmailHook, EmailHookAdmin)
 admin.site.register(models.PushHook, PushHookAdmin)
 admin.site.register(models.Report, ReportAdmin)
 admin.site.register(models.Event, EventAdmin)
+admin.site.register(models.HookDeliveryFailure, HookDeliveryFailureAdmin)
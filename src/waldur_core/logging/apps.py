@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
 from django.db.models import signals
 
 
@@ -8,9 +9,71 @@ class EventsConfig(AppConfig):
 
     def ready(self):
         from waldur_core.logging import handlers, models
+        from waldur_core.structure import models as structure_models
+        from waldur_core.structure import signals as structure_signals
 
         signals.post_save.connect(
             handlers.process_hook,
             sender=models.Event,
             dispatch_uid='waldur_core.logging.handlers.process_hook',
         )
+
+        for model in models.BaseHook.get_all_models() + [models.SystemNotification]:
+            signals.post_save.connect(
+                handlers.clean_hook_routing_table,
+                sender=model,
+                dispatch_uid='waldur_core.logging.handlers.'
+                'clean_hook_routing_table_after_%s_saved' % model.__name__,
+            )
+
+            signals.post_delete.connect(
+                handlers.clean_hook_routing_table,
+                sender=model,
+                dispatch_uid='waldur_core.logging.handlers.'
+                'clean_hook_routing_table_after_%s_deleted' % model.__name__,
+            )
+
+        for model in (
+            structure_models.CustomerPermission,
+            structure_models.ProjectPermission,
+        ):
+            signals.post_save.connect(
+                handlers.clean_hook_scope_ids_after_permission_changed,
+                sender=model,
+                dispatch_uid='waldur_core.logging.handlers.'
+                'clean_hook_scope_ids_after_%s_saved' % model.__name__,
+            )
+
+            signals.post_delete.connect(
+                handlers.clean_hook_scope_ids_after_permission_changed,
+                sender=model,
+                dispatch_uid='waldur_core.logging.handlers.'
+                'clean_hook_scope_ids_after_%s_deleted' % model.__name__,
+            )
+
+        # permissions are revoked using bulk update, therefore post_save is not emitted
+        for model in (structure_models.Customer, structure_models.Project):
+            structure_signals.structure_role_revoked.connect(
+                handlers.clean_hook_scope_ids_after_role_revoked,
+                sender=model,
+                dispatch_uid='waldur_core.logging.handlers.'
+                'clean_hook_scope_ids_after_%s_role_revoked' % model.__name__,
+            )
+
+        signals.post_save.connect(
+            handlers.clean_hook_scope_ids_after_user_saved,
+            sender=get_user_model(),
+            dispatch_uid='waldur_core.logging.handlers.clean_hook_scope_ids_after_user_saved',
+        )
+
+        signals.post_save.connect(
+            handlers.clean_hook_scope_ids_after_project_saved,
+            sender=structure_models.Project,
+            dispatch_uid='waldur_core.logging.handlers.clean_hook_scope_ids_after_project_saved',
+        )
+
+        signals.post_delete.connect(
+            handlers.clean_hook_scope_ids_after_project_deleted,
+            sender=structure_models.Project,
+            dispatch_uid='waldur_core.logging.handlers.clean_hook_scope_ids_after_project_deleted',
+        )
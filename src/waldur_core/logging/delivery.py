@@ -0,0 +1,380 @@
+"""
+Delivery of events via web, push and email hooks.
+
+HTTP requests are sent through a pooled session per destination host.
+Number of concurrent requests to each host is limited by semaphore
+shared by all workers. Email messages are put into queue and messages
+of all pending events are sent over single SMTP connection. Failed
+deliveries are retried by Celery task with exponential backoff instead of
+blocking the worker. Deliveries which have failed after all retries are
+stored in dead-letter table.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.mail import get_connection
+from requests.adapters import HTTPAdapter
+
+from waldur_core.core import utils as core_utils
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+EMAIL_QUEUE_KEY = 'hook_delivery:email_queue'
+EMAIL_QUEUE_LOCK_KEY = 'hook_delivery:email_queue_lock'
+# Marker of worker which is sending emails, it expires if worker is killed
+EMAIL_SENDER_KEY = 'hook_delivery:email_sender'
+EMAIL_SENDER_TIMEOUT = 10 * 60
+
+_lock = threading.Lock()
+_sessions = {}
+
+
+class HostBusyError(Exception):
+    """ Concurrency limit of destination host is reached by other deliveries """
+
+
+def get_delivery_settings():
+    return settings.WALDUR_CORE['HOOK_DELIVERY']
+
+
+def get_retry_delay(attempt):
+    """ Return delay in seconds before next attempt after given failed attempt """
+    return get_delivery_settings()['BACKOFF_FACTOR'] * (2 ** (attempt - 1))
+
+
+def _get_host(url):
+    parsed = urlparse(url)
+    return '%s://%s' % (parsed.scheme, parsed.netloc)
+
+
+def get_session(url):
+    """ Return HTTP session with connection pool for destination host """
+    host = _get_host(url)
+    with _lock:
+        if host not in _sessions:
+            conf = get_delivery_settings()
+            adapter = HTTPAdapter(pool_maxsize=conf['HOST_CONCURRENCY'])
+            session = requests.Session()
+            session.mount(host, adapter)
+            _sessions[host] = session
+        return _sessions[host]
+
+
+def get_host_semaphore(url):
+    conf = get_delivery_settings()
+    return core_utils.CacheSemaphore(
+        'hook_delivery:%s' % _get_host(url),
+        conf['HOST_CONCURRENCY'],
+        # Slot is released by worker when request is completed,
+        # timeout only covers workers which have been killed.
+        conf['TIMEOUT'] * 2,
+    )
+
+
+def post(url, **kwargs):
+    """
+    Send POST request to destination host respecting its concurrency limit.
+    HostBusyError is raised if limit is reached, so that request is deferred.
+    """
+    session = get_session(url)
+    semaphore = get_host_semaphore(url)
+    owner = uuid.uuid4().hex
+    if not semaphore.acquire(owner):
+        raise HostBusyError('Concurrency limit of %s is reached.' % _get_host(url))
+    kwargs.setdefault('timeout', get_delivery_settings()['TIMEOUT'])
+    try:
+        response = session.post(url, **kwargs)
+    finally:
+        semaphore.release(owner)
+    response.raise_for_status()
+    return response
+
+
+def is_retryable(error):
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRY_STATUSES
+    return False
+
+
+def _get_stats_key(hook, name):
+    return 'hook_delivery:%s:%s:%s' % (hook._meta.label_lower, hook.pk, name)
+
+
+def _increment(key, delta):
+    if not cache.add(key, delta, None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            # Counter has been deleted concurrently
+            cache.set(key, delta, None)
+
+
+def record_delivery(hook, latency, failed=False):
+    # Transient hooks created for system notifications are not tracked
+    if hook.pk is None:
+        return
+    _increment(_get_stats_key(hook, 'failed' if failed else 'sent'), 1)
+    _increment(_get_stats_key(hook, 'latency'), int(latency * 1000))
+
+
+def get_stats(hooks):
+    """ Return number of sent and failed deliveries and average latency per hook """
+    names = ('sent', 'failed', 'latency')
+    keys = [_get_stats_key(hook, name) for hook in hooks for name in names]
+    values = cache.get_many(keys)
+    stats = {}
+    for hook in hooks:
+        sent, failed, latency = [
+            values.get(_get_stats_key(hook, name), 0) for name in names
+        ]
+        total = sent + failed
+        stats[hook] = {
+            'sent': sent,
+            'failed': failed,
+            'avg_latency': total and latency / total / 1000.0 or None,
+        }
+    return stats
+
+
+def store_failure(event, hook, error, attempts):
+    from waldur_core.logging.models import HookDeliveryFailure
+
+    logger.warning(
+        'Unable to deliver event %s via hook %s (PK=%s). Error: %s',
+        event.uuid.hex,
+        hook._meta.label,
+        hook.pk,
+        error,
+    )
+    HookDeliveryFailure.objects.create(
+        event=event,
+        hook_content_type=ContentType.objects.get_for_model(hook),
+        hook_object_id=hook.pk,
+        destination=str(hook.get_destination())[:255],
+        attempts=attempts,
+        error_message=str(error),
+    )
+
+
+def _process(hook, event):
+    start = time.monotonic()
+    try:
+        hook.process(event)
+    except Exception as e:
+        return hook, time.monotonic() - start, e
+    return hook, time.monotonic() - start, None
+
+
+def schedule_http_retry(event, hooks, countdown):
+    from waldur_core.logging import tasks
+
+    serialized_hooks = [
+        (core_utils.serialize_instance(hook), attempt) for hook, attempt in hooks
+    ]
+    tasks.retry_hook_delivery.apply_async(
+        args=(event.id, serialized_hooks), countdown=countdown
+    )
+
+
+def deliver_http(event, hooks):
+    """
+    Process hooks concurrently. Hooks are passed as list of (hook, attempt) pairs.
+    Failed deliveries are scheduled for retry instead of blocking the worker.
+    """
+    if not hooks:
+        return
+    conf = get_delivery_settings()
+    attempts = conf['RETRIES'] + 1
+    workers = min(conf['WORKERS'], len(hooks))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda item: _process(item[0], event), hooks))
+
+    # Results are stored in the caller thread which owns database connection
+    retries = defaultdict(list)
+    for (hook, latency, error), (_, attempt) in zip(results, hooks):
+        # Transient hooks created for system notifications can not be retried
+        can_retry = hook.pk is not None
+        if error is None:
+            record_delivery(hook, latency)
+        elif isinstance(error, HostBusyError) and can_retry:
+            # Request has not been sent, so that attempt is not spent
+            retries[get_retry_delay(1)].append((hook, attempt))
+        elif is_retryable(error) and can_retry and attempt < attempts:
+            retries[get_retry_delay(attempt)].append((hook, attempt + 1))
+        else:
+            record_delivery(hook, latency, failed=True)
+            store_failure(event, hook, error, attempt)
+
+    for countdown, pending in retries.items():
+        schedule_http_retry(event, pending, countdown)
+
+
+def _update_email_queue(update):
+    with core_utils.cache_lock(EMAIL_QUEUE_LOCK_KEY):
+        queue = cache.get(EMAIL_QUEUE_KEY) or []
+        queue, result = update(queue)
+        cache.set(EMAIL_QUEUE_KEY, queue, None)
+    return result
+
+
+def enqueue_emails(entries):
+    _update_email_queue(lambda queue: (queue + entries, None))
+
+
+def _pop_due_emails():
+    now = time.time()
+
+    def update(queue):
+        due = [entry for entry in queue if entry['due'] <= now]
+        return [entry for entry in queue if entry['due'] > now], due
+
+    return _update_email_queue(update)
+
+
+def _has_due_emails():
+    now = time.time()
+    queue = cache.get(EMAIL_QUEUE_KEY) or []
+    return any(entry['due'] <= now for entry in queue)
+
+
+def get_email_entry(event, hook, attempt=1, due=None):
+    """
+    Email hook is referenced by content type and primary key, so that entry can be
+    stored in cache. Transient hooks of system notifications are restored by email.
+    """
+    return {
+        'event_id': event.id,
+        'hook_content_type_id': ContentType.objects.get_for_model(hook).id,
+        'hook_id': hook.pk,
+        'email': hook.email,
+        'attempt': attempt,
+        'due': due or time.time(),
+    }
+
+
+def _load_email_entries(entries):
+    from waldur_core.logging.models import Event
+
+    event_ids = {entry['event_id'] for entry in entries}
+    events = Event.objects.in_bulk(event_ids)
+    items = []
+    for entry in entries:
+        event = events.get(entry['event_id'])
+        if not event:
+            continue
+        content_type = ContentType.objects.get_for_id(entry['hook_content_type_id'])
+        model = content_type.model_class()
+        if entry['hook_id'] is None:
+            hook = model(email=entry['email'])
+        else:
+            hook = model.objects.filter(pk=entry['hook_id'], is_active=True).first()
+            if not hook:
+                continue
+        message = hook.get_message(event)
+        if message:
+            items.append((entry, event, hook, message))
+    return items
+
+
+def _send_email_batch(entries):
+    """
+    Send messages one by one over shared connection, so that
+    only messages which have failed are sent again.
+    """
+    items = _load_email_entries(entries)
+    if not items:
+        return
+
+    errors = {}
+    latencies = defaultdict(int)
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        errors = {index: e for index in range(len(items))}
+    else:
+        try:
+            for index, (_, _, _, message) in enumerate(items):
+                start = time.monotonic()
+                try:
+                    connection.send_messages([message])
+                except Exception as e:
+                    errors[index] = e
+                latencies[index] += time.monotonic() - start
+        finally:
+            connection.close()
+
+    attempts = get_delivery_settings()['RETRIES'] + 1
+    now = time.time()
+    retries = []
+    for index, (entry, event, hook, _) in enumerate(items):
+        error = errors.get(index)
+        if error is None:
+            record_delivery(hook, latencies[index])
+        elif entry['attempt'] < attempts:
+            due = now + get_retry_delay(entry['attempt'])
+            retries.append(dict(entry, attempt=entry['attempt'] + 1, due=due))
+        else:
+            record_delivery(hook, latencies[index], failed=True)
+            store_failure(event, hook, error, entry['attempt'])
+
+    if retries:
+        from waldur_core.logging import tasks
+
+        enqueue_emails(retries)
+        for due in {entry['due'] for entry in retries}:
+            tasks.send_pending_emails.apply_async(countdown=due - now)
+
+
+def send_pending_emails():
+    """
+    Send emails of all pending events over single SMTP connection.
+    If another worker is sending emails already, new entries are sent by it.
+    """
+    while True:
+        if not cache.add(EMAIL_SENDER_KEY, True, EMAIL_SENDER_TIMEOUT):
+            return
+        try:
+            entries = _pop_due_emails()
+            while entries:
+                _send_email_batch(entries)
+                entries = _pop_due_emails()
+        finally:
+            cache.delete(EMAIL_SENDER_KEY)
+        # Entries could be added after queue has been checked
+        # but before marker has been deleted.
+        if not _has_due_emails():
+            return
+
+
+def deliver_email(event, hooks):
+    entries = [get_email_entry(event, hook) for hook in hooks if hook.email]
+    if not entries:
+        return
+    enqueue_emails(entries)
+    send_pending_emails()
+
+
+def deliver(event, hooks):
+    """
+    Deliver event via hooks. Email hooks are sent over single SMTP connection,
+    other hooks are processed concurrently.
+    """
+    email_hooks = [hook for hook in hooks if hasattr(hook, 'get_message')]
+    other_hooks = [hook for hook in hooks if not hasattr(hook, 'get_message')]
+    deliver_email(event, email_hooks)
+    deliver_http(event, [(hook, 1) for hook in other_hooks])
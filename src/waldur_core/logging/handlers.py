@@ -1,7 +1,57 @@
 from django.db import transaction
 
-from waldur_core.logging import tasks
+from waldur_core.logging import tasks, utils
 
 
 def process_hook(sender, instance, created=False, **kwargs):
     transaction.on_commit(lambda: tasks.process_event.delay(instance.pk))
+
+
+def clean_hook_routing_table(sender, instance, **kwargs):
+    utils.clean_hook_routing_table()
+    transaction.on_commit(utils.clean_hook_routing_table)
+
+
+def _clean_hook_scope_ids(user_ids):
+    # Cache is cleaned again after commit, because concurrent request
+    # could cache old scopes before transaction is committed.
+    user_ids = list(user_ids)
+    utils.clean_hook_scope_ids(user_ids)
+    transaction.on_commit(lambda: utils.clean_hook_scope_ids(user_ids))
+
+
+def clean_hook_scope_ids_after_permission_changed(sender, instance, **kwargs):
+    _clean_hook_scope_ids([instance.user_id])
+
+
+def clean_hook_scope_ids_after_role_revoked(sender, structure, user, **kwargs):
+    _clean_hook_scope_ids([user.pk])
+
+
+def clean_hook_scope_ids_after_user_saved(sender, instance, **kwargs):
+    # Staff and support users are allowed to see all scopes
+    _clean_hook_scope_ids([instance.pk])
+
+
+def _clean_hook_scope_ids_for_customer_members(customer_id):
+    from waldur_core.structure.models import CustomerPermission
+
+    user_ids = CustomerPermission.objects.filter(
+        customer_id=customer_id, is_active=True
+    ).values_list('user_id', flat=True)
+    _clean_hook_scope_ids(user_ids)
+
+
+def clean_hook_scope_ids_after_project_saved(sender, instance, created=False, **kwargs):
+    # Customer members are allowed to see all projects of customer
+    if created:
+        _clean_hook_scope_ids_for_customer_members(instance.customer_id)
+    elif instance.tracker.has_changed('customer_id'):
+        _clean_hook_scope_ids_for_customer_members(instance.customer_id)
+        _clean_hook_scope_ids_for_customer_members(
+            instance.tracker.previous('customer_id')
+        )
+
+
+def clean_hook_scope_ids_after_project_deleted(sender, instance, **kwargs):
+    _clean_hook_scope_ids_for_customer_members(instance.customer_id)
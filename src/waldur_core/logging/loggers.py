@@ -2,6 +2,7 @@
 
 import datetime
 import decimal
+import functools
 import importlib
 import logging
 import types
@@ -9,11 +10,15 @@ import uuid
 from collections import defaultdict
 
 from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import signals
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
 
 from waldur_core.logging import models
 from waldur_core.logging.log import EventLoggerAdapter
-from waldur_core.logging.middleware import get_event_context
+from waldur_core.logging.middleware import get_event_batch, get_event_context
 
 logger = logging.getLogger(__name__)
 
@@ -226,13 +231,55 @@ class EventLogger(BaseLogger):
         log = getattr(self.logger, level)
         log(msg, extra={'event_type': event_type, 'event_context': context})
 
-        event = models.Event.objects.create(
-            event_type=event_type, message=msg, context=context,
-        )
+        event = models.Event(event_type=event_type, message=msg, context=context)
+        feeds = []
         if event_context:
             for scope in self.get_scopes(event_context) or []:
                 if scope and scope.id:
-                    models.Feed.objects.create(scope=scope, event=event)
+                    # Scope is stored as content type and ID,
+                    # because it could be deleted before batch is flushed.
+                    content_type = ContentType.objects.get_for_model(scope)
+                    feeds.append((content_type, scope.id))
+
+        batch = get_event_batch()
+        if batch is None:
+            save_events([(event, feeds)])
+        else:
+            # Event is discarded if transaction or savepoint is rolled back
+            transaction.on_commit(functools.partial(add_event, batch, event, feeds))
+
+
+def add_event(batch, event, feeds):
+    """
+    Add committed event to batch. If batch has been finished before transaction
+    is committed, event is saved immediately, otherwise it would be lost.
+    """
+    if get_event_batch() is batch and batch.depth > 0:
+        batch.add(event, feeds)
+    else:
+        save_events([(event, feeds)])
+
+
+def save_events(events):
+    """
+    Store events and their feeds using bulk insert.
+    Events are represented as list of pairs (event, feeds),
+    where feeds is a list of pairs (content_type, object_id).
+    """
+    with transaction.atomic():
+        created_events = models.Event.objects.bulk_create(
+            [event for event, _ in events]
+        )
+        models.Feed.objects.bulk_create(
+            [
+                models.Feed(event=event, content_type=content_type, object_id=object_id)
+                for event, feeds in events
+                for content_type, object_id in feeds
+            ]
+        )
+        # post_save signal is not emitted for bulk insert
+        for event in created_events:
+            signals.post_save.send(sender=models.Event, instance=event, created=True)
 
 
 class LoggableMixin:
@@ -243,10 +290,23 @@ class LoggableMixin:
     def get_log_fields(self):
         return ('uuid', 'name')
 
-    def _get_log_context(self, entity_name=None):
+    def _get_related_key(self, field):
+        """ Return model and ID of object referenced by foreign key without fetching it """
+        descriptor = getattr(self.__class__, field, None)
+        if isinstance(descriptor, ForwardManyToOneDescriptor):
+            object_id = getattr(self, descriptor.field.attname, None)
+            if object_id is not None:
+                return descriptor.field.related_model, object_id, field
 
+    def _get_log_context(self, entity_name=None):
+        batch = get_event_batch()
         context = {}
         for field in self.get_log_fields():
+            related_key = batch and self._get_related_key(field)
+            if related_key and related_key in batch.contexts:
+                context.update(batch.contexts[related_key])
+                continue
+
             field_class = None
             try:
                 if not hasattr(self, field):
@@ -275,7 +335,10 @@ class LoggableMixin:
             if isinstance(value, uuid.UUID):
                 context[name] = value.hex
             elif isinstance(value, LoggableMixin):
-                context.update(value._get_log_context(field))
+                value_context = value._get_log_context(field)
+                if related_key:
+                    batch.contexts[related_key] = value_context
+                context.update(value_context)
             elif isinstance(value, datetime.date):
                 context[name] = value.isoformat()
             elif isinstance(value, decimal.Decimal):
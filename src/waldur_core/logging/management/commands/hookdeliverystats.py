@@ -0,0 +1,34 @@
+import prettytable
+from django.core.management.base import BaseCommand
+
+from waldur_core.logging import delivery, models
+
+
+def format_latency(value):
+    return '-' if value is None else '%.3f' % value
+
+
+class Command(BaseCommand):
+    help = "Show number of delivered and failed events and latency per hook."
+
+    def handle(self, *args, **options):
+        hooks = [
+            hook
+            for model in models.BaseHook.get_all_models()
+            for hook in model.objects.filter(is_active=True)
+        ]
+        stats = delivery.get_stats(hooks)
+        columns = ['Hook', 'Destination', 'Sent', 'Failed', 'Avg latency, s']
+        table = prettytable.PrettyTable(columns)
+        for hook in hooks:
+            item = stats[hook]
+            table.add_row(
+                [
+                    '%s %s' % (hook._meta.verbose_name, hook.uuid.hex),
+                    hook.get_destination(),
+                    item['sent'],
+                    item['failed'],
+                    format_latency(item['avg_latency']),
+                ]
+            )
+        self.stdout.write(table.get_string())
@@ -18,6 +18,52 @@ def reset_event_context():
         del _locals.context
 
 
+class EventBatch:
+    """
+    Buffer for events emitted during request or task processing.
+    Events are added to buffer when transaction is committed
+    and they are stored in database in bulk when batch is finished.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.events = []
+        # Log contexts of related objects are memoized for the duration of the batch
+        self.contexts = {}
+
+    def add(self, event, feeds):
+        self.events.append((event, feeds))
+
+    def flush(self):
+        from waldur_core.logging.loggers import save_events
+
+        events, self.events = self.events, []
+        if events:
+            save_events(events)
+
+
+def get_event_batch():
+    return getattr(_locals, 'event_batch', None)
+
+
+def start_event_batch():
+    batch = get_event_batch()
+    if batch is None:
+        batch = _locals.event_batch = EventBatch()
+    batch.depth += 1
+    return batch
+
+
+def finish_event_batch():
+    batch = get_event_batch()
+    if batch is None:
+        return
+    batch.depth -= 1
+    if batch.depth == 0:
+        del _locals.event_batch
+        batch.flush()
+
+
 def set_current_user(user):
     context = get_event_context() or {}
     context.update(user._get_log_context('user'))
@@ -36,6 +82,8 @@ def get_ip_address(request):
 
 class CaptureEventContextMiddleware(MiddlewareMixin):
     def process_request(self, request):
+        start_event_batch()
+
         ip_address = get_ip_address(request)
         if not ip_address:
             return
@@ -49,4 +97,5 @@ class CaptureEventContextMiddleware(MiddlewareMixin):
 
     def process_response(self, request, response):
         reset_event_context()
+        finish_event_batch()
         return response
@@ -1,13 +1,12 @@
 import logging
 
-import requests
 from django.apps import apps
 from django.conf import settings
 from django.contrib.contenttypes import fields as ct_fields
 from django.contrib.contenttypes import models as ct_models
 from django.contrib.postgres.fields import JSONField as BetterJSONField
 from django.core import validators
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives
 from django.db import models
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -18,6 +17,7 @@ from model_utils.models import TimeStampedModel
 
 from waldur_core.core.fields import JSONField, UUIDField
 from waldur_core.core.managers import GenericKeyMixin
+from waldur_core.logging import delivery
 
 logger = logging.getLogger(__name__)
 
@@ -94,19 +94,21 @@ class BaseHook(EventTypesMixin, UuidMixin, TimeStampedModel):
 
     @property
     def all_event_types(self):
+        return set(self.event_types) | self.get_system_event_types()
+
+    @classmethod
+    def get_system_event_types(cls):
+        """ Return event types enabled for all hooks of this type via system notification """
         from waldur_core.logging import loggers
 
-        self_types = set(self.event_types)
         try:
-            hook_ct = ct_models.ContentType.objects.get_for_model(self)
+            hook_ct = ct_models.ContentType.objects.get_for_model(cls)
             base_types = SystemNotification.objects.get(hook_content_type=hook_ct)
         except SystemNotification.DoesNotExist:
-            return self_types
+            return set()
         else:
-            return (
-                self_types
-                | set(loggers.expand_event_groups(base_types.event_groups))
-                | set(base_types.event_types)
+            return set(loggers.expand_event_groups(base_types.event_groups)) | set(
+                base_types.event_types
             )
 
     @classmethod
@@ -153,7 +155,7 @@ class WebHook(BaseHook):
 
         # encode event as JSON
         if self.content_type == WebHook.ContentTypeChoices.JSON:
-            requests.post(
+            delivery.post(
                 self.destination_url,
                 json=payload,
                 verify=settings.VERIFY_WEBHOOK_REQUESTS,
@@ -161,12 +163,15 @@ class WebHook(BaseHook):
 
         # encode event as form
         elif self.content_type == WebHook.ContentTypeChoices.FORM:
-            requests.post(
+            delivery.post(
                 self.destination_url,
                 data=payload,
                 verify=settings.VERIFY_WEBHOOK_REQUESTS,
             )
 
+    def get_destination(self):
+        return self.destination_url
+
 
 class PushHook(BaseHook):
     class Type:
@@ -225,13 +230,17 @@ class PushHook(BaseHook):
             'Submitting GCM push notification with headers %s, payload: %s'
             % (headers, payload)
         )
-        requests.post(endpoint, json=payload, headers=headers)
+        delivery.post(endpoint, json=payload, headers=headers)
+
+    def get_destination(self):
+        return self.device_id
 
 
 class EmailHook(BaseHook):
     email = models.EmailField(max_length=75)
 
-    def process(self, event):
+    def get_message(self, event):
+        """ Return email message for event or None if email is not defined """
         if not self.email:
             logger.debug(
                 'Skipping processing of email hook (PK=%s) because email is not defined'
@@ -246,13 +255,19 @@ class EmailHook(BaseHook):
         logger.debug(
             'Submitting email hook to %s, payload: %s', self.email, text_message
         )
-        send_mail(
-            subject,
-            text_message,
-            settings.DEFAULT_FROM_EMAIL,
-            [self.email],
-            html_message=html_message,
+        message = EmailMultiAlternatives(
+            subject, text_message, settings.DEFAULT_FROM_EMAIL, [self.email]
         )
+        message.attach_alternative(html_message, 'text/html')
+        return message
+
+    def process(self, event):
+        message = self.get_message(event)
+        if message:
+            message.send()
+
+    def get_destination(self):
+        return self.email
 
 
 class SystemNotification(EventTypesMixin, models.Model):
@@ -360,3 +375,21 @@ class Feed(models.Model):
     object_id = models.PositiveIntegerField(db_index=True)
     scope = ct_fields.GenericForeignKey('content_type', 'object_id')
     objects = FeedManager()
+
+
+class HookDeliveryFailure(models.Model):
+    """ Dead-letter record of event which could not be delivered via hook after all retries """
+
+    created = AutoCreatedField()
+    event = models.ForeignKey(on_delete=models.CASCADE, to=Event)
+    hook_content_type = models.ForeignKey(
+        on_delete=models.CASCADE, to=ct_models.ContentType, related_name='+'
+    )
+    hook_object_id = models.PositiveIntegerField(null=True)
+    hook = ct_fields.GenericForeignKey('hook_content_type', 'hook_object_id')
+    destination = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=1)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ('-created',)
@@ -2,14 +2,22 @@ import datetime
 import logging
 import tarfile
 import traceback
+from collections import defaultdict
 
 from celery import shared_task
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
 
 from waldur_core.core.utils import deserialize_instance
-from waldur_core.logging.models import BaseHook, Event, Feed, Report, SystemNotification
-from waldur_core.logging.utils import create_report_archive
+from waldur_core.logging import delivery
+from waldur_core.logging.models import Event, Feed, Report, SystemNotification
+from waldur_core.logging.utils import (
+    check_event_feeds,
+    create_report_archive,
+    get_event_feeds,
+    get_hook_routing_table,
+)
 from waldur_core.structure import models as structure_models
 
 logger = logging.getLogger(__name__)
@@ -18,14 +26,47 @@ logger = logging.getLogger(__name__)
 @shared_task(name='waldur_core.logging.process_event')
 def process_event(event_id):
     event = Event.objects.get(id=event_id)
-    for hook in BaseHook.get_active_hooks():
-        if check_event(event, hook):
-            hook.process(event)
-
-    process_system_notification(event)
-
-
-def process_system_notification(event):
+    feeds = get_event_feeds(event)
+
+    routes = get_hook_routing_table().get(event.event_type, [])
+    hook_ids = defaultdict(list)
+    for content_type_id, hook_id in routes:
+        hook_ids[content_type_id].append(hook_id)
+
+    hooks = []
+    for content_type_id, ids in hook_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        queryset = model.objects.filter(id__in=ids, is_active=True)
+        for hook in queryset.select_related('user'):
+            if check_event_feeds(feeds, hook.user):
+                hooks.append(hook)
+
+    hooks.extend(get_system_notification_hooks(event, feeds))
+    delivery.deliver(event, hooks)
+
+
+@shared_task(name='waldur_core.logging.retry_hook_delivery')
+def retry_hook_delivery(event_id, serialized_hooks):
+    event = Event.objects.filter(id=event_id).first()
+    if not event:
+        return
+    hooks = []
+    for serialized_hook, attempt in serialized_hooks:
+        try:
+            hook = deserialize_instance(serialized_hook)
+        except ObjectDoesNotExist:
+            continue
+        if hook.is_active:
+            hooks.append((hook, attempt))
+    delivery.deliver_http(event, hooks)
+
+
+@shared_task(name='waldur_core.logging.send_pending_emails')
+def send_pending_emails():
+    delivery.send_pending_emails()
+
+
+def get_system_notification_hooks(event, feeds=None):
     project_ct = ContentType.objects.get_for_model(structure_models.Project)
     project_feed = Feed.objects.filter(event=event, content_type=project_ct).first()
     project = project_feed and project_feed.scope
@@ -34,25 +75,24 @@ def process_system_notification(event):
     customer_feed = Feed.objects.filter(event=event, content_type=customer_ct).first()
     customer = customer_feed and customer_feed.scope
 
-    for hook in SystemNotification.get_hooks(
-        event.event_type, project=project, customer=customer
-    ):
-        if check_event(event, hook):
-            hook.process(event)
+    return [
+        hook
+        for hook in SystemNotification.get_hooks(
+            event.event_type, project=project, customer=customer
+        )
+        if check_event(event, hook, feeds)
+    ]
 
 
-def check_event(event, hook):
+def check_event(event, hook, feeds=None):
     # Check that event matches with hook
     if event.event_type not in hook.all_event_types:
         return False
 
     # Check permissions
-    for feed in Feed.objects.filter(event=event):
-        qs = feed.content_type.model_class().get_permitted_objects(hook.user)
-        if qs.filter(id=feed.object_id).exists():
-            return True
-
-    return False
+    if feeds is None:
+        feeds = get_event_feeds(event)
+    return check_event_feeds(feeds, hook.user)
 
 
 @shared_task(name='waldur_core.logging.create_report')
@@ -0,0 +1,70 @@
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from waldur_core.logging import middleware, models
+from waldur_core.structure.log import event_logger
+from waldur_core.structure.tests import factories as structure_factories
+
+
+class EventBatchTest(TransactionTestCase):
+    def setUp(self):
+        self.customer = structure_factories.CustomerFactory()
+
+    def tearDown(self):
+        while middleware.get_event_batch():
+            middleware.finish_event_batch()
+
+    def log_event(self):
+        event_logger.customer.info(
+            'Customer has been updated.',
+            event_type='customer_update_succeeded',
+            event_context={'customer': self.customer},
+        )
+
+    def test_events_are_saved_when_batch_is_finished(self):
+        middleware.start_event_batch()
+        self.log_event()
+        self.log_event()
+        self.assertEqual(models.Event.objects.count(), 0)
+
+        middleware.finish_event_batch()
+        self.assertEqual(models.Event.objects.count(), 2)
+        self.assertEqual(
+            models.Feed.objects.filter(object_id=self.customer.id).count(), 2
+        )
+
+    def test_events_are_saved_only_when_outer_batch_is_finished(self):
+        middleware.start_event_batch()
+        middleware.start_event_batch()
+        self.log_event()
+
+        middleware.finish_event_batch()
+        self.assertEqual(models.Event.objects.count(), 0)
+
+        middleware.finish_event_batch()
+        self.assertEqual(models.Event.objects.count(), 1)
+
+    def test_events_are_discarded_if_transaction_is_rolled_back(self):
+        middleware.start_event_batch()
+        try:
+            with transaction.atomic():
+                self.log_event()
+                raise ValueError
+        except ValueError:
+            pass
+
+        middleware.finish_event_batch()
+        self.assertEqual(models.Event.objects.count(), 0)
+
+    def test_event_is_saved_immediately_without_batch(self):
+        self.log_event()
+        self.assertEqual(models.Event.objects.count(), 1)
+
+    def test_event_is_saved_if_transaction_is_committed_after_batch_is_finished(self):
+        with transaction.atomic():
+            middleware.start_event_batch()
+            self.log_event()
+            middleware.finish_event_batch()
+            self.assertEqual(models.Event.objects.count(), 0)
+
+        self.assertEqual(models.Event.objects.count(), 1)
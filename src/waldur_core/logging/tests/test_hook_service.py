@@ -1,10 +1,19 @@
+import smtplib
 from unittest import mock
 
+import requests
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
+from django.db import transaction
+from django.test import override_settings
 from rest_framework import test
 
+from waldur_core.core import utils as core_utils
+from waldur_core.core.tests.helpers import override_waldur_core_settings
+from waldur_core.logging import delivery
 from waldur_core.logging import models as logging_models
+from waldur_core.logging import utils
 from waldur_core.logging.tasks import process_event
 from waldur_core.logging.tests.factories import EventFactory
 from waldur_core.structure import models as structure_models
@@ -50,7 +59,7 @@ class TestHookService(test.APITransactionTestCase):
         # Verify that destination address of message is correct
         self.assertEqual(mail.outbox[0].to, [email_hook.email])
 
-    @mock.patch('requests.post')
+    @mock.patch('waldur_core.logging.delivery.post')
     def test_webhook_makes_post_request_against_destination_url(self, requests_post):
 
         # Create web hook for customer owner
@@ -79,3 +88,177 @@ class TestHookService(test.APITransactionTestCase):
         # If event is not mutated, exception is not raised, see also SENTRY-1396
         email_hook.process(self.event)
         email_hook.process(self.event)
+
+    def test_hook_is_triggered_after_event_types_are_updated(self):
+        email_hook = logging_models.EmailHook.objects.create(
+            user=self.owner, email=self.owner.email, event_types=[self.other_event]
+        )
+        process_event(self.event.id)
+        self.assertEqual(len(mail.outbox), 0)
+
+        email_hook.event_types = [self.event_type]
+        email_hook.save()
+        process_event(self.event.id)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_hook_is_not_triggered_after_permission_is_revoked(self):
+        logging_models.EmailHook.objects.create(
+            user=self.owner, email=self.owner.email, event_types=[self.event_type]
+        )
+        process_event(self.event.id)
+        self.assertEqual(len(mail.outbox), 1)
+
+        self.customer.remove_user(self.owner)
+        process_event(self.event.id)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_scopes_cached_before_commit_are_cleaned(self):
+        logging_models.EmailHook.objects.create(
+            user=self.owner, email=self.owner.email, event_types=[self.event_type]
+        )
+        stale_scope_ids = utils.get_hook_scope_ids(self.owner)
+
+        with transaction.atomic():
+            self.customer.remove_user(self.owner)
+            # Concurrent request caches scopes before transaction is committed
+            cache.set(utils.HOOK_SCOPE_IDS_CACHE_KEY % self.owner.pk, stale_scope_ids)
+
+        process_event(self.event.id)
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(task_always_eager=True)
+    @override_waldur_core_settings(
+        HOOK_DELIVERY=dict(settings.WALDUR_CORE['HOOK_DELIVERY'], BACKOFF_FACTOR=0)
+    )
+    @mock.patch('waldur_core.logging.delivery.post')
+    def test_failed_delivery_is_stored_in_dead_letter_table(self, requests_post):
+        requests_post.side_effect = requests.ConnectionError('Connection refused')
+        web_hook = logging_models.WebHook.objects.create(
+            user=self.owner,
+            destination_url='http://example.com/',
+            event_types=[self.event_type],
+        )
+
+        process_event(self.event.id)
+
+        attempts = settings.WALDUR_CORE['HOOK_DELIVERY']['RETRIES'] + 1
+        self.assertEqual(requests_post.call_count, attempts)
+        failure = logging_models.HookDeliveryFailure.objects.get()
+        self.assertEqual(failure.hook, web_hook)
+        self.assertEqual(failure.event, self.event)
+        self.assertEqual(failure.destination, web_hook.destination_url)
+        self.assertEqual(failure.attempts, attempts)
+        self.assertEqual(delivery.get_stats([web_hook])[web_hook]['failed'], 1)
+
+    @mock.patch('waldur_core.logging.tasks.retry_hook_delivery.apply_async')
+    @mock.patch('waldur_core.logging.delivery.post')
+    def test_failed_delivery_is_retried_by_task(self, requests_post, apply_async):
+        requests_post.side_effect = requests.ConnectionError('Connection refused')
+        web_hook = logging_models.WebHook.objects.create(
+            user=self.owner,
+            destination_url='http://example.com/',
+            event_types=[self.event_type],
+        )
+
+        process_event(self.event.id)
+
+        apply_async.assert_called_once_with(
+            args=(self.event.id, [(core_utils.serialize_instance(web_hook), 2)]),
+            countdown=settings.WALDUR_CORE['HOOK_DELIVERY']['BACKOFF_FACTOR'],
+        )
+        self.assertFalse(logging_models.HookDeliveryFailure.objects.exists())
+
+    @mock.patch('waldur_core.logging.tasks.retry_hook_delivery.apply_async')
+    @mock.patch('waldur_core.logging.delivery.get_session')
+    def test_delivery_is_deferred_if_host_is_busy(self, get_session, apply_async):
+        web_hook = logging_models.WebHook.objects.create(
+            user=self.owner,
+            destination_url='http://example.com/',
+            event_types=[self.event_type],
+        )
+        # Concurrency limit is reached by deliveries in other workers
+        semaphore = delivery.get_host_semaphore(web_hook.destination_url)
+        owners = ['worker-%s' % index for index in range(semaphore.limit)]
+        for owner in owners:
+            semaphore.acquire(owner)
+
+        try:
+            process_event(self.event.id)
+        finally:
+            for owner in owners:
+                semaphore.release(owner)
+
+        get_session().post.assert_not_called()
+        # Attempt is not spent because request has not been sent
+        apply_async.assert_called_once_with(
+            args=(self.event.id, [(core_utils.serialize_instance(web_hook), 1)]),
+            countdown=settings.WALDUR_CORE['HOOK_DELIVERY']['BACKOFF_FACTOR'],
+        )
+
+    @mock.patch('waldur_core.logging.delivery.get_connection')
+    def test_email_hooks_share_single_connection(self, get_connection):
+        for user in structure_factories.UserFactory.create_batch(2):
+            self.customer.add_user(user, structure_models.CustomerRole.OWNER)
+            logging_models.EmailHook.objects.create(
+                user=user, email=user.email, event_types=[self.event_type]
+            )
+
+        process_event(self.event.id)
+
+        get_connection.assert_called_once_with()
+        self.assertEqual(get_connection().send_messages.call_count, 2)
+
+    @override_waldur_core_settings(
+        HOOK_DELIVERY=dict(settings.WALDUR_CORE['HOOK_DELIVERY'], BACKOFF_FACTOR=0)
+    )
+    @mock.patch('waldur_core.logging.delivery.get_connection')
+    def test_only_failed_email_is_sent_again(self, get_connection):
+        hooks = []
+        for user in structure_factories.UserFactory.create_batch(2):
+            self.customer.add_user(user, structure_models.CustomerRole.OWNER)
+            hooks.append(
+                logging_models.EmailHook.objects.create(
+                    user=user, email=user.email, event_types=[self.event_type]
+                )
+            )
+        calls = []
+        delivered = []
+
+        def send_messages(messages):
+            calls.append(messages)
+            # Connection is lost while the second message is sent
+            if len(calls) == 2:
+                raise smtplib.SMTPServerDisconnected()
+            delivered.extend(message.to[0] for message in messages)
+
+        get_connection().send_messages.side_effect = send_messages
+
+        process_event(self.event.id)
+
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sorted(delivered), sorted(hook.email for hook in hooks))
+        self.assertFalse(logging_models.HookDeliveryFailure.objects.exists())
+        stats = delivery.get_stats(hooks)
+        self.assertEqual([stats[hook]['sent'] for hook in hooks], [1, 1])
+
+    @mock.patch('waldur_core.logging.delivery.get_connection')
+    def test_emails_of_pending_events_share_single_connection(self, get_connection):
+        logging_models.EmailHook.objects.create(
+            user=self.owner, email=self.owner.email, event_types=[self.event_type]
+        )
+        other_event = EventFactory(event_type=self.event_type)
+        logging_models.Feed.objects.create(scope=self.customer, event=other_event)
+
+        # Emails are queued while another worker is sending emails
+        cache.add(delivery.EMAIL_SENDER_KEY, True)
+        try:
+            process_event(self.event.id)
+            process_event(other_event.id)
+        finally:
+            cache.delete(delivery.EMAIL_SENDER_KEY)
+        get_connection.assert_not_called()
+
+        delivery.send_pending_emails()
+
+        get_connection.assert_called_once_with()
+        self.assertEqual(get_connection().send_messages.call_count, 2)
@@ -1,14 +1,21 @@
 import datetime
 import os
 import tarfile
+from collections import defaultdict
 from io import BytesIO
 
 from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 
 from waldur_core.core.utils import datetime_to_timestamp
 from waldur_core.logging.loggers import LoggableMixin
 
+HOOK_ROUTING_TABLE_CACHE_KEY = 'hook_routing_table'
+HOOK_SCOPE_IDS_CACHE_KEY = 'hook_scope_ids:%s'
+HOOK_ROUTING_CACHE_TIMEOUT = 60 * 60
+
 
 def get_loggable_models():
     return [model for model in apps.get_models() if issubclass(model, LoggableMixin)]
@@ -48,3 +55,101 @@ def create_report_archive(log_directory, interval):
             archive.add(filename)
 
     return ContentFile(stream.getvalue())
+
+
+def get_hook_routing_table():
+    """
+    Return mapping from event type to list of active hooks subscribed to it.
+    Each hook is represented as pair (hook content type ID, hook ID).
+    Table is cached until hooks or system notifications are changed.
+    """
+    table = cache.get(HOOK_ROUTING_TABLE_CACHE_KEY)
+    if table is None:
+        from waldur_core.logging.models import BaseHook
+
+        table = defaultdict(list)
+        for model in BaseHook.get_all_models():
+            content_type = ContentType.objects.get_for_model(model)
+            system_event_types = model.get_system_event_types()
+            hooks = model.objects.filter(is_active=True).values_list(
+                'id', 'event_types'
+            )
+            for hook_id, event_types in hooks:
+                for event_type in set(event_types) | system_event_types:
+                    table[event_type].append((content_type.id, hook_id))
+        table = dict(table)
+        cache.set(HOOK_ROUTING_TABLE_CACHE_KEY, table, HOOK_ROUTING_CACHE_TIMEOUT)
+    return table
+
+
+def clean_hook_routing_table():
+    cache.delete(HOOK_ROUTING_TABLE_CACHE_KEY)
+
+
+def get_hook_scope_models():
+    from waldur_core.structure.models import Customer, Project
+
+    return Customer, Project
+
+
+def get_hook_scope_ids(user):
+    """
+    Return mapping from content type ID of customer and project to IDs of objects
+    visible to hook owner. None means that all objects are visible.
+    Mapping is cached until permissions of the user are changed.
+    """
+    key = HOOK_SCOPE_IDS_CACHE_KEY % user.pk
+    scope_ids = cache.get(key)
+    if scope_ids is None:
+        scope_ids = {}
+        for model in get_hook_scope_models():
+            content_type = ContentType.objects.get_for_model(model)
+            queryset = model.get_permitted_objects(user)
+            if queryset.query.has_filters():
+                scope_ids[content_type.id] = set(queryset.values_list('id', flat=True))
+            else:
+                scope_ids[content_type.id] = None
+        cache.set(key, scope_ids, HOOK_ROUTING_CACHE_TIMEOUT)
+    return scope_ids
+
+
+def clean_hook_scope_ids(user_ids):
+    cache.delete_many([HOOK_SCOPE_IDS_CACHE_KEY % user_id for user_id in user_ids])
+
+
+def get_event_feeds(event):
+    """ Return mapping from content type ID to IDs of objects in event feed """
+    from waldur_core.logging.models import Feed
+
+    feeds = defaultdict(set)
+    for content_type_id, object_id in Feed.objects.filter(event=event).values_list(
+        'content_type_id', 'object_id'
+    ):
+        feeds[content_type_id].add(object_id)
+    return feeds
+
+
+def check_event_feeds(feeds, user):
+    """
+    Check if user is allowed to see any object in event feed.
+    Customers and projects are matched against precomputed scope IDs,
+    other objects are checked against database.
+    """
+    scope_ids = get_hook_scope_ids(user)
+    for content_type_id, object_ids in feeds.items():
+        if content_type_id in scope_ids:
+            visible_ids = scope_ids[content_type_id]
+            if visible_ids is None or visible_ids & object_ids:
+                return True
+
+    for content_type_id, object_ids in feeds.items():
+        if content_type_id in scope_ids:
+            continue
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        qs = model.get_permitted_objects(user)
+        if qs.filter(id__in=object_ids).exists():
+            return True
+
+    return False
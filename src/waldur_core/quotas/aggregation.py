@@ -0,0 +1,140 @@
+"""
+Propagation of child quota changes to aggregator quotas of ancestors.
+
+Changes of usage and limit of child quotas are collected as deltas of aggregator
+quotas. Ancestors of each quota scope are resolved once and deltas are applied
+using single grouped UPDATE per aggregator quota name.
+
+By default changes are propagated immediately. Within aggregation batch
+changes are accumulated and applied when the outermost batch is finished.
+"""
+
+import collections
+import threading
+from contextlib import contextmanager
+from functools import reduce
+from operator import or_
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from waldur_core.core.utils import chunks
+from waldur_core.quotas import fields
+
+_locals = threading.local()
+
+AGGREGATION_FIELDS = ('usage', 'limit')
+
+UPDATE_CHUNK_SIZE = 500
+
+
+def get_scope_key(scope):
+    return ContentType.objects.get_for_model(scope).id, scope.pk
+
+
+class AggregationBatch:
+    def __init__(self):
+        self.depth = 0
+        # Aggregator fields of scope ancestors are memoized for the duration of the batch
+        self.targets = {}
+        # Mapping from aggregator quota name to deltas of its scopes
+        self.deltas = collections.defaultdict(collections.Counter)
+
+    def get_targets(self, scope):
+        """
+        Return aggregator quota fields of scope ancestors.
+        :return: list of pairs (ancestor_key, aggregator_field)
+        """
+        key = get_scope_key(scope)
+        if key not in self.targets:
+            self.targets[key] = [
+                (get_scope_key(ancestor), field)
+                for ancestor in scope.get_quota_ancestors()
+                for field in ancestor.get_quotas_fields(
+                    field_class=fields.AggregatorQuotaField
+                )
+            ]
+        return self.targets[key]
+
+    def add(self, scope, quota_name, diffs):
+        """
+        Register change of child quota.
+        :param diffs: mapping from aggregation field to delta, for example {'usage': 10}
+        """
+        for ancestor_key, field in self.get_targets(scope):
+            if field.get_child_quota_name() != quota_name:
+                continue
+            delta = diffs.get(field.aggregation_field)
+            if delta:
+                self.deltas[field.name][ancestor_key] += delta
+
+    def flush(self):
+        from waldur_core.quotas.models import Quota
+
+        for name, deltas in self.deltas.items():
+            deltas = [(key, delta) for key, delta in deltas.items() if delta]
+            for chunk in chunks(deltas, UPDATE_CHUNK_SIZE):
+                conditions = [
+                    Q(content_type_id=content_type_id, object_id=object_id)
+                    for (content_type_id, object_id), _ in chunk
+                ]
+                Quota.objects.filter(reduce(or_, conditions), name=name).update(
+                    usage=F('usage')
+                    + Case(
+                        *[
+                            When(condition, then=Value(delta))
+                            for condition, (_, delta) in zip(conditions, chunk)
+                        ],
+                        default=Value(0),
+                        output_field=FloatField(),
+                    )
+                )
+        self.deltas.clear()
+
+
+def get_aggregation_batch():
+    return getattr(_locals, 'aggregation_batch', None)
+
+
+@contextmanager
+def aggregation_batch():
+    """
+    Collect changes of child quotas and update aggregator quotas once
+    when the outermost batch is finished. Aggregator quotas are updated within
+    the same transaction, so changes are discarded if transaction is rolled back.
+    """
+    batch = get_aggregation_batch()
+    if batch is None:
+        batch = _locals.aggregation_batch = AggregationBatch()
+    # Changes of nested batch are discarded together with its savepoint
+    saved_deltas = {
+        name: collections.Counter(deltas) for name, deltas in batch.deltas.items()
+    }
+    batch.depth += 1
+    try:
+        with transaction.atomic():
+            yield batch
+            if batch.depth == 1:
+                batch.flush()
+    except Exception:
+        batch.deltas.clear()
+        batch.deltas.update(saved_deltas)
+        raise
+    finally:
+        batch.depth -= 1
+        if batch.depth == 0:
+            del _locals.aggregation_batch
+
+
+def register_quota_change(quota, diffs):
+    """
+    Propagate change of quota to aggregator quotas of its scope ancestors.
+    """
+    batch = get_aggregation_batch()
+    if batch is not None:
+        batch.add(quota.scope, quota.name, diffs)
+    else:
+        batch = AggregationBatch()
+        batch.add(quota.scope, quota.name, diffs)
+        batch.flush()
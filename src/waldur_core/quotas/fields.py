@@ -1,8 +1,9 @@
+import collections
 from functools import reduce
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.db.models import F, Sum
+from django.db.models import Count, Sum
 
 from . import exceptions
 
@@ -133,20 +134,6 @@ class QuotaField:
 
         return scope.quotas.get_or_create(name=self.name, defaults=defaults)
 
-    def get_aggregator_quotas(self, quota):
-        """ Fetch ancestors quotas that have the same name and are registered as aggregator quotas. """
-        ancestors = quota.scope.get_quota_ancestors()
-        aggregator_quotas = []
-        for ancestor in ancestors:
-            for ancestor_quota_field in ancestor.get_quotas_fields(
-                field_class=AggregatorQuotaField
-            ):
-                if ancestor_quota_field.get_child_quota_name() == quota.name:
-                    aggregator_quotas.append(
-                        ancestor.quotas.get(name=ancestor_quota_field)
-                    )
-        return aggregator_quotas
-
     def __str__(self):
         return self.name
 
@@ -158,6 +145,15 @@ class QuotaField:
     def recalculate_usage(self, scope):
         pass
 
+    def get_current_usages(self, scopes):
+        """
+        Compute current usage of quota for several scopes at once.
+        Return mapping from scope ID to usage or None if usage is not computed by the field.
+
+        :param scopes: queryset of quota scopes
+        """
+        return None
+
 
 class CounterQuotaField(QuotaField):
     """ Provides limitation on target models instances count.
@@ -226,6 +222,29 @@ class CounterQuotaField(QuotaField):
         current_usage = self.get_current_usage(self.target_models, scope)
         scope.set_quota_usage(self.name, current_usage)
 
+    def get_current_usages(self, scopes):
+        if self._raw_get_current_usage is not None:
+            return {
+                scope.pk: self._raw_get_current_usage(self.target_models, scope)
+                for scope in scopes
+            }
+        return self._aggregate_target_models(scopes, Count('pk'))
+
+    def _aggregate_target_models(self, scopes, aggregate):
+        """ Compute aggregate of target models grouped by scope using one query per model """
+        filter_path_to_scope = self.path_to_scope.replace('.', '__')
+        usages = collections.Counter()
+        for model in self.target_models:
+            rows = (
+                model.objects.filter(**{filter_path_to_scope + '__in': scopes})
+                .order_by()
+                .values(filter_path_to_scope)
+                .annotate(value=aggregate)
+            )
+            for row in rows:
+                usages[row[filter_path_to_scope]] += row['value'] or 0
+        return usages
+
     def add_usage(self, target_instance, delta):
         try:
             scope = self._get_scope(target_instance)
@@ -271,6 +290,9 @@ class TotalQuotaField(CounterQuotaField):
                 total_usage += subtotal
         return total_usage
 
+    def get_current_usages(self, scopes):
+        return self._aggregate_target_models(scopes, Sum(self.target_field))
+
     def get_delta(self, target_instance):
         return getattr(target_instance, self.target_field)
 
@@ -284,14 +306,21 @@ class AggregatorQuotaField(QuotaField):
             # This quota will store sum of all customer projects resources
             nc_resource_count = quotas_fields.UsageAggregatorQuotaField(
                 get_children=lambda customer: customer.projects.all(),
+                path_to_scope='customer',
             )
+
+        Optional path_to_scope is a lookup from children model to scope.
+        It allows to recalculate quota for many scopes using single grouped query.
     """
 
     aggregation_field = NotImplemented
 
-    def __init__(self, get_children, child_quota_name=None, **kwargs):
+    def __init__(
+        self, get_children, child_quota_name=None, path_to_scope=None, **kwargs
+    ):
         self.get_children = get_children
         self._child_quota_name = child_quota_name
+        self.path_to_scope = path_to_scope
         super(AggregatorQuotaField, self).__init__(**kwargs)
 
     def get_child_quota_name(self):
@@ -307,19 +336,36 @@ class AggregatorQuotaField(QuotaField):
             current_usage += getattr(child_quota, self.aggregation_field)
         scope.set_quota_usage(self.name, current_usage)
 
-    def post_child_quota_save(self, scope, child_quota, created=False):
-        current_value = getattr(child_quota, self.aggregation_field)
-        if created:
-            diff = current_value
-        else:
-            diff = current_value - child_quota.tracker.previous(self.aggregation_field)
-        if diff:
-            scope.quotas.filter(name=self.name).update(usage=F('usage') + diff)
-
-    def pre_child_quota_delete(self, scope, child_quota):
-        diff = getattr(child_quota, self.aggregation_field)
-        if diff:
-            scope.quotas.filter(name=self.name).update(usage=F('usage') - diff)
+    def get_current_usages(self, scopes):
+        first_scope = scopes.first()
+        if first_scope is None:
+            return {}
+
+        child_quota_name = self.get_child_quota_name()
+        value = Sum('quotas__' + self.aggregation_field)
+        if self.path_to_scope is None:
+            # Children are fetched per scope, but their quotas are summed up by database
+            return {
+                scope.pk: self.get_children(scope)
+                .filter(quotas__name=child_quota_name)
+                .aggregate(value=value)['value']
+                or 0
+                for scope in scopes
+            }
+
+        children_model = self.get_children(first_scope).model
+        rows = (
+            children_model.objects.filter(
+                **{
+                    self.path_to_scope + '__in': scopes,
+                    'quotas__name': child_quota_name,
+                }
+            )
+            .order_by()
+            .values(self.path_to_scope)
+            .annotate(value=value)
+        )
+        return {row[self.path_to_scope]: row['value'] or 0 for row in rows}
 
 
 class UsageAggregatorQuotaField(AggregatorQuotaField):
@@ -1,6 +1,6 @@
 from django.db.models import F, signals
 
-from waldur_core.quotas import fields, models, utils
+from waldur_core.quotas import aggregation, fields, models, utils
 from waldur_core.quotas.exceptions import CreationConditionFailedQuotaError
 from waldur_core.structure import models as structure_models
 
@@ -54,7 +54,7 @@ def count_quota_handler_factory(count_quota_field):
 
 
 def handle_aggregated_quotas(sender, instance, **kwargs):
-    """ Call aggregated quotas fields update methods """
+    """ Propagate change of quota to aggregator quotas of its scope ancestors """
     quota = instance
     # aggregation is not supported for global quotas.
     if quota.scope is None:
@@ -64,14 +64,16 @@ def handle_aggregated_quotas(sender, instance, **kwargs):
     if isinstance(quota_field, fields.UsageAggregatorQuotaField) or quota_field is None:
         return
     signal = kwargs['signal']
-    for aggregator_quota in quota_field.get_aggregator_quotas(quota):
-        field = aggregator_quota.get_field()
-        if signal == signals.post_save:
-            field.post_child_quota_save(
-                aggregator_quota.scope, child_quota=quota, created=kwargs.get('created')
-            )
-        elif signal == signals.pre_delete:
-            field.pre_child_quota_delete(aggregator_quota.scope, child_quota=quota)
+    diffs = {}
+    for field in aggregation.AGGREGATION_FIELDS:
+        current_value = getattr(quota, field)
+        if signal == signals.pre_delete:
+            diffs[field] = -current_value
+        elif kwargs.get('created'):
+            diffs[field] = current_value
+        else:
+            diffs[field] = current_value - quota.tracker.previous(field)
+    aggregation.register_quota_change(quota, diffs)
 
 
 def projects_customer_has_been_changed(
@@ -1,40 +1,82 @@
-from django.core.management.base import BaseCommand
+from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
 
-from waldur_core.quotas import exceptions, fields, models, signals
-from waldur_core.quotas.utils import get_models_with_quotas
+from waldur_core.core.utils import DryRunCommand
+from waldur_core.quotas import exceptions, fields, models, signals, utils
+from waldur_core.structure import models as structure_models
 
 
-class Command(BaseCommand):
+class Command(DryRunCommand):
     """ Recalculate all quotas """
 
-    def handle(self, *args, **options):
+    def add_arguments(self, parser):
+        super(Command, self).add_arguments(parser)
+        parser.add_argument(
+            '-c',
+            '--customer',
+            dest='customer_uuid',
+            help='Recalculate only quotas of organization with given UUID and its descendants.',
+        )
+
+    def handle(self, customer_uuid=None, dry_run=False, *args, **options):
+        customer = None
+        if customer_uuid:
+            try:
+                customer = structure_models.Customer.objects.get(uuid=customer_uuid)
+            except (structure_models.Customer.DoesNotExist, ValueError):
+                self.stdout.write(self.style.ERROR('Organization is not found.'))
+                return
+
+        self.customer = customer
+        self.dry_run = dry_run
+        self.verbosity = options.get('verbosity', 1)
+
         # TODO: implement other quotas recalculation
         # TODO: implement global stale quotas deletion
-        self.delete_stale_quotas()
-        self.init_missing_quotas()
-        self.recalculate_global_quotas()
+        if not dry_run:
+            self.delete_stale_quotas()
+            self.init_missing_quotas()
+            if customer is None:
+                self.recalculate_global_quotas()
         self.recalculate_counter_quotas()
         self.recalculate_aggregator_quotas()
-        self.stdout.write(
-            'XXX: Second time to make sure that aggregators of aggregators where calculated properly.'
-        )
-        self.recalculate_aggregator_quotas()
-        self.recalculate_custom_quotas()
+        if not dry_run:
+            self.stdout.write(
+                'XXX: Second time to make sure that aggregators of aggregators where calculated properly.'
+            )
+            self.recalculate_aggregator_quotas()
+        if not dry_run and customer is None:
+            self.recalculate_custom_quotas()
+
+    def get_scopes(self):
+        for model in utils.get_models_with_quotas():
+            scopes = utils.get_scopes(model, self.customer)
+            if scopes is not None:
+                yield model, scopes
 
     def delete_stale_quotas(self):
         self.stdout.write('Deleting stale quotas')
-        for model in get_models_with_quotas():
-            for obj in model.objects.all():
-                quotas_names = model.get_quotas_names()
-                obj.quotas.exclude(name__in=quotas_names).delete()
+        for model, scopes in self.get_scopes():
+            models.Quota.objects.filter(
+                content_type=ContentType.objects.get_for_model(model),
+                object_id__in=scopes.values('pk'),
+            ).exclude(name__in=model.get_quotas_names()).delete()
         self.stdout.write('...done')
 
     def init_missing_quotas(self):
         self.stdout.write('Initializing missing quotas')
-        for model in get_models_with_quotas():
-            for obj in model.objects.all():
-                for field in obj.get_quotas_fields():
+        for model, scopes in self.get_scopes():
+            existing_quotas = set(
+                models.Quota.objects.filter(
+                    content_type=ContentType.objects.get_for_model(model),
+                    object_id__in=scopes.values('pk'),
+                ).values_list('object_id', 'name')
+            )
+            quota_fields = model.get_quotas_fields()
+            for obj in scopes:
+                for field in quota_fields:
+                    if (obj.pk, field.name) in existing_quotas:
+                        continue
                     try:
                         field.get_or_create_quota(scope=obj)
                     except exceptions.CreationConditionFailedQuotaError:
@@ -43,7 +85,7 @@ class Command(BaseCommand):
 
     def recalculate_global_quotas(self):
         self.stdout.write('Recalculating global quotas')
-        for model in get_models_with_quotas():
+        for model in utils.get_models_with_quotas():
             if hasattr(model, 'GLOBAL_COUNT_QUOTA_NAME'):
                 with transaction.atomic():
                     quota, _ = models.Quota.objects.get_or_create(
@@ -55,25 +97,37 @@ class Command(BaseCommand):
 
     def recalculate_counter_quotas(self):
         self.stdout.write('Recalculating counter quotas')
-        for model in get_models_with_quotas():
-            for counter_field in model.get_quotas_fields(
-                field_class=fields.CounterQuotaField
-            ):
-                for instance in model.objects.all():
-                    counter_field.recalculate(scope=instance)
+        self.recalculate_usages(fields.CounterQuotaField)
         self.stdout.write('...done')
 
     def recalculate_aggregator_quotas(self):
         # TODO: recalculate child quotas first
         self.stdout.write('Recalculating aggregator quotas')
-        for model in get_models_with_quotas():
-            for aggregator_field in model.get_quotas_fields(
-                field_class=fields.AggregatorQuotaField
-            ):
-                for instance in model.objects.all():
-                    aggregator_field.recalculate(scope=instance)
+        self.recalculate_usages(fields.AggregatorQuotaField)
         self.stdout.write('...done')
 
+    def recalculate_usages(self, field_class):
+        with transaction.atomic():
+            drifts = utils.recalculate_usages(
+                field_class, customer=self.customer, dry_run=self.dry_run
+            )
+        if self.verbosity >= 2:
+            for drift in drifts:
+                self.stdout.write(
+                    '%s #%s "%s" quota usage: stored %s, computed %s.'
+                    % (
+                        drift.model.__name__,
+                        drift.object_id,
+                        drift.name,
+                        drift.stored,
+                        drift.computed,
+                    )
+                )
+        if self.dry_run:
+            self.stdout.write('%s quotas have drifted.' % len(drifts))
+        else:
+            self.stdout.write('%s drifted quotas have been fixed.' % len(drifts))
+
     def recalculate_custom_quotas(self):
         self.stdout.write('Recalculating custom quotas')
         signals.recalculate_quotas.send(sender=self)
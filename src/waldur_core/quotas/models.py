@@ -5,7 +5,7 @@ from django.contrib.contenttypes import fields as ct_fields
 from django.contrib.contenttypes import models as ct_models
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models, transaction
-from django.db.models import F, Sum
+from django.db.models import F, Q, Sum, signals
 from django.utils.translation import ugettext_lazy as _
 from model_utils import FieldTracker
 from reversion import revisions as reversion
@@ -86,6 +86,36 @@ class Quota(
     def is_over_threshold(self):
         return self.usage >= self.threshold
 
+    def add_usage(self, delta, validate=False):
+        """
+        Increment usage using single conditional UPDATE with F() expression
+        instead of read-modify-write, so that concurrent increments are not lost.
+        Limit is checked by database against current usage, therefore validation is exact.
+        Update is skipped if it would result in negative usage.
+
+        Post save signal is sent both for increments and decrements,
+        so that handlers, such as aggregator quotas, observe usage change equal to delta.
+        Signal is not sent if update is skipped. Return True if usage has been changed.
+        """
+        queryset = Quota.objects.filter(pk=self.pk)
+        if delta < 0:
+            queryset = queryset.filter(usage__gte=-delta)
+        elif validate:
+            queryset = queryset.filter(Q(limit=-1) | Q(limit__gte=F('usage') + delta))
+
+        if not queryset.update(usage=F('usage') + delta):
+            return False
+
+        self.usage = Quota.objects.values_list('usage', flat=True).get(pk=self.pk)
+        self.tracker.saved_data['usage'] = self.usage - delta
+        signals.post_save.send(
+            sender=Quota,
+            instance=self,
+            created=False,
+            update_fields=frozenset(['usage']),
+        )
+        return True
+
 
 class QuotaModelMixin(models.Model):
     """
@@ -151,42 +181,54 @@ class QuotaModelMixin(models.Model):
             quota.usage = usage
             quota.save(update_fields=['usage'])
 
-    @transaction.atomic
     def add_quota_usage(self, quota_name, usage_delta, validate=False):
-        if usage_delta < 0:
-            # Avoid race conditions by using F expressions.
-            # See also: https://docs.djangoproject.com/en/dev/ref/models/expressions/#avoiding-race-conditions-using-f
-            # Skip update if it would result in negative value.
-            return self.quotas.filter(name=quota_name, usage__gte=-usage_delta).update(
-                usage=F('usage') + usage_delta
-            )
-        quota = self.get_or_create_quota(quota_name)
-        if validate and quota.is_exceeded(usage_delta):
-            raise exceptions.QuotaValidationError(
-                _(
-                    '%(quota)s "%(name)s" quota is over limit. Required: %(usage)s, limit: %(limit)s.'
-                )
-                % dict(
-                    quota=self,
-                    name=quota_name,
-                    usage=quota.usage + usage_delta,
-                    limit=quota.limit,
+        return self.add_quota_usages({quota_name: usage_delta}, validate=validate)
+
+    @transaction.atomic
+    def add_quota_usages(self, quota_deltas, validate=False):
+        """
+        Add usage deltas to several quotas of the object.
+        Existing quotas are fetched using single query and each delta is applied
+        as atomic increment, see Quota.add_usage. If validation of any quota fails,
+        QuotaValidationError is raised and changes are rolled back.
+
+        quota_deltas - dictionary of quotas deltas, keys are quota names or fields.
+        Return number of quotas which usage has been changed.
+        """
+        quota_deltas = {
+            str(name): (name, delta) for name, delta in quota_deltas.items() if delta
+        }
+        if not quota_deltas:
+            return 0
+
+        quotas = {
+            quota.name: quota
+            for quota in self.quotas.filter(name__in=quota_deltas.keys())
+        }
+        changed = 0
+        for name, (quota_name_or_field, delta) in quota_deltas.items():
+            quota = quotas.get(name)
+            if quota is None:
+                if delta < 0:
+                    continue
+                quota = self.get_or_create_quota(quota_name_or_field)
+
+            if quota.add_usage(delta, validate=validate):
+                changed += 1
+            elif delta > 0:
+                quota.refresh_from_db(fields=['usage', 'limit'])
+                raise exceptions.QuotaValidationError(
+                    _(
+                        '%(quota)s "%(name)s" quota is over limit. Required: %(usage)s, limit: %(limit)s.'
+                    )
+                    % dict(
+                        quota=self,
+                        name=name,
+                        usage=quota.usage + delta,
+                        limit=quota.limit,
+                    )
                 )
-            )
-        quota.usage += usage_delta
-        if quota.usage < 0:
-            logger.error(
-                '%(quota)s "%(name)s" quota usage should not be negative. '
-                'Current usage: %(usage)s, delta: %(usage_delta)s',
-                dict(
-                    quota=self,
-                    name=quota_name,
-                    usage=quota.usage,
-                    usage_delta=usage_delta,
-                ),
-            )
-            quota.usage = 0
-        quota.save(update_fields=['usage'])
+        return changed
 
     def get_quota_ancestors(self):
         if isinstance(self, DescendantMixin):
@@ -371,13 +413,16 @@ class SharedQuotaMixin:
         """
         raise NotImplementedError()
 
+    @transaction.atomic
     def apply_quota_changes(self, validate=False, mult=1):
         scopes = self.get_quota_scopes()
         deltas = self.get_quota_deltas()
-        for name, delta in deltas.items():
-            for scope in scopes:
-                if scope:
-                    scope.add_quota_usage(name, delta * mult, validate=validate)
+        for scope in scopes:
+            if scope:
+                scope.add_quota_usages(
+                    {name: delta * mult for name, delta in deltas.items()},
+                    validate=validate,
+                )
 
     def increase_backend_quotas_usage(self, validate=True):
         self.apply_quota_changes(validate=validate)
@@ -13,9 +13,11 @@ class GrandparentModel(
         quota_with_default_limit = fields.QuotaField(default_limit=100)
         usage_aggregator_quota = fields.UsageAggregatorQuotaField(
             get_children=lambda scope: ChildModel.objects.filter(parent__parent=scope),
+            path_to_scope='parent__parent',
         )
         limit_aggregator_quota = fields.LimitAggregatorQuotaField(
             get_children=lambda scope: ChildModel.objects.filter(parent__parent=scope),
+            path_to_scope='parent__parent',
         )
 
     regular_quota = fields.QuotaLimitField(quota_field=Quotas.regular_quota)
@@ -0,0 +1,61 @@
+from django.test import TransactionTestCase
+
+from waldur_core.quotas import aggregation
+
+from . import models as test_models
+
+
+class AggregationBatchTest(TransactionTestCase):
+    def setUp(self):
+        self.grandparent = test_models.GrandparentModel.objects.create()
+        self.parent = test_models.ParentModel.objects.create(parent=self.grandparent)
+        self.children = [
+            test_models.ChildModel.objects.create(parent=self.parent) for _ in range(3)
+        ]
+
+    def get_usage(self, scope):
+        return scope.quotas.get(name='usage_aggregator_quota').usage
+
+    def test_aggregator_quotas_are_updated_when_batch_is_finished(self):
+        with aggregation.aggregation_batch():
+            for child in self.children:
+                child.add_quota_usage('usage_aggregator_quota', 10)
+            self.assertEqual(self.get_usage(self.parent), 0)
+
+        self.assertEqual(self.get_usage(self.parent), 30)
+        self.assertEqual(self.get_usage(self.grandparent), 30)
+        self.assertEqual(
+            self.parent.quotas.get(name='second_usage_aggregator_quota').usage, 30
+        )
+
+    def test_ancestors_are_resolved_once_per_scope(self):
+        with aggregation.aggregation_batch() as batch:
+            for child in self.children:
+                child.add_quota_usage('usage_aggregator_quota', 10)
+                child.add_quota_usage('usage_aggregator_quota', 5)
+            self.assertEqual(len(batch.targets), len(self.children))
+
+        self.assertEqual(self.get_usage(self.grandparent), 45)
+
+    def test_changes_of_failed_nested_batch_are_discarded(self):
+        with aggregation.aggregation_batch():
+            self.children[0].add_quota_usage('usage_aggregator_quota', 10)
+            try:
+                with aggregation.aggregation_batch():
+                    self.children[1].add_quota_usage('usage_aggregator_quota', 20)
+                    raise ValueError()
+            except ValueError:
+                pass
+
+        self.assertEqual(self.get_usage(self.parent), 10)
+        self.assertEqual(self.get_usage(self.grandparent), 10)
+
+    def test_deleted_child_quota_is_subtracted(self):
+        for child in self.children:
+            child.add_quota_usage('usage_aggregator_quota', 10)
+
+        with aggregation.aggregation_batch():
+            self.children[0].delete()
+
+        self.assertEqual(self.get_usage(self.parent), 20)
+        self.assertEqual(self.get_usage(self.grandparent), 20)
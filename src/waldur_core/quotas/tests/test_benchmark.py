@@ -0,0 +1,77 @@
+import logging
+import os
+import threading
+import time
+import unittest
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from waldur_core.quotas.models import Quota
+
+from . import models as test_models
+
+logger = logging.getLogger(__name__)
+
+THREADS_COUNT = 8
+INCREMENTS_COUNT = 200
+
+
+def legacy_add_quota_usage(scope, quota_name, usage_delta):
+    """ Read-modify-write increment which has been used before """
+    with transaction.atomic():
+        quota = scope.get_or_create_quota(quota_name)
+        if quota.is_exceeded(usage_delta):
+            return
+        quota.usage += usage_delta
+        quota.save(update_fields=['usage'])
+
+
+@unittest.skipUnless(
+    os.environ.get('WALDUR_BENCHMARK'), 'Set WALDUR_BENCHMARK=1 to run benchmarks.'
+)
+class QuotaIncrementBenchmark(TransactionTestCase):
+    """
+    Compare throughput of concurrent increments of single hot quota
+    using read-modify-write and atomic conditional update.
+    """
+
+    def setUp(self):
+        self.scope = test_models.GrandparentModel.objects.create()
+
+    def measure(self, func):
+        def worker():
+            try:
+                for _ in range(INCREMENTS_COUNT):
+                    func(self.scope, 'regular_quota', 1)
+            finally:
+                connection.close()
+
+        Quota.objects.filter(name='regular_quota').update(usage=0)
+        threads = [threading.Thread(target=worker) for _ in range(THREADS_COUNT)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration = time.perf_counter() - started
+        usage = self.scope.quotas.get(name='regular_quota').usage
+        return usage, duration
+
+    def test_benchmark(self):
+        expected = THREADS_COUNT * INCREMENTS_COUNT
+        legacy_usage, legacy_time = self.measure(legacy_add_quota_usage)
+        usage, ledger_time = self.measure(
+            lambda scope, name, delta: scope.add_quota_usage(name, delta)
+        )
+
+        self.assertEqual(usage, expected)
+        logger.info(
+            'Increments: %s. Read-modify-write: %.0f/s, lost %s. '
+            'Atomic update: %.0f/s, lost %s.',
+            expected,
+            expected / legacy_time,
+            expected - legacy_usage,
+            expected / ledger_time,
+            expected - usage,
+        )
@@ -154,6 +154,14 @@ class TestUsageAggregatorField(TransactionTestCase):
         quota = self.grandparent.quotas.get(name=self.grandparent_quota_field)
         self.assertEqual(quota.usage, usage_value * len(self.children))
 
+    def test_aggregator_usage_follows_child_quota_usage_increments(self):
+        for child in self.children:
+            child.add_quota_usage(self.child_quota_field, 10)
+        self.children[0].add_quota_usage(self.child_quota_field, -4)
+
+        quota = self.grandparent.quotas.get(name=self.grandparent_quota_field)
+        self.assertEqual(quota.usage, 16)
+
     def test_aggregator_usage_decreases_on_child_deletion(self):
         usage_value = 10
         for child in self.children:
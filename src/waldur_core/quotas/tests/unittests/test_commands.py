@@ -1,6 +1,9 @@
+import io
+
 from django.core.management import call_command
 from django.test import TestCase
 
+from waldur_core.quotas import fields, utils
 from waldur_core.structure.tests import factories as structure_factories
 
 
@@ -22,3 +25,38 @@ class RecalculateCommandTest(TestCase):
 
         call_command('recalculatequotas')
         self.assertEqual(customer.quotas.get(name='nc_resource_count').usage, 0)
+
+    def test_quotas_are_not_changed_in_dry_run_mode(self):
+        customer = structure_factories.CustomerFactory()
+        structure_factories.ProjectFactory(customer=customer)
+
+        customer.quotas.filter(name='nc_project_count').update(usage=10)
+
+        call_command('recalculatequotas', dry_run=True, stdout=io.StringIO())
+        self.assertEqual(customer.quotas.get(name='nc_project_count').usage, 10)
+
+    def test_recalculation_is_restricted_to_customer(self):
+        customer = structure_factories.CustomerFactory()
+        other_customer = structure_factories.CustomerFactory()
+        for scope in (customer, other_customer):
+            structure_factories.ProjectFactory(customer=scope)
+            scope.quotas.filter(name='nc_project_count').update(usage=10)
+
+        call_command(
+            'recalculatequotas', customer_uuid=customer.uuid.hex, stdout=io.StringIO()
+        )
+        self.assertEqual(customer.quotas.get(name='nc_project_count').usage, 1)
+        self.assertEqual(other_customer.quotas.get(name='nc_project_count').usage, 10)
+
+
+class RecalculateUsagesTest(TestCase):
+    def test_drift_between_stored_and_computed_usage_is_reported(self):
+        customer = structure_factories.CustomerFactory()
+        structure_factories.ProjectFactory.create_batch(2, customer=customer)
+        customer.quotas.filter(name='nc_project_count').update(usage=5)
+
+        drifts = utils.recalculate_usages(fields.CounterQuotaField, customer=customer)
+
+        drift = next(drift for drift in drifts if drift.name == 'nc_project_count')
+        self.assertEqual((drift.stored, drift.computed), (5, 2))
+        self.assertEqual(customer.quotas.get(name='nc_project_count').usage, 2)
@@ -1,8 +1,11 @@
 import random
+from unittest import mock
 
+from django.db.models import signals
 from django.test import TestCase
 
 from ... import exceptions
+from ...models import Quota
 from ..models import GrandparentModel
 
 
@@ -43,6 +46,67 @@ class QuotaModelMixinTest(TestCase):
             validate=True,
         )
 
+    def test_add_usage_succeeds_if_quota_reaches_limit(self):
+        instance = GrandparentModel.objects.create()
+        instance.add_quota_usage('quota_with_default_limit', 60, validate=True)
+        instance.add_quota_usage('quota_with_default_limit', 40, validate=True)
+        self.assertEqual(
+            instance.quotas.get(name='quota_with_default_limit').usage, 100
+        )
+
+    def test_add_usage_is_not_applied_if_validation_fails(self):
+        instance = GrandparentModel.objects.create()
+        instance.add_quota_usage('quota_with_default_limit', 60, validate=True)
+        with self.assertRaises(exceptions.QuotaValidationError):
+            instance.add_quota_usage('quota_with_default_limit', 60, validate=True)
+        self.assertEqual(instance.quotas.get(name='quota_with_default_limit').usage, 60)
+
+    def test_add_usage_does_not_overwrite_concurrent_change(self):
+        instance = GrandparentModel.objects.create()
+        stale_quota = instance.quotas.get(name='regular_quota')
+        instance.add_quota_usage('regular_quota', 10)
+        stale_quota.add_usage(5)
+        self.assertEqual(stale_quota.usage, 15)
+        self.assertEqual(instance.quotas.get(name='regular_quota').usage, 15)
+
+    def test_add_usage_skips_update_if_usage_becomes_negative(self):
+        instance = GrandparentModel.objects.create()
+        instance.add_quota_usage('regular_quota', 5)
+        instance.add_quota_usage('regular_quota', -10)
+        self.assertEqual(instance.quotas.get(name='regular_quota').usage, 5)
+
+    def test_post_save_is_sent_for_decrement(self):
+        instance = GrandparentModel.objects.create()
+        instance.add_quota_usage('regular_quota', 5)
+        receiver = mock.Mock()
+        signals.post_save.connect(receiver, sender=Quota)
+        try:
+            instance.add_quota_usage('regular_quota', -2)
+        finally:
+            signals.post_save.disconnect(receiver, sender=Quota)
+
+        quota = receiver.call_args[1]['instance']
+        self.assertEqual(quota.usage, 3)
+        self.assertEqual(quota.tracker.previous('usage'), 5)
+
+    def test_post_save_is_not_sent_if_decrement_is_skipped(self):
+        instance = GrandparentModel.objects.create()
+        receiver = mock.Mock()
+        signals.post_save.connect(receiver, sender=Quota)
+        try:
+            instance.add_quota_usage('regular_quota', -2)
+        finally:
+            signals.post_save.disconnect(receiver, sender=Quota)
+        receiver.assert_not_called()
+
+    def test_add_usages_are_rolled_back_if_any_quota_is_over_limit(self):
+        instance = GrandparentModel.objects.create()
+        with self.assertRaises(exceptions.QuotaValidationError):
+            instance.add_quota_usages(
+                {'regular_quota': 10, 'quota_with_default_limit': 200}, validate=True
+            )
+        self.assertEqual(instance.quotas.get(name='regular_quota').usage, 0)
+
     def test_quotas_sum_calculation_if_all_values_are_positive(self):
         # we have 3 memberships:
         instances = [GrandparentModel.objects.create() for _ in range(3)]
@@ -1,7 +1,79 @@
+import collections
+
 from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 
 from waldur_core.quotas import models
 
+QuotaDrift = collections.namedtuple(
+    'QuotaDrift', ('model', 'object_id', 'name', 'stored', 'computed')
+)
+
 
 def get_models_with_quotas():
     return [m for m in apps.get_models() if issubclass(m, models.QuotaModelMixin)]
+
+
+def get_scopes(model, customer=None):
+    """
+    Return queryset of quota scopes of the model.
+    If customer is specified, only scopes related to customer are returned.
+    None is returned if model is not related to customer.
+    """
+    if customer is None:
+        return model.objects.all()
+    customer_path = getattr(getattr(model, 'Permissions', None), 'customer_path', None)
+    if customer_path is None:
+        return None
+    if customer_path == 'self':
+        return model.objects.filter(pk=customer.pk)
+    return model.objects.filter(**{customer_path: customer})
+
+
+def recalculate_usages(field_class, customer=None, dry_run=False):
+    """
+    Recalculate usage of quotas of given field class.
+    Usage of each quota field is computed for all scopes using grouped queries
+    and changed quotas are written using bulk update.
+
+    :param customer: restrict recalculation to scopes related to customer
+    :param dry_run: compute drift without updating quotas
+    :return: list of QuotaDrift between stored and computed usages
+    """
+    drifts = []
+    for model in get_models_with_quotas():
+        scopes = get_scopes(model, customer)
+        if scopes is None:
+            continue
+
+        content_type = ContentType.objects.get_for_model(model)
+        for field in model.get_quotas_fields(field_class=field_class):
+            usages = field.get_current_usages(scopes)
+            if usages is None:
+                continue
+
+            quotas = models.Quota.objects.filter(
+                content_type=content_type,
+                object_id__in=scopes.values('pk'),
+                name=field.name,
+            )
+            changed_quotas = []
+            for quota in quotas:
+                usage = float(usages.get(quota.object_id, 0))
+                if quota.usage != usage:
+                    drifts.append(
+                        QuotaDrift(
+                            model, quota.object_id, field.name, quota.usage, usage
+                        )
+                    )
+                    quota.usage = usage
+                    changed_quotas.append(quota)
+
+            if not dry_run:
+                models.Quota.objects.bulk_update(
+                    changed_quotas,
+                    ['usage'],
+                    batch_size=settings.WALDUR_CORE['PULL_CHUNK_SIZE'],
+                )
+    return drifts
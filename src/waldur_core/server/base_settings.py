@@ -237,6 +237,11 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': timedelta(hours=24),
         'args': (),
     },
+    'structure-wake-throttled-provisioning': {
+        'task': 'waldur_core.structure.WakeThrottledProvisioningTask',
+        'schedule': timedelta(minutes=1),
+        'args': (),
+    },
     'structure-set-erred-stuck-resources': {
         'task': 'waldur_core.structure.SetErredStuckResources',
         'schedule': timedelta(hours=1),
@@ -247,6 +252,16 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': timedelta(hours=24),
         'args': (),
     },
+    'flush-token-last-seen': {
+        'task': 'waldur_core.core.flush_token_last_seen',
+        'schedule': timedelta(minutes=1),
+        'args': (),
+    },
+    'poll-pending-runtime-states': {
+        'task': 'waldur_core.core.poll_pending_runtime_states',
+        'schedule': timedelta(seconds=5),
+        'args': (),
+    },
 }
 
 # Logging
@@ -299,6 +314,13 @@ WALDUR_CORE = {
     'LOGGING_REPORT_DIRECTORY': '/var/log/waldur',
     'LOGGING_REPORT_INTERVAL': timedelta(days=7),
     'HTTP_CHUNK_SIZE': 50,
+    # Independent backend list calls and chunks are fetched concurrently by this number of threads
+    'HTTP_FETCH_WORKERS': 4,
+    # Objects pulled from backend are written to database in chunks of this size
+    'PULL_CHUNK_SIZE': 500,
+    # Bulk emails are sent in chunks, each chunk is sent over single SMTP connection
+    'EMAIL_CHUNK_SIZE': 100,
+    'EMAIL_WORKERS': 4,
     'ONLY_STAFF_CAN_INVITE_USERS': False,
     'INVITATION_APPROVE_URL': 'https://example.com/#/invitation_approve/{token}/',
     'INVITATION_REJECT_URL': 'https://example.com/#/invitation_reject/{token}/',
@@ -309,6 +331,23 @@ WALDUR_CORE = {
     'ATTACHMENT_LINK_MAX_AGE': timedelta(hours=1),
     'EMAIL_CHANGE_URL': 'https://example.com/#/user_email_change/{code}/',
     'EMAIL_CHANGE_MAX_AGE': timedelta(days=1),
+    'BACKGROUND_TASK_LEASE_TIMEOUT': timedelta(hours=1),
+    # Provisioning slot is released automatically if resource is stuck in provisioning state
+    'PROVISIONING_SLOT_TIMEOUT': timedelta(hours=3),
+    # If enabled, token last-seen time is stored in cache and flushed to database periodically
+    'TOKEN_WRITE_BEHIND': True,
+    'TOKEN_CACHE_TIMEOUT': timedelta(seconds=30),
+    # Timeout is specified in seconds, retries are done with exponential backoff
+    'HOOK_DELIVERY': {
+        'TIMEOUT': 10,
+        'RETRIES': 3,
+        'BACKOFF_FACTOR': 0.5,
+        'WORKERS': 10,
+        'HOST_CONCURRENCY': 4,
+    },
+    # Pending runtime state polls are checked with exponential backoff, delays are in seconds
+    'POLL_BACKOFF': {'INITIAL_DELAY': 5, 'MAX_DELAY': 60},
+    'POLL_TIMEOUT': timedelta(minutes=100),
 }
 
 WALDUR_CORE_PUBLIC_SETTINGS = [
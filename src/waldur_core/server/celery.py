@@ -3,9 +3,11 @@ import os
 from celery import Celery, signals
 
 from waldur_core.logging.middleware import (
+    finish_event_batch,
     get_event_context,
     reset_event_context,
     set_event_context,
+    start_event_batch,
 )
 
 # set the default Django settings module for the 'celery' program.
@@ -60,3 +62,14 @@ def bind_event_context(sender=None, **kwargs):
 @signals.task_postrun.connect
 def unbind_event_context(sender=None, **kwargs):
     reset_event_context()
+
+
+# Events emitted by task are stored in database in bulk when task is finished.
+@signals.task_prerun.connect
+def start_task_event_batch(sender=None, **kwargs):
+    start_event_batch()
+
+
+@signals.task_postrun.connect
+def finish_task_event_batch(sender=None, **kwargs):
+    finish_event_batch()
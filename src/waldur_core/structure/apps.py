@@ -80,6 +80,30 @@ class StructureConfig(AppConfig):
                 dispatch_uid='waldur_core.structure.handlers.%s' % name,
             )
 
+        for model in (CustomerPermission, ProjectPermission):
+            signals.post_save.connect(
+                handlers.clean_permission_index_after_permission_changed,
+                sender=model,
+                dispatch_uid='waldur_core.structure.handlers.'
+                'clean_permission_index_after_%s_saved' % model.__name__,
+            )
+
+            signals.post_delete.connect(
+                handlers.clean_permission_index_after_permission_changed,
+                sender=model,
+                dispatch_uid='waldur_core.structure.handlers.'
+                'clean_permission_index_after_%s_deleted' % model.__name__,
+            )
+
+        # permissions are revoked using bulk update, therefore post_save is not emitted
+        for model in structure_models_with_roles:
+            structure_signals.structure_role_revoked.connect(
+                handlers.clean_permission_index_after_role_revoked,
+                sender=model,
+                dispatch_uid='waldur_core.structure.handlers.'
+                'clean_permission_index_after_%s_role_revoked' % model.__name__,
+            )
+
         structure_signals.structure_role_granted.connect(
             handlers.log_customer_role_granted,
             sender=Customer,
@@ -150,6 +174,23 @@ class StructureConfig(AppConfig):
                 ),
             )
 
+            fsm_signals.post_transition.connect(
+                handlers.release_provisioning_slot,
+                sender=model,
+                dispatch_uid='waldur_core.structure.handlers.release_provisioning_slot_{}_{}'.format(
+                    model.__name__, index
+                ),
+            )
+
+            signals.post_delete.connect(
+                handlers.release_provisioning_slot_on_resource_deletion,
+                sender=model,
+                dispatch_uid='waldur_core.structure.handlers.'
+                'release_provisioning_slot_on_resource_deletion_{}_{}'.format(
+                    model.__name__, index
+                ),
+            )
+
             signals.post_save.connect(
                 handlers.log_resource_creation_scheduled,
                 sender=model,
@@ -10,6 +10,7 @@ from waldur_core.core import utils as core_utils
 from waldur_core.core.models import StateMixin
 from waldur_core.structure import SupportedServices, signals
 from waldur_core.structure.log import event_logger
+from waldur_core.structure.managers import clean_permission_index
 from waldur_core.structure.models import (
     Customer,
     CustomerPermission,
@@ -286,6 +287,25 @@ def _log_resource_creation_scheduled(instance):
         )
 
 
+def release_provisioning_slot(sender, instance, name, source, target, **kwargs):
+    provisioning_states = (
+        StateMixin.States.CREATION_SCHEDULED,
+        StateMixin.States.CREATING,
+    )
+    if source in provisioning_states and target not in provisioning_states:
+        throttle = tasks.ProvisioningThrottle.for_resource(instance)
+        throttle.release(throttle.get_owner(instance))
+
+
+def release_provisioning_slot_on_resource_deletion(sender, instance, **kwargs):
+    if instance.state in (
+        StateMixin.States.CREATION_SCHEDULED,
+        StateMixin.States.CREATING,
+    ):
+        throttle = tasks.ProvisioningThrottle.for_resource(instance)
+        throttle.release(throttle.get_owner(instance))
+
+
 def log_resource_action(sender, instance, name, source, target, **kwargs):
     if isinstance(instance, StateMixin):
         if source == StateMixin.States.CREATING:
@@ -391,6 +411,21 @@ def delete_service_settings_on_scope_delete(sender, instance, **kwargs):
         service_settings.delete()
 
 
+def _clean_permission_index(user_id):
+    # Index is cleaned again after commit, because concurrent request
+    # could cache old permissions before transaction is committed.
+    clean_permission_index(user_id)
+    transaction.on_commit(lambda: clean_permission_index(user_id))
+
+
+def clean_permission_index_after_permission_changed(sender, instance, **kwargs):
+    _clean_permission_index(instance.user_id)
+
+
+def clean_permission_index_after_role_revoked(sender, structure, user, **kwargs):
+    _clean_permission_index(user.pk)
+
+
 def clean_tags_cache_after_tagged_item_saved(sender, instance, **kwargs):
     instance.content_object.clean_tag_cache()
 
@@ -0,0 +1,45 @@
+import prettytable
+from django.core.management.base import BaseCommand
+
+from waldur_core.structure import models
+from waldur_core.structure.tasks import ProvisioningThrottle
+
+
+def format_seconds(value):
+    return '-' if value is None else '%.0f' % value
+
+
+class Command(BaseCommand):
+    help = "Show usage of provisioning slots and queue of throttled tasks per provider."
+
+    def handle(self, *args, **options):
+        throttles = ProvisioningThrottle.get_all()
+        names = dict(
+            models.ServiceSettings.objects.filter(
+                id__in=[throttle.service_settings_id for throttle in throttles]
+            ).values_list('id', 'name')
+        )
+        columns = [
+            'Provider',
+            'Resource type',
+            'Slots used',
+            'Limit',
+            'Queue depth',
+            'Max wait, s',
+            'Last wait, s',
+        ]
+        table = prettytable.PrettyTable(columns)
+        for throttle in throttles:
+            stats = throttle.get_stats()
+            table.add_row(
+                [
+                    names.get(int(throttle.service_settings_id), '-'),
+                    throttle.model_name,
+                    stats['usage'],
+                    stats['limit'],
+                    stats['queue'],
+                    format_seconds(stats['max_wait']),
+                    format_seconds(stats['last_wait']),
+                ]
+            )
+        self.stdout.write(table.get_string())
@@ -1,9 +1,78 @@
+import functools
+
+from django.apps import apps
+from django.core.cache import cache
 from django.db import models
 
 from waldur_core.core.managers import GenericKeyMixin, SummaryQuerySet
 
+PERMISSION_INDEX_CACHE_TIMEOUT = 60 * 60
+
+
+def _get_permission_index_key(user_id):
+    return 'permission_index:%s' % user_id
+
+
+def get_permission_index(user):
+    """
+    Return IDs of customers and projects where user has active role.
+    Index is cached until permissions of the user are changed.
+    """
+    key = _get_permission_index_key(user.pk)
+    index = cache.get(key)
+    if index is None:
+        from waldur_core.structure.models import CustomerPermission, ProjectPermission
+
+        index = {
+            'customer': set(
+                CustomerPermission.objects.filter(
+                    user=user, is_active=True
+                ).values_list('customer_id', flat=True)
+            ),
+            'project': set(
+                ProjectPermission.objects.filter(user=user, is_active=True).values_list(
+                    'project_id', flat=True
+                )
+            ),
+        }
+        cache.set(key, index, PERMISSION_INDEX_CACHE_TIMEOUT)
+    return index
+
+
+def clean_permission_index(user_id):
+    cache.delete(_get_permission_index_key(user_id))
+
+
+@functools.lru_cache(maxsize=None)
+def is_multivalued_path(model, path):
+    """
+    Return True if lookup path traverses many-to-many or reverse foreign key relation.
+    Path of abstract model is resolved against each of its concrete models.
+    """
+    if path == 'self':
+        return False
+    if model._meta.abstract:
+        return any(
+            is_multivalued_path(concrete_model, path)
+            for concrete_model in apps.get_models()
+            if issubclass(concrete_model, model)
+        )
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.many_to_many or field.one_to_many:
+            return True
+        model = field.related_model
+    return False
+
+
+def _get_queryset_models(queryset):
+    # Summary queryset combines querysets of concrete models
+    querysets = getattr(queryset, 'querysets', [queryset])
+    return [qs.model for qs in querysets]
+
 
 def get_permission_subquery(permissions, user):
+    index = get_permission_index(user)
     subquery = models.Q()
     for entity in ('customer', 'project'):
         path = getattr(permissions, '%s_path' % entity, None)
@@ -11,13 +80,11 @@ def get_permission_subquery(permissions, user):
             continue
 
         if path == 'self':
-            prefix = 'permissions__'
+            lookup = 'pk__in'
         else:
-            prefix = path + '__permissions__'
-
-        kwargs = {prefix + 'user': user, prefix + 'is_active': True}
+            lookup = path + '__in'
 
-        subquery |= models.Q(**kwargs)
+        subquery |= models.Q(**{lookup: index[entity]})
 
     # Add extra query which basically allows to
     # additionally filter by some flag and ignore permissions
@@ -41,7 +108,19 @@ def filter_queryset_for_user(queryset, user):
     if not subquery:
         return queryset
 
-    return queryset.filter(subquery).distinct()
+    queryset = queryset.filter(subquery)
+
+    paths = [
+        getattr(permissions, '%s_path' % entity, None)
+        for entity in ('customer', 'project')
+    ]
+    if any(
+        path and is_multivalued_path(model, path)
+        for model in _get_queryset_models(queryset)
+        for path in paths
+    ):
+        queryset = queryset.distinct()
+    return queryset
 
 
 class StructureQueryset(models.QuerySet):
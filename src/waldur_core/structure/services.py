@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+from waldur_core.core import validators as core_validators
+from waldur_core.logging.middleware import set_current_user
+from waldur_core.structure import models, permissions
+
+
+def get_request(user, method):
+    """
+    Build request object which is passed to serializers and permission checks.
+    It is not dispatched to any view, so user is authenticated directly.
+    """
+    http_request = HttpRequest()
+    http_request.method = method
+    request = Request(http_request)
+    request.user = user
+    return request
+
+
+def create_resource(user, serializer_class, executor, data):
+    """
+    Validate data, create resource and schedule its provisioning on behalf of the user.
+    Data is validated by the same serializer as in resource viewset.
+    """
+    set_current_user(user)
+    request = get_request(user, 'POST')
+    serializer = serializer_class(data=data, context={'request': request})
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        resource = serializer.save()
+        executor.execute(resource)
+    resource.refresh_from_db()
+    return resource
+
+
+def delete_resource(user, resource, executor, checks=None, validators=None):
+    """
+    Check permissions and state of the resource and schedule its deletion on behalf of the user.
+    By default, the same checks are applied as in resource viewset.
+    """
+    set_current_user(user)
+    request = get_request(user, 'DELETE')
+    if checks is None:
+        checks = [permissions.is_administrator]
+    if validators is None:
+        validators = [
+            core_validators.StateValidator(
+                models.NewResource.States.OK, models.NewResource.States.ERRED
+            )
+        ]
+    for check in checks:
+        check(request, None, resource)
+    for validator in validators:
+        validator(resource)
+    with transaction.atomic():
+        executor.execute(
+            resource, force=resource.state == models.NewResource.States.ERRED
+        )
@@ -1,9 +1,13 @@
 import functools
 import logging
+import time
 from datetime import timedelta
 
-from celery import shared_task
+from celery import shared_task, signature
+from celery.exceptions import Ignore
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.models import Q
 from django.db.utils import DatabaseError
@@ -108,11 +112,6 @@ class BackgroundPullTask(core_tasks.BackgroundTask):
         else:
             self.on_pull_success(instance)
 
-    def is_equal(self, other_task, serialized_instance):
-        return self.name == other_task.get(
-            'name'
-        ) and serialized_instance in other_task.get('args', [])
-
     def pull(self, instance):
         """ Pull instance from backend.
 
@@ -161,9 +160,6 @@ class BackgroundListPullTask(core_tasks.BackgroundTask):
     model = NotImplemented
     pull_task = NotImplemented
 
-    def is_equal(self, other_task):
-        return self.name == other_task.get('name')
-
     def get_pulled_objects(self):
         States = self.model.States
         return self.model.objects.filter(state__in=[States.ERRED, States.OK]).exclude(
@@ -231,26 +227,159 @@ class RetryUntilAvailableTask(core_tasks.Task):
         return True
 
 
-class BaseThrottleProvisionTask(RetryUntilAvailableTask):
+class ProvisioningThrottle:
+    """ Admission controller for resource provisioning.
+
+        It limits number of resources of the same type which are provisioned
+        concurrently within the same service settings. Capacity is tracked as
+        semaphore in cache. Tasks which are not admitted are put to the queue
+        and dispatched again as soon as resource leaves provisioning state.
+    """
+
+    key_prefix = 'provisioning_throttle'
+    lock_timeout = 10
+
+    def __init__(self, service_settings_id, model_name, limit=None):
+        self.service_settings_id = service_settings_id
+        self.model_name = model_name
+        self.name = '%s:%s' % (service_settings_id, model_name)
+        if limit is None:
+            limit = self._get_index().get(
+                self.name, BaseThrottleProvisionTask.DEFAULT_LIMIT
+            )
+        self.limit = limit
+        timeout = settings.WALDUR_CORE['PROVISIONING_SLOT_TIMEOUT']
+        self.semaphore = core_utils.CacheSemaphore(
+            '%s:%s' % (self.key_prefix, self.name), limit, int(timeout.total_seconds()),
+        )
+
+    @classmethod
+    def for_resource(cls, resource, limit=None):
+        service_settings_id = resource.service_project_link.service.settings_id
+        return cls(service_settings_id, resource._meta.label_lower, limit)
+
+    @staticmethod
+    def get_owner(resource):
+        return core_utils.serialize_instance(resource)
+
+    @property
+    def _queue_key(self):
+        return '%s_queue:%s' % (self.key_prefix, self.name)
+
+    @property
+    def _wait_key(self):
+        return '%s_wait:%s' % (self.key_prefix, self.name)
+
+    @classmethod
+    def _get_index(cls):
+        return cache.get('%s_index' % cls.key_prefix) or {}
+
+    def _update_index(self):
+        # Index is used for reporting and periodic wakeup, so it is updated on best effort basis.
+        index = self._get_index()
+        if index.get(self.name) != self.limit:
+            index[self.name] = self.limit
+            cache.set('%s_index' % self.key_prefix, index, None)
+
+    def _lock(self):
+        return core_utils.cache_lock(
+            '%s_lock:%s' % (self.key_prefix, self.name), self.lock_timeout
+        )
+
+    def acquire(self, owner):
+        self._update_index()
+        return self.semaphore.acquire(owner)
+
+    def release(self, owner):
+        if self.semaphore.release(owner):
+            try:
+                self.wake()
+            except core_utils.CacheLockTimeout:
+                # Queued tasks are dispatched by periodic wakeup instead
+                logger.warning('Unable to wake provisioning throttle %s.', self.name)
+
+    def enqueue(self, owner, signature):
+        with self._lock():
+            queue = cache.get(self._queue_key) or []
+            queue.append(
+                {'owner': owner, 'signature': dict(signature), 'enqueued': time.time()}
+            )
+            cache.set(self._queue_key, queue, None)
+
+    @staticmethod
+    def _is_waiting(owner):
+        """ Check if resource still waits for provisioning """
+        try:
+            resource = core_utils.deserialize_instance(owner)
+        except ObjectDoesNotExist:
+            return False
+        return resource.state == core_models.StateMixin.States.CREATION_SCHEDULED
+
+    def wake(self):
+        """
+        Reserve free slots for queued tasks and dispatch them.
+        Tasks of resources which have been deleted or have left
+        creation scheduled state while waiting are dropped.
+        """
+        # Resources are checked before lock is acquired in order to keep it short
+        queue = cache.get(self._queue_key) or []
+        stale = {
+            entry['owner'] for entry in queue if not self._is_waiting(entry['owner'])
+        }
+
+        with self._lock():
+            queue = cache.get(self._queue_key) or []
+            pending = [entry for entry in queue if entry['owner'] not in stale]
+            admitted = []
+            while pending and self.semaphore.acquire(pending[0]['owner']):
+                admitted.append(pending.pop(0))
+            if len(pending) != len(queue):
+                cache.set(self._queue_key, pending, None)
+
+        now = time.time()
+        for entry in admitted:
+            cache.set(self._wait_key, now - entry['enqueued'], None)
+            signature(entry['signature']).apply_async()
+        return len(admitted)
+
+    def get_stats(self):
+        queue = cache.get(self._queue_key) or []
+        now = time.time()
+        return {
+            'limit': self.limit,
+            'usage': self.semaphore.get_usage(),
+            'queue': len(queue),
+            'max_wait': queue and now - queue[0]['enqueued'] or None,
+            'last_wait': cache.get(self._wait_key),
+        }
+
+    @classmethod
+    def get_all(cls):
+        return [
+            cls(*name.split(':', 1), limit=limit)
+            for name, limit in cls._get_index().items()
+        ]
+
+
+class BaseThrottleProvisionTask(core_tasks.Task):
     """
-    Before starting resource provisioning, count how many resources
-    are already in "creating" state and delay provisioning if there are too many of them.
+    Before starting resource provisioning, acquire provisioning slot
+    and delay provisioning until slot is released if there are too many
+    resources in "creating" state.
     """
 
     DEFAULT_LIMIT = 4
 
-    def is_available(self, resource):
-        usage = self.get_usage(resource)
-        limit = self.get_limit(resource)
-        return usage <= limit
-
-    def get_usage(self, resource):
-        service_settings = resource.service_project_link.service.settings
-        model_class = resource._meta.model
-        return model_class.objects.filter(
-            state=core_models.StateMixin.States.CREATING,
-            service_project_link__service__settings=service_settings,
-        ).count()
+    def pre_execute(self, resource):
+        throttle = ProvisioningThrottle.for_resource(resource, self.get_limit(resource))
+        owner = throttle.get_owner(resource)
+        if not throttle.acquire(owner):
+            # Task is dispatched again with the same chain when slot is released
+            throttle.enqueue(owner, self.signature_from_request())
+            # Slot could have been released before task has been queued
+            throttle.wake()
+            raise Ignore()
+        super(BaseThrottleProvisionTask, self).pre_execute(resource)
 
     def get_limit(self, resource):
         return self.DEFAULT_LIMIT
@@ -266,6 +395,19 @@ class ThrottleProvisionStateTask(
     pass
 
 
+class WakeThrottledProvisioningTask(core_tasks.BackgroundTask):
+    """
+    Dispatch queued provisioning tasks if slots have been released
+    without notification, for example, when slot has expired.
+    """
+
+    name = 'waldur_core.structure.WakeThrottledProvisioningTask'
+
+    def run(self):
+        for throttle in ProvisioningThrottle.get_all():
+            throttle.wake()
+
+
 class SetErredStuckResources(core_tasks.BackgroundTask):
     """
     This task marks all resources which have been provisioning for more than 3 hours as erred.
@@ -273,9 +415,6 @@ class SetErredStuckResources(core_tasks.BackgroundTask):
 
     name = 'waldur_core.structure.SetErredStuckResources'
 
-    def is_equal(self, other_task):
-        return self.name == other_task.get('name')
-
     def run(self):
         cutoff = timezone.now() - timedelta(hours=3)
         states = (
@@ -0,0 +1,86 @@
+import logging
+import os
+import time
+import unittest
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.test import TransactionTestCase
+
+from waldur_core.structure.managers import filter_queryset_for_user
+from waldur_core.structure.tests import factories, fixtures
+from waldur_core.structure.tests import models as test_models
+
+logger = logging.getLogger(__name__)
+
+RESOURCES_COUNT = 100000
+
+
+@unittest.skipUnless(
+    os.environ.get('WALDUR_BENCHMARK'), 'Set WALDUR_BENCHMARK=1 to run benchmarks.'
+)
+class PermissionFilterBenchmark(TransactionTestCase):
+    """
+    Compare permission filtering via joins through permissions table
+    with filtering via cached index of visible customers and projects.
+    """
+
+    def setUp(self):
+        self.fixture = fixtures.ServiceFixture()
+        links = [self.fixture.service_project_link]
+        for _ in range(99):
+            project = factories.ProjectFactory(customer=factories.CustomerFactory())
+            links.append(
+                factories.TestServiceProjectLinkFactory(
+                    service=self.fixture.service, project=project
+                )
+            )
+        test_models.TestNewInstance.objects.bulk_create(
+            test_models.TestNewInstance(
+                name='instance%s' % index,
+                service_project_link=links[index % len(links)],
+            )
+            for index in range(RESOURCES_COUNT)
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def filter_with_joins(self, queryset, user):
+        subquery = Q(
+            service_project_link__project__customer__permissions__user=user,
+            service_project_link__project__customer__permissions__is_active=True,
+        ) | Q(
+            service_project_link__project__permissions__user=user,
+            service_project_link__project__permissions__is_active=True,
+        )
+        return queryset.filter(subquery).distinct()
+
+    def measure(self, func, repeats=10):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        return (time.perf_counter() - started) / repeats
+
+    def test_benchmark(self):
+        user = self.fixture.admin
+        queryset = test_models.TestNewInstance.objects.order_by('pk')
+
+        def with_joins():
+            return list(self.filter_with_joins(queryset, user)[:100])
+
+        def with_index():
+            return list(filter_queryset_for_user(queryset, user)[:100])
+
+        self.assertEqual(
+            set(r.pk for r in with_joins()), set(r.pk for r in with_index())
+        )
+
+        joins_time = self.measure(with_joins)
+        index_time = self.measure(with_index)
+        logger.info(
+            'Resources: %s. Joins: %.4fs. Index: %.4fs.',
+            RESOURCES_COUNT,
+            joins_time,
+            index_time,
+        )
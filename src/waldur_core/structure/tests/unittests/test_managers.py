@@ -0,0 +1,179 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from waldur_core.structure import managers, models
+from waldur_core.structure.managers import filter_queryset_for_user
+from waldur_core.structure.tests import factories, fixtures
+from waldur_core.structure.tests import models as test_models
+
+
+class FilterQuerysetForUserTest(TestCase):
+    def setUp(self):
+        self.fixture = fixtures.ServiceFixture()
+        self.resource = self.fixture.resource
+
+    def tearDown(self):
+        cache.clear()
+
+    def filter_resources(self, user):
+        return filter_queryset_for_user(test_models.TestNewInstance.objects.all(), user)
+
+    def test_owner_can_see_resource(self):
+        self.assertEqual(
+            list(self.filter_resources(self.fixture.owner)), [self.resource]
+        )
+
+    def test_admin_can_see_resource(self):
+        self.assertEqual(
+            list(self.filter_resources(self.fixture.admin)), [self.resource]
+        )
+
+    def test_user_without_role_can_not_see_resource(self):
+        self.assertEqual(list(self.filter_resources(self.fixture.user)), [])
+
+    def test_distinct_is_not_used_for_foreign_key_paths(self):
+        queryset = self.filter_resources(self.fixture.owner)
+        self.assertFalse(queryset.query.distinct)
+
+    def test_distinct_is_not_used_for_summary_queryset_of_resources(self):
+        queryset = managers.ResourceSummaryQuerySet(
+            [test_models.TestNewInstance, test_models.TestVolume]
+        )
+        queryset = filter_queryset_for_user(queryset, self.fixture.owner)
+        self.assertFalse(any(qs.query.distinct for qs in queryset.querysets))
+        self.assertEqual(list(queryset), [self.resource])
+
+    def test_path_of_abstract_model_is_resolved_against_concrete_models(self):
+        self.assertFalse(
+            managers.is_multivalued_path(
+                models.ResourceMixin, 'service_project_link__project'
+            )
+        )
+        self.assertTrue(managers.is_multivalued_path(models.Service, 'projects'))
+
+    def test_index_is_invalidated_when_role_is_granted(self):
+        user = self.fixture.user
+        self.assertEqual(list(self.filter_resources(user)), [])
+
+        self.fixture.project.add_user(user, models.ProjectRole.ADMINISTRATOR)
+        self.assertEqual(list(self.filter_resources(user)), [self.resource])
+
+    def test_index_is_invalidated_when_role_is_revoked(self):
+        owner = self.fixture.owner
+        self.assertEqual(list(self.filter_resources(owner)), [self.resource])
+
+        self.fixture.customer.remove_user(owner, models.CustomerRole.OWNER)
+        self.assertEqual(list(self.filter_resources(owner)), [])
+
+
+class PermissionIndexInvalidationTest(TransactionTestCase):
+    def tearDown(self):
+        cache.clear()
+
+    def test_index_cached_before_commit_is_invalidated(self):
+        fixture = fixtures.ServiceFixture()
+        fixture.resource
+        owner = fixture.owner
+        stale_index = managers.get_permission_index(owner)
+
+        with transaction.atomic():
+            fixture.customer.remove_user(owner, models.CustomerRole.OWNER)
+            # Concurrent request caches permissions before transaction is committed
+            cache.set(managers._get_permission_index_key(owner.pk), stale_index)
+
+        queryset = filter_queryset_for_user(
+            test_models.TestNewInstance.objects.all(), owner
+        )
+        self.assertEqual(list(queryset), [])
+
+
+class ResourceSummaryQuerySetTest(TestCase):
+    def setUp(self):
+        fixture = fixtures.ServiceFixture()
+        link = fixture.service_project_link
+        self.instances = [
+            factories.TestNewInstanceFactory(service_project_link=link, name=name)
+            for name in ('a', 'c', 'e')
+        ]
+        self.volumes = [
+            factories.TestVolumeFactory(service_project_link=link, name=name)
+            for name in ('b', 'd')
+        ]
+        self.queryset = managers.ResourceSummaryQuerySet(
+            [test_models.TestNewInstance, test_models.TestVolume]
+        )
+
+    def test_count_includes_all_models(self):
+        self.assertEqual(self.queryset.count(), 5)
+
+    def test_ordering_is_applied_across_models(self):
+        self.queryset.order_by('name')
+        self.assertEqual([r.name for r in self.queryset], ['a', 'b', 'c', 'd', 'e'])
+
+    def test_slicing_returns_requested_page(self):
+        self.queryset.order_by('-name')
+        self.assertEqual([r.name for r in self.queryset[1:3]], ['d', 'c'])
+
+    def test_ordering_defined_for_each_queryset_is_used(self):
+        self.queryset.querysets = [
+            qs.order_by('name') for qs in self.queryset.querysets
+        ]
+        self.assertEqual(self.queryset[1], self.volumes[0])
+
+    def test_filters_are_applied_to_each_model(self):
+        self.queryset.filter(name__gt='b').order_by('name')
+        self.assertEqual([r.name for r in self.queryset[:2]], ['c', 'd'])
+
+    def test_strings_are_ordered_case_insensitively(self):
+        self.volumes[0].name = 'B'
+        self.volumes[0].save()
+        self.queryset.order_by('name')
+        self.assertEqual([r.name for r in self.queryset], ['a', 'B', 'c', 'd', 'e'])
+
+    def test_null_values_come_first_with_ascending_ordering(self):
+        settings = factories.ServiceSettingsFactory(username='admin')
+        link = factories.TestServiceProjectLinkFactory(service__settings=settings)
+        volume = factories.TestVolumeFactory(service_project_link=link)
+
+        self.queryset.order_by('service_project_link__service__settings__username')
+        self.assertEqual(list(self.queryset)[-1], volume)
+
+        self.queryset.order_by('-service_project_link__service__settings__username')
+        self.assertEqual(list(self.queryset)[0], volume)
+
+    def test_keyset_pagination(self):
+        self.queryset.order_by('name')
+        page = self.queryset[:2]
+
+        self.queryset.after(self.queryset.get_cursor(page[-1]))
+        self.assertEqual([r.name for r in self.queryset[:2]], ['c', 'd'])
+        self.assertEqual(self.queryset.count(), 3)
+
+    def test_model_and_primary_key_are_used_as_tie_breaker_for_cursor(self):
+        for resource in self.instances + self.volumes:
+            resource.name = 'resource'
+            resource.save()
+        self.queryset.order_by('name')
+        resources = list(self.queryset)
+
+        self.queryset.after(self.queryset.get_cursor(resources[1]))
+        self.assertEqual(list(self.queryset), resources[2:])
+
+    def test_keyset_pagination_with_null_values(self):
+        settings = factories.ServiceSettingsFactory(username='admin')
+        link = factories.TestServiceProjectLinkFactory(service__settings=settings)
+        volume = factories.TestVolumeFactory(service_project_link=link)
+        self.queryset.order_by('-service_project_link__service__settings__username')
+        resources = list(self.queryset)
+        self.assertEqual(resources[0], volume)
+
+        self.queryset.after(self.queryset.get_cursor(resources[0]))
+        self.assertEqual(list(self.queryset), resources[1:])
+
+        self.queryset.after(self.queryset.get_cursor(resources[2]))
+        self.assertEqual(list(self.queryset), resources[3:])
+
+    def test_invalid_cursor_is_rejected(self):
+        self.queryset.order_by('name')
+        self.assertRaises(ValueError, self.queryset.after, 'invalid')
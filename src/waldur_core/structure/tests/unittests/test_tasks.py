@@ -2,6 +2,7 @@ from datetime import timedelta
 from unittest import mock
 
 from ddt import data, ddt
+from django.core.cache import cache
 from django.test import TestCase
 from django.utils import timezone
 from freezegun import freeze_time
@@ -13,28 +14,107 @@ from waldur_core.structure.tests import factories, models
 
 @ddt
 class ThrottleProvisionTaskTest(TestCase):
-    @data(
-        dict(size=tasks.ThrottleProvisionTask.DEFAULT_LIMIT + 1, retried=True),
-        dict(size=tasks.ThrottleProvisionTask.DEFAULT_LIMIT - 1, retried=False),
-    )
-    def test_if_limit_is_reached_provisioning_is_delayed(self, params):
-        link = factories.TestServiceProjectLinkFactory()
-        factories.TestNewInstanceFactory.create_batch(
-            size=params['size'],
+    def setUp(self):
+        self.link = factories.TestServiceProjectLinkFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def create_provisioning_resources(self, size):
+        resources = factories.TestNewInstanceFactory.create_batch(
+            size=size,
             state=models.TestNewInstance.States.CREATING,
-            service_project_link=link,
+            service_project_link=self.link,
         )
+        for resource in resources:
+            throttle = tasks.ProvisioningThrottle.for_resource(resource)
+            throttle.acquire(throttle.get_owner(resource))
+        return resources
+
+    def provision(self):
         vm = factories.TestNewInstanceFactory(
             state=models.TestNewInstance.States.CREATION_SCHEDULED,
-            service_project_link=link,
+            service_project_link=self.link,
         )
         serialized_vm = utils.serialize_instance(vm)
-        mocked_retry = mock.Mock()
-        tasks.ThrottleProvisionTask.retry = mocked_retry
         tasks.ThrottleProvisionTask().si(
             serialized_vm, 'create', state_transition='begin_starting'
         ).apply()
-        self.assertEqual(mocked_retry.called, params['retried'])
+        return vm
+
+    @data(
+        dict(size=tasks.ThrottleProvisionTask.DEFAULT_LIMIT, queued=True),
+        dict(size=tasks.ThrottleProvisionTask.DEFAULT_LIMIT - 1, queued=False),
+    )
+    @mock.patch.object(tasks.ThrottleProvisionTask, 'execute')
+    def test_if_limit_is_reached_provisioning_is_delayed(self, params, execute):
+        self.create_provisioning_resources(params['size'])
+        vm = self.provision()
+
+        self.assertEqual(execute.called, not params['queued'])
+        stats = tasks.ProvisioningThrottle.for_resource(vm).get_stats()
+        self.assertEqual(stats['queue'], int(params['queued']))
+
+    @mock.patch('waldur_core.structure.tasks.signature')
+    @mock.patch.object(tasks.ThrottleProvisionTask, 'execute')
+    def test_queued_task_is_dispatched_when_slot_is_released(self, execute, signature):
+        resources = self.create_provisioning_resources(
+            tasks.ThrottleProvisionTask.DEFAULT_LIMIT
+        )
+        vm = self.provision()
+
+        resources[0].set_ok()
+        resources[0].save()
+
+        signature().apply_async.assert_called_once_with()
+        stats = tasks.ProvisioningThrottle.for_resource(vm).get_stats()
+        self.assertEqual(stats['queue'], 0)
+        self.assertEqual(stats['usage'], tasks.ThrottleProvisionTask.DEFAULT_LIMIT)
+
+    @mock.patch('waldur_core.structure.tasks.signature')
+    @mock.patch.object(tasks.ThrottleProvisionTask, 'execute')
+    def test_queued_task_of_deleted_resource_is_dropped(self, execute, signature):
+        resources = self.create_provisioning_resources(
+            tasks.ThrottleProvisionTask.DEFAULT_LIMIT
+        )
+        vm = self.provision()
+        throttle = tasks.ProvisioningThrottle.for_resource(vm)
+        vm.delete()
+
+        resources[0].set_ok()
+        resources[0].save()
+
+        self.assertFalse(signature().apply_async.called)
+        stats = throttle.get_stats()
+        self.assertEqual(stats['queue'], 0)
+        self.assertEqual(stats['usage'], tasks.ThrottleProvisionTask.DEFAULT_LIMIT - 1)
+
+    @mock.patch('waldur_core.structure.tasks.signature')
+    @mock.patch.object(tasks.ThrottleProvisionTask, 'execute')
+    def test_task_is_dispatched_if_slot_is_released_before_it_is_queued(
+        self, execute, signature
+    ):
+        resources = self.create_provisioning_resources(
+            tasks.ThrottleProvisionTask.DEFAULT_LIMIT
+        )
+        enqueue = tasks.ProvisioningThrottle.enqueue
+
+        def release_and_enqueue(throttle, owner, task_signature):
+            # Slot is released by another worker while queue is still empty
+            throttle.release(throttle.get_owner(resources[0]))
+            enqueue(throttle, owner, task_signature)
+
+        with mock.patch.object(
+            tasks.ProvisioningThrottle,
+            'enqueue',
+            autospec=True,
+            side_effect=release_and_enqueue,
+        ):
+            vm = self.provision()
+
+        signature().apply_async.assert_called_once_with()
+        stats = tasks.ProvisioningThrottle.for_resource(vm).get_stats()
+        self.assertEqual(stats['queue'], 0)
 
 
 class SetErredProvisioningResourcesTaskTest(TestCase):
@@ -1,7 +1,11 @@
 import unittest
 from unittest import mock
 
-from waldur_core.structure.utils import update_pulled_fields
+from django.db.models import signals
+from django.test import TestCase
+
+from waldur_core.structure.tests import factories, models
+from waldur_core.structure.utils import ChangeSet, update_pulled_fields
 
 
 class InstanceMock:
@@ -36,3 +40,65 @@ class UpdatePulledFieldsTest(unittest.TestCase):
         vm2 = InstanceMock(error_message='Server does not respond.')
         update_pulled_fields(vm1, vm2, ('name',))
         self.assertEqual(vm1.save.call_count, 1)
+
+
+class ChangeSetTest(TestCase):
+    def setUp(self):
+        self.spl = factories.TestServiceProjectLinkFactory()
+        self.vms = factories.TestNewInstanceFactory.create_batch(
+            3, service_project_link=self.spl, runtime_state='OK'
+        )
+        self.changes = ChangeSet(models.TestNewInstance)
+
+    def test_changed_objects_are_updated_in_bulk(self):
+        for vm in self.vms:
+            pulled_vm = models.TestNewInstance(name=vm.name, runtime_state='ERRED')
+            update_pulled_fields(vm, pulled_vm, ('name', 'runtime_state'), self.changes)
+
+        self.changes.apply()
+
+        for vm in self.vms:
+            vm.refresh_from_db()
+            self.assertEqual(vm.runtime_state, 'ERRED')
+
+    def test_stats_are_reported(self):
+        update_pulled_fields(
+            self.vms[0],
+            models.TestNewInstance(name='new name'),
+            ('name',),
+            self.changes,
+        )
+        update_pulled_fields(
+            self.vms[1], self.vms[1], ('name',), self.changes,
+        )
+        self.changes.create(
+            models.TestNewInstance(
+                name='new vm', service_project_link=self.spl, runtime_state='OK'
+            )
+        )
+        self.changes.delete(models.TestNewInstance.objects.filter(pk=self.vms[2].pk))
+
+        stats = self.changes.apply()
+
+        self.assertEqual(
+            stats, {'inserted': 1, 'updated': 1, 'deleted': 1, 'unchanged': 1}
+        )
+        self.assertTrue(models.TestNewInstance.objects.filter(name='new vm').exists())
+        self.assertFalse(
+            models.TestNewInstance.objects.filter(pk=self.vms[2].pk).exists()
+        )
+
+    def test_post_save_signal_is_sent_for_changed_objects_only(self):
+        handler = mock.Mock()
+        signals.post_save.connect(handler, sender=models.TestNewInstance)
+        self.addCleanup(
+            signals.post_save.disconnect, handler, sender=models.TestNewInstance
+        )
+
+        self.changes.set_values(self.vms[0], name='new name')
+        self.changes.set_values(self.vms[1], name=self.vms[1].name)
+        self.changes.apply()
+
+        handler.assert_called_once()
+        self.assertEqual(handler.call_args[1]['instance'], self.vms[0])
+        self.assertIn('name', handler.call_args[1]['update_fields'])
@@ -1,12 +1,16 @@
 import collections
 import logging
 
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import signals
 from django.utils.lru_cache import lru_cache
 from django.utils.topological_sort import stable_topological_sort
 from django.utils.translation import ugettext_lazy as _
 from rest_framework.exceptions import ValidationError
 
+from waldur_core.quotas import aggregation as quotas_aggregation
+
 from . import SupportedServices
 
 logger = logging.getLogger(__name__)
@@ -96,37 +100,174 @@ def get_all_services_field_info():
     )
 
 
-def update_pulled_fields(instance, imported_instance, fields):
+def get_pulled_changes(instance, imported_instance, fields):
     """
     Update instance fields based on imported from backend data.
-    Save changes to DB only one or more fields were changed.
+    Return list of changed fields with their previous and new values.
     """
-    modified = False
+    changes = []
     for field in fields:
         pulled_value = getattr(imported_instance, field)
         current_value = getattr(instance, field)
         if current_value != pulled_value:
             setattr(instance, field, pulled_value)
-            logger.info(
-                "%s's with PK %s %s field updated from value '%s' to value '%s'",
-                instance.__class__.__name__,
-                instance.pk,
-                field,
-                current_value,
-                pulled_value,
-            )
-            modified = True
+            changes.append((field, current_value, pulled_value))
     error_message = getattr(imported_instance, 'error_message', '') or getattr(
         instance, 'error_message', ''
     )
     if error_message and instance.error_message != error_message:
+        changes.append(
+            ('error_message', instance.error_message, imported_instance.error_message)
+        )
         instance.error_message = imported_instance.error_message
-        modified = True
-    if modified:
+    return changes
+
+
+def update_pulled_fields(instance, imported_instance, fields, changes=None):
+    """
+    Update instance fields based on imported from backend data.
+    Save changes to DB only one or more fields were changed.
+    If change set is specified, changes are applied later in bulk.
+    """
+    pulled_changes = get_pulled_changes(instance, imported_instance, fields)
+    if changes is not None:
+        changes.update(instance, [field for field, _, _ in pulled_changes])
+        return
+    for field, current_value, pulled_value in pulled_changes:
+        logger.info(
+            "%s's with PK %s %s field updated from value '%s' to value '%s'",
+            instance.__class__.__name__,
+            instance.pk,
+            field,
+            current_value,
+            pulled_value,
+        )
+    if pulled_changes:
         instance.save()
 
 
-def handle_resource_not_found(resource):
+class ChangeSet:
+    """
+    Collect changes of objects pulled from backend and apply them in bulk.
+
+    Instead of saving objects one by one, new objects are inserted using
+    bulk_create and changed objects are updated using bulk_update in chunks.
+    Post save signals are sent after changes are applied so that handlers
+    of pulled objects are executed the same way as for regular save.
+    """
+
+    def __init__(self, model, chunk_size=None, send_created_signals=True):
+        self.model = model
+        self.chunk_size = chunk_size or settings.WALDUR_CORE['PULL_CHUNK_SIZE']
+        self.send_created_signals = send_created_signals
+        self.created = []
+        self.updated = {}
+        self.seen = set()
+        self.deleted = []
+        self.changed_fields = collections.Counter()
+        self.stats = None
+
+    def create(self, instance):
+        self.created.append(instance)
+
+    def update(self, instance, fields):
+        """ Mark fields of existing object as changed """
+        self.seen.add(instance.pk)
+        if not fields:
+            return
+        _, updated_fields = self.updated.setdefault(instance.pk, (instance, set()))
+        self.changed_fields.update(set(fields) - updated_fields)
+        updated_fields.update(fields)
+
+    def set_values(self, instance, **values):
+        """ Set field values of existing object and mark changed fields """
+        fields = []
+        for field, value in values.items():
+            if getattr(instance, field) != value:
+                setattr(instance, field, value)
+                fields.append(field)
+        self.update(instance, fields)
+        return bool(fields)
+
+    def delete(self, queryset):
+        self.deleted.append(queryset)
+
+    def _get_auto_now_fields(self):
+        return [
+            field
+            for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+
+    def _update(self):
+        auto_now_fields = self._get_auto_now_fields()
+        groups = collections.defaultdict(list)
+        for instance, fields in self.updated.values():
+            for field in auto_now_fields:
+                field.pre_save(instance, False)
+                fields.add(field.name)
+            groups[frozenset(fields)].append(instance)
+        # Only changed fields are written so that concurrent changes of other fields are kept
+        for fields, instances in groups.items():
+            self.model.objects.bulk_update(
+                instances, list(fields), batch_size=self.chunk_size
+            )
+
+    def _delete(self):
+        deleted = 0
+        for queryset in self.deleted:
+            _, per_model = queryset.delete()
+            deleted += per_model.get(self.model._meta.label, 0)
+        return deleted
+
+    def _send_signals(self):
+        if self.send_created_signals:
+            for instance in self.created:
+                signals.post_save.send(
+                    sender=self.model, instance=instance, created=True
+                )
+        for instance, fields in self.updated.values():
+            signals.post_save.send(
+                sender=self.model,
+                instance=instance,
+                created=False,
+                update_fields=frozenset(fields),
+            )
+
+    @transaction.atomic
+    def apply(self):
+        """ Apply collected changes and return number of affected objects """
+        # Changes of quotas caused by signal handlers are propagated to aggregator quotas once
+        with quotas_aggregation.aggregation_batch():
+            self.model.objects.bulk_create(self.created, batch_size=self.chunk_size)
+            self._update()
+            deleted = self._delete()
+            self._send_signals()
+
+        self.stats = {
+            'inserted': len(self.created),
+            'updated': len(self.updated),
+            'deleted': deleted,
+            'unchanged': len(self.seen) - len(self.updated),
+        }
+        if any(self.stats[key] for key in ('inserted', 'updated', 'deleted')):
+            logger.info(
+                '%s objects have been synchronized: %s inserted, %s updated, '
+                '%s deleted, %s unchanged. Updated fields: %s.',
+                self.model.__name__,
+                self.stats['inserted'],
+                self.stats['updated'],
+                self.stats['deleted'],
+                self.stats['unchanged'],
+                ', '.join(
+                    '%s (%s)' % item for item in sorted(self.changed_fields.items())
+                )
+                or '-',
+            )
+        return self.stats
+
+
+def handle_resource_not_found(resource, changes=None):
     """
     Set resource state to ERRED and append/create "not found" error message.
     """
@@ -138,14 +279,17 @@ def handle_resource_not_found(resource):
             resource.error_message = message
         else:
             resource.error_message += ' (%s)' % message
-    resource.save()
+    if changes is not None:
+        changes.update(resource, ['state', 'runtime_state', 'error_message'])
+    else:
+        resource.save()
     logger.warning(
         '%s %s (PK: %s) does not exist at backend.'
         % (resource.__class__.__name__, resource, resource.pk)
     )
 
 
-def handle_resource_update_success(resource):
+def handle_resource_update_success(resource, changes=None):
     """
     Recover resource if its state is ERRED and clear error message.
     """
@@ -162,6 +306,10 @@ def handle_resource_update_success(resource):
         resource.error_message = ''
         update_fields.append('error_message')
 
+    if changes is not None:
+        changes.update(resource, update_fields)
+        return
+
     if update_fields:
         resource.save(update_fields=update_fields)
     logger.info(
@@ -1,7 +1,8 @@
 import functools
 import logging
-from io import BytesIO
+import tempfile
 
+import requests
 from django.conf import settings
 from django.db import IntegrityError, transaction
 from django.utils import timezone
@@ -11,8 +12,10 @@ from jira.client import _get_template_list
 from jira.utils import json_loads
 from rest_framework import status
 
+from waldur_core.core import utils as core_utils
 from waldur_core.core.models import StateMixin
 from waldur_core.structure import ServiceBackend, ServiceBackendError
+from waldur_core.structure import utils as structure_utils
 from waldur_core.structure.utils import update_pulled_fields
 
 from . import models
@@ -20,6 +23,8 @@ from .jira_fix import JIRA, JIRAError
 
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 
 class JiraBackendError(ServiceBackendError):
     pass
@@ -502,47 +507,67 @@ class JiraBackend(ServiceBackend):
 
     @reraise_exceptions
     def import_project_issues(self, project, start_at=0, max_results=50, order=None):
-        waldur_issues = list(
-            self.model_issue.objects.filter(
-                project=project, backend_id__isnull=False
-            ).values_list('backend_id', flat=True)
-        )
-
+        """
+        Import page of project issues which do not exist in Waldur yet.
+        Issues and their comments are inserted in bulk within single transaction
+        so that import of the page can be safely repeated if it has failed.
+        """
         jql = 'project=%s' % project.backend_id
         if order:
             jql += ' ORDER BY %s' % order
 
-        for backend_issue in self.manager.search_issues(
+        backend_issues = self.manager.search_issues(
             jql, startAt=start_at, maxResults=max_results, fields='*all'
-        ):
-            key = backend_issue.key
-            if key in waldur_issues:
-                logger.debug(
-                    'Skipping import of issue with key=%s, '
-                    'because it already exists in Waldur.',
-                    key,
-                )
-                continue
+        )
+        waldur_issues = set(
+            self.model_issue.objects.filter(
+                project=project,
+                backend_id__in=[backend_issue.key for backend_issue in backend_issues],
+            ).values_list('backend_id', flat=True)
+        )
 
-            issue = self.model_issue(
-                project=project, backend_id=key, state=StateMixin.States.OK
-            )
-            self._backend_issue_to_issue(backend_issue, issue)
-            issue.save()
+        imported = []
+        with transaction.atomic():
+            issues = structure_utils.ChangeSet(self.model_issue)
+            for backend_issue in backend_issues:
+                key = backend_issue.key
+                if key in waldur_issues:
+                    logger.debug(
+                        'Skipping import of issue with key=%s, '
+                        'because it already exists in Waldur.',
+                        key,
+                    )
+                    continue
+                waldur_issues.add(key)
 
-            attachment_synchronizer = AttachmentSynchronizer(self, issue, backend_issue)
-            attachment_synchronizer.perform_update()
-
-            for backend_comment in backend_issue.fields.comment.comments:
-                tmp = issue.comments.model()
-                tmp.clean_message(backend_comment.body)
-                issue.comments.create(
-                    user=tmp.user,
-                    message=tmp.message,
-                    created=parse_datetime(backend_comment.created),
-                    backend_id=backend_comment.id,
-                    state=issue.comments.model.States.OK,
+                issue = self.model_issue(
+                    project=project, backend_id=key, state=StateMixin.States.OK
                 )
+                self._backend_issue_to_issue(backend_issue, issue)
+                issues.create(issue)
+                imported.append((issue, backend_issue))
+            issues.apply()
+
+            comments = structure_utils.ChangeSet(self.model_comment)
+            for issue, backend_issue in imported:
+                for backend_comment in backend_issue.fields.comment.comments:
+                    comment = self.model_comment(
+                        issue=issue,
+                        created=parse_datetime(backend_comment.created),
+                        backend_id=backend_comment.id,
+                        state=StateMixin.States.OK,
+                    )
+                    comment.clean_message(backend_comment.body)
+                    comments.create(comment)
+            comments.apply()
+
+        synchronize_attachments(
+            [
+                AttachmentSynchronizer(self, issue, backend_issue)
+                for issue, backend_issue in imported
+            ]
+        )
+        return len(backend_issues)
 
     def _import_project(self, project_backend_id, service_project_link, state):
         backend_project = self.get_project(project_backend_id)
@@ -569,6 +594,11 @@ class JiraBackend(ServiceBackend):
         return project
 
     def import_project_batch(self, project):
+        """
+        Import next page of project issues.
+        Progress is stored in action details after each page
+        so that import is resumed from the last imported page.
+        """
         max_results = settings.WALDUR_JIRA.get('ISSUE_IMPORT_LIMIT')
         start_at = project.action_details.get('current_issue', 0)
         self.import_project_issues(
@@ -593,7 +623,7 @@ class JiraBackend(ServiceBackend):
                 * 100
             )
 
-        project.save()
+        project.save(update_fields=['action_details', 'runtime_state'])
         return max_results
 
     def get_backend_comment(self, issue_backend_id, comment_backend_id):
@@ -749,6 +779,30 @@ class JiraBackend(ServiceBackend):
         return result['total']
 
 
+def synchronize_attachments(synchronizers):
+    """
+    Synchronize attachments of several issues.
+    Files of all issues are downloaded concurrently using bounded thread pool.
+    """
+    downloads = {}
+    for index, synchronizer in enumerate(synchronizers):
+        for name, url in synchronizer.get_downloads().items():
+            downloads[(index, name)] = functools.partial(
+                synchronizer.download_file, url
+            )
+
+    files = core_utils.fetch_concurrently(downloads) if downloads else {}
+
+    for index, synchronizer in enumerate(synchronizers):
+        synchronizer.apply(
+            {
+                name: content
+                for (file_index, name), content in files.items()
+                if file_index == index
+            }
+        )
+
+
 class AttachmentSynchronizer:
     def __init__(self, backend, current_issue, backend_issue):
         self.backend = backend
@@ -756,6 +810,36 @@ class AttachmentSynchronizer:
         self.backend_issue = backend_issue
 
     def perform_update(self):
+        synchronize_attachments([self])
+
+    def get_downloads(self):
+        """
+        Return URLs of files which should be downloaded.
+        :return: dict {(kind, attachment_id): url}
+        """
+        downloads = {}
+        for attachment_id in self.new_attachment_ids:
+            backend_attachment = self.get_backend_attachment(attachment_id)
+            downloads[('content', attachment_id)] = backend_attachment.content
+            if self._has_thumbnail(backend_attachment):
+                downloads[('thumbnail', attachment_id)] = backend_attachment.thumbnail
+
+        for attachment_id in self.updated_attachments_ids:
+            backend_attachment = self.get_backend_attachment(attachment_id)
+            downloads[('thumbnail', attachment_id)] = backend_attachment.thumbnail
+        return downloads
+
+    def download_file(self, url):
+        """
+        Download file without raising exception so that other downloads are not interrupted.
+        :return: tuple (file, error)
+        """
+        try:
+            return self._download_file(url), None
+        except (JIRAError, requests.RequestException) as error:
+            return None, error
+
+    def apply(self, files):
         if self.stale_attachment_ids:
             self.backend.model_attachment.objects.filter(
                 backend_id__in=self.stale_attachment_ids
@@ -763,7 +847,10 @@ class AttachmentSynchronizer:
 
         for attachment_id in self.new_attachment_ids:
             self._add_attachment(
-                self.current_issue, self.get_backend_attachment(attachment_id)
+                self.current_issue,
+                self.get_backend_attachment(attachment_id),
+                files.get(('content', attachment_id), (None, None)),
+                files.get(('thumbnail', attachment_id)),
             )
 
         for attachment_id in self.updated_attachments_ids:
@@ -771,6 +858,7 @@ class AttachmentSynchronizer:
                 self.current_issue,
                 self.get_backend_attachment(attachment_id),
                 self.get_current_attachment(attachment_id),
+                files.get(('thumbnail', attachment_id), (None, None)),
             )
 
     def get_current_attachment(self, attachment_id):
@@ -811,7 +899,7 @@ class AttachmentSynchronizer:
 
     @cached_property
     def updated_attachments_ids(self):
-        return filter(self._is_attachment_updated, self.backend_attachments_ids)
+        return list(filter(self._is_attachment_updated, self.backend_attachments_ids))
 
     def _is_attachment_updated(self, attachment_id):
         """
@@ -829,31 +917,38 @@ class AttachmentSynchronizer:
 
         return True
 
+    def _has_thumbnail(self, backend_attachment):
+        attachment = self.backend.model_attachment()
+        return getattr(backend_attachment, 'thumbnail', False) and getattr(
+            attachment, 'thumbnail', False
+        )
+
     def _download_file(self, url):
         """
         Download file from URL using secure JIRA session.
-        :return: byte stream
+        Response is streamed to temporary file in chunks instead of memory.
+        :return: file object
         :raises: requests.RequestException
         """
         session = self.backend.manager._session
-        response = session.get(url)
+        response = session.get(url, stream=True)
         response.raise_for_status()
-        return BytesIO(response.content)
-
-    def _add_attachment(self, issue, backend_attachment):
-        attachment = self.backend.model_attachment(
-            issue=issue, backend_id=backend_attachment.id, state=StateMixin.States.OK
-        )
-        thumbnail = getattr(backend_attachment, 'thumbnail', False) and getattr(
-            attachment, 'thumbnail', False
+        content = tempfile.SpooledTemporaryFile(
+            max_size=settings.WALDUR_JIRA['ATTACHMENT_MEMORY_LIMIT']
         )
+        with response:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                content.write(chunk)
+        content.seek(0)
+        return content
+
+    def _add_attachment(self, issue, backend_attachment, content, thumbnail=None):
+        content, error = content
+        if thumbnail:
+            thumbnail_content, thumbnail_error = thumbnail
+            error = error or thumbnail_error
 
-        try:
-            content = self._download_file(backend_attachment.content)
-            if thumbnail:
-                thumbnail_content = self._download_file(backend_attachment.thumbnail)
-
-        except JIRAError as error:
+        if error:
             logger.error(
                 'Unable to load attachment for issue with backend id {backend_id}. Error: {error}).'.format(
                     backend_id=issue.backend_id, error=error
@@ -861,6 +956,9 @@ class AttachmentSynchronizer:
             )
             return
 
+        attachment = self.backend.model_attachment(
+            issue=issue, backend_id=backend_attachment.id, state=StateMixin.States.OK
+        )
         self.backend._backend_attachment_to_attachment(backend_attachment, attachment)
 
         try:
@@ -872,18 +970,22 @@ class AttachmentSynchronizer:
                 issue.id,
                 backend_attachment.id,
             )
+            return
 
-        attachment.file.save(backend_attachment.filename, content, save=True)
+        with content:
+            attachment.file.save(backend_attachment.filename, content, save=True)
 
         if thumbnail:
-            attachment.thumbnail.save(
-                backend_attachment.filename, thumbnail_content, save=True
-            )
+            with thumbnail_content:
+                attachment.thumbnail.save(
+                    backend_attachment.filename, thumbnail_content, save=True
+                )
 
-    def _update_attachment(self, issue, backend_attachment, current_attachment):
-        try:
-            content = self._download_file(backend_attachment.thumbnail)
-        except JIRAError as error:
+    def _update_attachment(
+        self, issue, backend_attachment, current_attachment, thumbnail
+    ):
+        content, error = thumbnail
+        if error:
             logger.error(
                 'Unable to load attachment thumbnail for issue with backend id {backend_id}. Error: {error}).'.format(
                     backend_id=issue.backend_id, error=error
@@ -891,9 +993,10 @@ class AttachmentSynchronizer:
             )
             return
 
-        current_attachment.thumbnail.save(
-            backend_attachment.filename, content, save=True
-        )
+        with content:
+            current_attachment.thumbnail.save(
+                backend_attachment.filename, content, save=True
+            )
 
 
 class CommentSynchronizer:
@@ -8,6 +8,8 @@ class JiraExtension(WaldurExtension):
             'ISSUE_TEMPLATE': {'RESOURCE_INFO': '\nAffected resource: {resource}\n'},
             'ISSUE': {'resolution_sla_field': 'Time to resolution',},
             'ISSUE_IMPORT_LIMIT': 10,
+            # Attachments larger than this number of bytes are downloaded to disk
+            'ATTACHMENT_MEMORY_LIMIT': 2 ** 20,
         }
 
     @staticmethod
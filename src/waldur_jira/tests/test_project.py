@@ -3,7 +3,7 @@ from unittest import mock
 from ddt import data, ddt
 from rest_framework import status, test
 
-from waldur_jira import executors, models
+from waldur_jira import backend, executors, models
 
 from . import factories, fixtures
 
@@ -207,3 +207,96 @@ class TasksTest(BaseProjectImportTest):
         project.refresh_from_db()
         self.assertEqual(project.state, models.Project.States.OK)
         self.assertEqual(project.runtime_state, 'success')
+
+
+class IssueImportTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.JiraFixture()
+        self.project = self.fixture.jira_project
+        self.backend = self.project.get_backend()
+        mock.patch.object(backend.JiraBackend, 'manager').start()
+        mock.patch.object(
+            backend.JiraBackend,
+            '_backend_issue_to_issue',
+            side_effect=self.backend_issue_to_issue,
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def backend_issue_to_issue(self, backend_issue, issue):
+        issue.type = self.fixture.issue_type
+        issue.priority = self.fixture.priority
+        issue.summary = backend_issue.fields.summary
+
+    def get_backend_issue(self, key, comments=0):
+        return mock.Mock(
+            key=key,
+            fields=mock.Mock(
+                summary='Summary of %s' % key,
+                attachment=[],
+                comment=mock.Mock(
+                    comments=[
+                        mock.Mock(
+                            id='%s-%s' % (key, i),
+                            body='Comment',
+                            created='2020-01-01T00:00:00.000+0000',
+                        )
+                        for i in range(comments)
+                    ]
+                ),
+            ),
+        )
+
+    def test_new_issues_and_comments_are_imported(self):
+        factories.IssueFactory(project=self.project, backend_id='TST-1')
+        self.backend.manager.search_issues.return_value = [
+            self.get_backend_issue('TST-1', comments=1),
+            self.get_backend_issue('TST-2', comments=2),
+            self.get_backend_issue('TST-2', comments=2),
+            self.get_backend_issue('TST-3'),
+        ]
+
+        self.backend.import_project_issues(self.project)
+
+        self.assertEqual(self.project.issues.count(), 3)
+        self.assertEqual(
+            models.Comment.objects.filter(issue__project=self.project).count(), 2
+        )
+        self.assertEqual(
+            models.Issue.objects.get(backend_id='TST-2').comments.count(), 2
+        )
+
+    def test_import_of_page_is_idempotent(self):
+        self.backend.manager.search_issues.return_value = [
+            self.get_backend_issue('TST-1', comments=1),
+        ]
+
+        self.backend.import_project_issues(self.project)
+        self.backend.import_project_issues(self.project)
+
+        self.assertEqual(self.project.issues.count(), 1)
+        self.assertEqual(
+            models.Comment.objects.filter(issue__project=self.project).count(), 1
+        )
+
+    def test_attachment_is_downloaded_in_chunks(self):
+        backend_attachment = mock.Mock(
+            id='1', filename='file.txt', content='http://jira/file.txt'
+        )
+        del backend_attachment.thumbnail
+        backend_issue = self.get_backend_issue('TST-1')
+        backend_issue.fields.attachment = [backend_attachment]
+        self.backend.manager.search_issues.return_value = [backend_issue]
+        self.backend.manager._session.get.return_value.iter_content.return_value = [
+            b'first ',
+            b'second',
+        ]
+
+        self.backend.import_project_issues(self.project)
+
+        self.backend.manager._session.get.assert_called_once_with(
+            'http://jira/file.txt', stream=True
+        )
+        attachment = models.Attachment.objects.get(issue__backend_id='TST-1')
+        self.assertEqual(attachment.file.read(), b'first second')
@@ -1,3 +1,4 @@
+from django.db.models import Sum
 from django.utils.translation import ugettext_lazy as _
 from rest_framework import exceptions, response, status, views
 
@@ -62,8 +63,11 @@ class TotalCustomerCostView(views.APIView):
         invoices = invoices_models.Invoice.objects.filter(customer__in=customers)
         invoices = invoices.filter(year=year, month=month)
 
-        total = sum(invoice.total for invoice in invoices)
-        price = sum(invoice.price for invoice in invoices)
+        totals = invoices.aggregate(
+            total=Sum('cached_total'), price=Sum('cached_price')
+        )
+        total = totals['total'] or 0
+        price = totals['price'] or 0
         return response.Response(
             {'total': total, 'price': price}, status=status.HTTP_200_OK
         )
@@ -4,9 +4,10 @@ from urllib.parse import urlencode
 
 from dateutil import parser
 from django.utils.timezone import get_current_timezone
-from rest_framework.test import APIRequestFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
 
 from waldur_core.core.views import RefreshTokenMixin
+from waldur_core.logging.middleware import set_current_user
 
 
 def quantize_price(value):
@@ -30,24 +31,44 @@ def get_headers(user):
     )
 
 
-def get_request(view, user, **extra):
+def build_request(method, user, path='/', data=None, use_token=True):
+    """
+    Build internal API request on behalf of the user.
+
+    If use_token is True, request is authenticated using user token as regular
+    API request. Otherwise user is authenticated in-process, so that token
+    is neither refreshed nor looked up in database. In this case user is
+    stored in event context directly, because token authentication is skipped.
+    """
     factory = APIRequestFactory()
-    request = factory.get('/', **get_headers(user))
+    if use_token:
+        headers = get_headers(user)
+    else:
+        headers = dict(content_type='application/json', SERVER_NAME='localhost')
+    if data is not None:
+        data = json.dumps(data)
+    request = getattr(factory, method)(path, data=data, **headers)
+    if not use_token:
+        force_authenticate(request, user=user)
+        set_current_user(user)
+    return request
+
+
+def get_request(view, user, use_token=True, **extra):
+    request = build_request('get', user, use_token=use_token)
     return view(request, **extra)
 
 
-def create_request(view, user, post_data, **kwargs):
-    factory = APIRequestFactory()
-    request = factory.post('/', data=json.dumps(post_data), **get_headers(user))
+def create_request(view, user, post_data, use_token=True, **kwargs):
+    request = build_request('post', user, data=post_data, use_token=use_token)
     return view(request, **kwargs)
 
 
-def delete_request(view, user, query_params='', **extra):
-    factory = APIRequestFactory()
+def delete_request(view, user, query_params='', use_token=True, **extra):
     path = ''
     if query_params:
         path = '?' + urlencode(query_params)
-    request = factory.delete(path, **get_headers(user))
+    request = build_request('delete', user, path=path, use_token=use_token)
     return view(request, **extra)
 
 
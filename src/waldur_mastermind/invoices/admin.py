@@ -111,7 +111,7 @@ class InvoiceAdmin(
         return file_response
 
     def pdf_file(self, obj):
-        if not obj.file:
+        if not obj.has_file():
             return ''
 
         return format_html('<a href="./pdf_file">download</a>')
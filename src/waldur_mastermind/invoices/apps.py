@@ -55,6 +55,24 @@ class InvoiceConfig(AppConfig):
             dispatch_uid='waldur_mastermind.invoices.update_current_cost_when_invoice_item_is_deleted',
         )
 
+        signals.post_save.connect(
+            handlers.update_cached_price_when_invoice_item_is_updated,
+            sender=models.InvoiceItem,
+            dispatch_uid='waldur_mastermind.invoices.update_cached_price_when_invoice_item_is_updated',
+        )
+
+        signals.post_delete.connect(
+            handlers.update_cached_price_when_invoice_item_is_deleted,
+            sender=models.InvoiceItem,
+            dispatch_uid='waldur_mastermind.invoices.update_cached_price_when_invoice_item_is_deleted',
+        )
+
+        signals.post_save.connect(
+            handlers.update_cached_price_when_invoice_is_saved,
+            sender=models.Invoice,
+            dispatch_uid='waldur_mastermind.invoices.update_cached_price_when_invoice_is_saved',
+        )
+
         signals.post_save.connect(
             handlers.update_invoice_item_on_project_name_update,
             sender=structure_models.Project,
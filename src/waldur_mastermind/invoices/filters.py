@@ -14,7 +14,21 @@ class InvoiceFilter(django_filters.FilterSet):
     state = django_filters.MultipleChoiceFilter(choices=models.Invoice.States.CHOICES)
     start_date = django_filters.DateFilter(field_name='created', lookup_expr='gt')
     end_date = django_filters.DateFilter(field_name='created', lookup_expr='lt')
-    o = django_filters.OrderingFilter(fields=('created', 'year', 'month'))
+    min_total = django_filters.NumberFilter(
+        field_name='cached_total', lookup_expr='gte'
+    )
+    max_total = django_filters.NumberFilter(
+        field_name='cached_total', lookup_expr='lte'
+    )
+    o = django_filters.OrderingFilter(
+        fields=(
+            'created',
+            'year',
+            'month',
+            ('cached_price', 'price'),
+            ('cached_total', 'total'),
+        )
+    )
 
     class Meta:
         model = models.Invoice
@@ -108,12 +108,15 @@ def emit_invoice_created_event(sender, instance, created=False, **kwargs):
 def prevent_deletion_of_customer_with_invoice(sender, instance, user, **kwargs):
     if user.is_staff:
         return
-    PENDING = models.Invoice.States.PENDING
-    for invoice in models.Invoice.objects.filter(customer=instance):
-        if invoice.state != PENDING or invoice.price > 0:
-            raise ValidationError(
-                _('Can\'t delete organization with invoice %s.') % invoice
-            )
+    invoice = (
+        models.Invoice.objects.filter(customer=instance)
+        .exclude(state=models.Invoice.States.PENDING, cached_price__lte=0)
+        .first()
+    )
+    if invoice:
+        raise ValidationError(
+            _('Can\'t delete organization with invoice %s.') % invoice
+        )
 
 
 def update_current_cost_when_invoice_item_is_updated(
@@ -140,6 +143,44 @@ def update_current_cost_when_invoice_item_is_deleted(sender, instance, **kwargs)
     transaction.on_commit(update_invoice)
 
 
+def update_cached_price_when_invoice_item_is_updated(
+    sender, instance, created=False, **kwargs
+):
+    invoice_item = instance
+    if created or set(invoice_item.tracker.changed()) & set(
+        models.InvoiceItem.PRICE_FIELDS
+    ):
+        models.update_invoices_cached_price(
+            models.Invoice.objects.filter(pk=invoice_item.invoice_id)
+        )
+
+
+def update_cached_price_when_invoice_item_is_deleted(sender, instance, **kwargs):
+    models.update_invoices_cached_price(
+        models.Invoice.objects.filter(pk=instance.invoice_id)
+    )
+
+
+def update_cached_price_when_invoice_is_saved(
+    sender, instance, created=False, update_fields=None, **kwargs
+):
+    """
+    Total depends on tax percent. Also full save of stale invoice instance
+    overwrites cached values, therefore they are computed again.
+    """
+    if created:
+        return
+
+    if update_fields and not set(update_fields) & {
+        'tax_percent',
+        'cached_price',
+        'cached_total',
+    }:
+        return
+
+    instance.update_cached_price()
+
+
 @transaction.atomic()
 def adjust_openstack_items_for_downtime(downtime):
     scopes = []
@@ -238,3 +279,6 @@ def projects_customer_has_been_changed(
         invoice.generic_items.filter(project=project).delete()
     else:
         invoice.generic_items.filter(project=project).update(invoice=new_invoice)
+        models.update_invoices_cached_price(
+            models.Invoice.objects.filter(pk__in=[invoice.pk, new_invoice.pk])
+        )
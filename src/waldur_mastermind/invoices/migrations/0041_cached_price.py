@@ -0,0 +1,137 @@
+import decimal
+from calendar import monthrange
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+PRICE_FIELDS = ('unit', 'unit_price', 'quantity', 'start', 'end')
+
+BATCH_SIZE = 1000
+
+
+# Price calculation rules are copied from InvoiceItem model
+# so that migration does not depend on the current model class.
+
+
+def quantize_price(value):
+    return value.quantize(decimal.Decimal('0.01'), rounding=decimal.ROUND_UP)
+
+
+def get_full_periods(start, end, period_seconds):
+    full_periods, extra_seconds = divmod((end - start).total_seconds(), period_seconds)
+    if extra_seconds > 0:
+        full_periods += 1
+    return int(full_periods)
+
+
+def get_factor(item):
+    start, end = item.start, item.end
+    month_days = monthrange(start.year, start.month)[1]
+
+    if item.unit == 'quantity':
+        return item.quantity
+    elif item.unit == 'hour':
+        return get_full_periods(start, end, 60 * 60)
+    elif item.unit == 'day':
+        return get_full_periods(start, end, 24 * 60 * 60)
+    elif item.unit == 'half_month':
+        if (start.day == 1 and end.day == 15) or (
+            start.day == 16 and end.day == month_days
+        ):
+            return 1
+        elif start.day == 1 and end.day == month_days:
+            return 2
+        elif start.day == 1 and end.day > 15:
+            return quantize_price(1 + (end.day - 15) / decimal.Decimal(month_days / 2))
+        elif start.day < 16 and end.day == month_days:
+            return quantize_price(
+                1 + (16 - start.day) / decimal.Decimal(month_days / 2)
+            )
+        else:
+            return quantize_price(
+                (end.day - start.day + 1) / decimal.Decimal(month_days / 2.0)
+            )
+    # By default PER_MONTH
+    else:
+        if start.day == 1 and end.day == month_days:
+            return 1
+
+        use_days = (end - start).days + 1
+        return quantize_price(decimal.Decimal(use_days) / month_days)
+
+
+def get_price(item):
+    return quantize_price(item.unit_price * decimal.Decimal(get_factor(item)))
+
+
+def fill_cached_price(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    InvoiceItem = apps.get_model('invoices', 'InvoiceItem')
+
+    items = []
+    for item in InvoiceItem.objects.only(*PRICE_FIELDS).iterator():
+        item.cached_price = get_price(item)
+        items.append(item)
+        if len(items) == BATCH_SIZE:
+            InvoiceItem.objects.bulk_update(items, ['cached_price'])
+            items = []
+    InvoiceItem.objects.bulk_update(items, ['cached_price'])
+
+    items_price = (
+        InvoiceItem.objects.filter(invoice=OuterRef('pk'))
+        .order_by()
+        .values('invoice')
+        .annotate(price=Sum('cached_price'))
+        .values('price')
+    )
+    price = Coalesce(
+        Subquery(items_price, output_field=models.DecimalField()), Value(0)
+    )
+    Invoice.objects.update(
+        cached_price=price, cached_total=price + price * F('tax_percent') / 100,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0040_invoice_created'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='cached_price',
+            field=models.DecimalField(
+                decimal_places=7,
+                default=0,
+                editable=False,
+                help_text='Cached value for price.',
+                max_digits=22,
+            ),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='cached_total',
+            field=models.DecimalField(
+                decimal_places=7,
+                default=0,
+                editable=False,
+                help_text='Cached value for total.',
+                max_digits=22,
+            ),
+        ),
+        migrations.AddField(
+            model_name='invoiceitem',
+            name='cached_price',
+            field=models.DecimalField(
+                decimal_places=7,
+                default=0,
+                editable=False,
+                help_text='Cached value for price.',
+                max_digits=22,
+            ),
+        ),
+        migrations.RunPython(fill_cached_price, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+import base64
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def move_files_to_storage(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    invoices = Invoice.objects.exclude(_file='').only('id', 'uuid', '_file')
+    for invoice in invoices.iterator():
+        content = base64.b64decode(invoice._file)
+        invoice.file.save(
+            'invoice_{}.pdf'.format(invoice.uuid), ContentFile(content), save=False
+        )
+        invoice.save(update_fields=['file'])
+
+
+def move_files_to_database(apps, schema_editor):
+    Invoice = apps.get_model('invoices', 'Invoice')
+    invoices = Invoice.objects.exclude(file='').only('id', 'file')
+    for invoice in invoices.iterator():
+        with invoice.file.open('rb') as pdf_file:
+            invoice._file = str(base64.b64encode(pdf_file.read()), 'utf-8')
+        invoice.save(update_fields=['_file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('invoices', '0041_cached_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='file',
+            field=models.FileField(blank=True, editable=False, upload_to='invoices'),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='file_hash',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text='Hash of rendered content of PDF file.',
+                max_length=64,
+            ),
+        ),
+        migrations.RunPython(move_files_to_storage, move_files_to_database),
+        migrations.RemoveField(model_name='invoice', name='_file',),
+    ]
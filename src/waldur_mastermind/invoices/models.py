@@ -1,10 +1,8 @@
-import base64
 import datetime
 import decimal
 import logging
 from calendar import monthrange
 from datetime import timedelta
-from io import BytesIO
 
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
@@ -13,7 +11,8 @@ from django.contrib.postgres.fields import JSONField
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-from django.db.models import Q
+from django.db.models import F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
@@ -85,6 +84,20 @@ class Invoice(core_models.UuidMixin, models.Model):
         help_text=_('Cached value for current cost.'),
         editable=False,
     )
+    cached_price = models.DecimalField(
+        default=0,
+        max_digits=22,
+        decimal_places=7,
+        help_text=_('Cached value for price.'),
+        editable=False,
+    )
+    cached_total = models.DecimalField(
+        default=0,
+        max_digits=22,
+        decimal_places=7,
+        help_text=_('Cached value for total.'),
+        editable=False,
+    )
     tax_percent = models.DecimalField(
         default=0,
         max_digits=4,
@@ -96,7 +109,13 @@ class Invoice(core_models.UuidMixin, models.Model):
         blank=True,
         help_text=_('Date then invoice moved from state pending to created.'),
     )
-    _file = models.TextField(blank=True, editable=False)
+    file = models.FileField(upload_to='invoices', blank=True, editable=False)
+    file_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text=_('Hash of rendered content of PDF file.'),
+    )
 
     tracker = FieldTracker()
 
@@ -107,6 +126,10 @@ class Invoice(core_models.UuidMixin, models.Model):
             self.current_cost = total_current
             self.save(update_fields=['current_cost'])
 
+    def update_cached_price(self):
+        update_invoices_cached_price(Invoice.objects.filter(pk=self.pk))
+        self.refresh_from_db(fields=['cached_price', 'cached_total'])
+
     @property
     def tax(self):
         return self.price * self.tax_percent / 100
@@ -117,7 +140,12 @@ class Invoice(core_models.UuidMixin, models.Model):
 
     @property
     def price(self):
-        return quantize_price(decimal.Decimal(sum((item.price for item in self.items))))
+        price = self.items.aggregate(price=Sum('cached_price'))['price']
+        return quantize_price(decimal.Decimal(price or 0))
+
+    @property
+    def cached_tax(self):
+        return self.cached_total - self.cached_price
 
     @property
     def tax_current(self):
@@ -163,20 +191,8 @@ class Invoice(core_models.UuidMixin, models.Model):
         self.invoice_date = timezone.now().date()
         self.save(update_fields=['state', 'invoice_date'])
 
-    @property
-    def file(self):
-        if not self._file:
-            return
-
-        content = base64.b64decode(self._file)
-        return BytesIO(content)
-
-    @file.setter
-    def file(self, value):
-        self._file = value
-
     def has_file(self):
-        return bool(self._file)
+        return bool(self.file)
 
     def get_filename(self):
         return 'invoice_{}.pdf'.format(self.uuid)
@@ -199,6 +215,13 @@ class InvoiceItem(common_mixins.ProductCodeMixin, common_mixins.UnitPriceMixin):
     )
     object_id = models.PositiveIntegerField(null=True)
     quantity = models.PositiveIntegerField(default=0)
+    cached_price = models.DecimalField(
+        default=0,
+        max_digits=22,
+        decimal_places=7,
+        help_text=_('Cached value for price.'),
+        editable=False,
+    )
 
     scope = GenericForeignKey('content_type', 'object_id')
     name = models.TextField(default='')
@@ -225,6 +248,18 @@ class InvoiceItem(common_mixins.ProductCodeMixin, common_mixins.UnitPriceMixin):
     objects = managers.InvoiceItemManager()
     tracker = FieldTracker()
 
+    # Fields which are used for price calculation
+    PRICE_FIELDS = ('unit', 'unit_price', 'quantity', 'start', 'end')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.cached_price = self.price
+        elif set(update_fields) & set(self.PRICE_FIELDS):
+            self.cached_price = self.price
+            kwargs['update_fields'] = list(update_fields) + ['cached_price']
+        return super(InvoiceItem, self).save(*args, **kwargs)
+
     @property
     def tax(self):
         return self.price * self.invoice.tax_percent / 100
@@ -341,6 +376,26 @@ class InvoiceItem(common_mixins.ProductCodeMixin, common_mixins.UnitPriceMixin):
         return InvoiceItem.objects.create(**params)
 
 
+def update_invoices_cached_price(invoices):
+    """
+    Update cached price and total of invoices using single UPDATE statement.
+    Price of invoice is computed as sum of cached prices of its items.
+    """
+    items_price = (
+        InvoiceItem.objects.filter(invoice=OuterRef('pk'))
+        .order_by()
+        .values('invoice')
+        .annotate(price=Sum('cached_price'))
+        .values('price')
+    )
+    price = Coalesce(
+        Subquery(items_price, output_field=models.DecimalField()), Value(0)
+    )
+    invoices.update(
+        cached_price=price, cached_total=price + price * F('tax_percent') / 100,
+    )
+
+
 def get_default_downtime_start():
     return timezone.now() - settings.WALDUR_INVOICES['DOWNTIME_DURATION_MINIMAL']
 
@@ -77,9 +77,13 @@ class GenericItemSerializer(InvoiceItemSerializer):
 class InvoiceSerializer(
     core_serializers.RestrictedSerializerMixin, serializers.HyperlinkedModelSerializer
 ):
-    price = serializers.DecimalField(max_digits=15, decimal_places=7)
-    tax = serializers.DecimalField(max_digits=15, decimal_places=7)
-    total = serializers.DecimalField(max_digits=15, decimal_places=7)
+    price = serializers.DecimalField(
+        source='cached_price', max_digits=15, decimal_places=7
+    )
+    tax = serializers.DecimalField(source='cached_tax', max_digits=15, decimal_places=7)
+    total = serializers.DecimalField(
+        source='cached_total', max_digits=15, decimal_places=7
+    )
     items = serializers.SerializerMethodField()
     issuer_details = serializers.SerializerMethodField()
     customer_details = serializers.SerializerMethodField()
@@ -191,9 +195,9 @@ class InvoiceItemReportSerializer(serializers.ModelSerializer):
             'invoice_total',
         )
         decimal_fields_extra_kwargs = {
-            'invoice_price': {'source': 'invoice.price',},
-            'invoice_tax': {'source': 'invoice.tax',},
-            'invoice_total': {'source': 'invoice.total',},
+            'invoice_price': {'source': 'invoice.cached_price',},
+            'invoice_tax': {'source': 'invoice.cached_tax',},
+            'invoice_total': {'source': 'invoice.cached_total',},
         }
 
     def build_field(self, field_name, info, model_class, nested_depth):
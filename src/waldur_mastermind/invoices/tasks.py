@@ -1,12 +1,11 @@
-import base64
 import logging
 from csv import DictWriter
 from io import StringIO
 
 import pdfkit
-from celery import chain, shared_task
+from celery import chain, group, shared_task
 from django.conf import settings
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django.template.loader import render_to_string
 from django.utils import timezone
 
@@ -18,6 +17,9 @@ from . import models, registrators, serializers, utils
 
 logger = logging.getLogger(__name__)
 
+# Number of invoices rendered to PDF by single task
+PDF_CHUNK_SIZE = 50
+
 
 @shared_task(name='invoices.create_monthly_invoices')
 def create_monthly_invoices():
@@ -85,13 +87,14 @@ def send_invoice_notification(invoice_uuid):
     attachment = None
     content_type = None
 
-    if invoice._file:
+    if invoice.file:
         filename = '%s_%s_%s.pdf' % (
             settings.WALDUR_CORE['SITE_NAME'].replace(' ', '_'),
             invoice.year,
             invoice.month,
         )
-        attachment = base64.b64decode(invoice._file)
+        with invoice.file.open('rb') as pdf_file:
+            attachment = pdf_file.read()
         content_type = 'application/pdf'
 
     logger.debug(
@@ -130,7 +133,12 @@ def send_invoice_report():
         )
 
     # Report should not include customers with 0 invoice items.
-    invoices = [invoice for invoice in invoices if invoice.items.count() > 0]
+    invoices = invoices.annotate(
+        has_items=Exists(models.InvoiceItem.objects.filter(invoice=OuterRef('pk')))
+    ).filter(has_items=True)
+    invoices = list(
+        invoices.select_related('customer').prefetch_related('generic_items')
+    )
     text_message = format_invoice_csv(invoices)
 
     # Please note that email body could be empty if there are no valid invoices
@@ -194,11 +202,20 @@ def create_invoice_pdf(serialized_invoice):
 
 
 @shared_task
-def create_pdf_for_all_invoices():
-    for invoice in models.Invoice.objects.all():
+def create_pdf_for_invoices(invoice_ids):
+    for invoice in models.Invoice.objects.filter(id__in=invoice_ids):
         utils.create_invoice_pdf(invoice)
 
 
+@shared_task
+def create_pdf_for_all_invoices():
+    invoice_ids = list(models.Invoice.objects.values_list('id', flat=True))
+    group(
+        create_pdf_for_invoices.si(chunk)
+        for chunk in core_utils.chunks(invoice_ids, PDF_CHUNK_SIZE)
+    ).apply_async()
+
+
 @shared_task
 def create_pdf_for_new_invoices():
     date = timezone.now()
@@ -51,6 +51,40 @@ class InvoiceRetrieveTest(test.APITransactionTestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
 
+class InvoiceTotalFilterTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = fixtures.InvoiceFixture()
+        self.invoices = []
+        for quantity in (3, 1, 2):
+            invoice = factories.InvoiceFactory(
+                customer=self.fixture.customer, month=quantity
+            )
+            factories.InvoiceItemFactory(
+                invoice=invoice,
+                unit=models.InvoiceItem.Units.QUANTITY,
+                unit_price=10,
+                quantity=quantity,
+            )
+            self.invoices.append(invoice)
+
+    def list_invoices(self, **query):
+        self.client.force_authenticate(self.fixture.staff)
+        response = self.client.get(factories.InvoiceFactory.get_list_url(), query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_invoices_are_ordered_by_total(self):
+        data = self.list_invoices(o='total', field=['total'])
+        self.assertEqual(
+            [Decimal(invoice['total']) for invoice in data], [10, 20, 30],
+        )
+
+    def test_invoices_are_filtered_by_total(self):
+        data = self.list_invoices(min_total=15, max_total=25)
+        self.assertEqual(len(data), 1)
+        self.assertEqual(Decimal(data[0]['price']), 20)
+
+
 @ddt
 class InvoiceSendNotificationTest(test.APITransactionTestCase):
     def setUp(self):
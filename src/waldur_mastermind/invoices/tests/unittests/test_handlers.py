@@ -246,6 +246,58 @@ class UpdateInvoiceCurrentCostTest(TransactionTestCase):
         self.assertEqual(0, self.invoice.current_cost)
 
 
+class UpdateInvoiceCachedPriceTest(TransactionTestCase):
+    def setUp(self):
+        super(UpdateInvoiceCachedPriceTest, self).setUp()
+        self.project = structure_factories.ProjectFactory()
+        self.invoice = factories.InvoiceFactory(customer=self.project.customer)
+
+    def create_invoice_item(self):
+        return factories.InvoiceItemFactory(
+            invoice=self.invoice,
+            project=self.project,
+            unit_price=100,
+            quantity=1,
+            unit=models.InvoiceItem.Units.QUANTITY,
+        )
+
+    def test_when_invoice_item_is_created_cached_price_is_updated(self):
+        self.create_invoice_item()
+        self.invoice.refresh_from_db()
+        self.assertEqual(100, self.invoice.cached_price)
+        self.assertEqual(100, self.invoice.cached_total)
+
+    def test_when_invoice_item_is_updated_cached_price_is_updated(self):
+        invoice_item = self.create_invoice_item()
+
+        invoice_item.quantity = 2
+        invoice_item.save(update_fields=['quantity'])
+
+        invoice_item.refresh_from_db()
+        self.assertEqual(200, invoice_item.cached_price)
+        self.invoice.refresh_from_db()
+        self.assertEqual(200, self.invoice.cached_price)
+
+    def test_when_invoice_item_is_deleted_cached_price_is_updated(self):
+        invoice_item = self.create_invoice_item()
+        invoice_item.delete()
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(0, self.invoice.cached_price)
+        self.assertEqual(0, self.invoice.cached_total)
+
+    def test_when_tax_percent_is_updated_cached_total_is_updated(self):
+        self.create_invoice_item()
+
+        self.invoice.tax_percent = 20
+        self.invoice.save()
+
+        self.invoice.refresh_from_db()
+        self.assertEqual(100, self.invoice.cached_price)
+        self.assertEqual(120, self.invoice.cached_total)
+        self.assertEqual(self.invoice.total, self.invoice.cached_total)
+
+
 @override_plugin_settings(BILLING_ENABLED=True)
 class ChangeProjectsCustomerTest(TransactionTestCase):
     def setUp(self):
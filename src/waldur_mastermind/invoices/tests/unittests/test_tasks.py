@@ -120,3 +120,38 @@ class NotificationTest(TestCase):
         tasks.send_invoice_notification(self.invoice.uuid)
         self.assertEqual(len(mail.outbox), 1)
         self.assertEqual(len(mail.outbox[0].attachments), 1)
+
+
+@override_settings(task_always_eager=True)
+class CreatePDFForAllInvoicesTest(TestCase):
+    def setUp(self):
+        self.invoices = factories.InvoiceFactory.create_batch(3)
+        self.patcher = mock.patch('waldur_mastermind.invoices.utils.pdfkit')
+        self.mock_pdfkit = self.patcher.start()
+        self.mock_pdfkit.from_string.return_value = b'pdf content'
+
+    def tearDown(self):
+        super(CreatePDFForAllInvoicesTest, self).tearDown()
+        mock.patch.stopall()
+
+    @mock.patch('waldur_mastermind.invoices.tasks.PDF_CHUNK_SIZE', 2)
+    def test_pdf_is_created_for_all_invoices(self):
+        tasks.create_pdf_for_all_invoices()
+        for invoice in self.invoices:
+            invoice.refresh_from_db()
+            self.assertTrue(invoice.has_file())
+            with invoice.file.open('rb') as pdf_file:
+                self.assertEqual(pdf_file.read(), b'pdf content')
+
+    def test_pdf_is_not_rendered_again_if_invoice_has_not_been_changed(self):
+        tasks.create_pdf_for_all_invoices()
+        tasks.create_pdf_for_all_invoices()
+        self.assertEqual(self.mock_pdfkit.from_string.call_count, len(self.invoices))
+
+    def test_pdf_is_rendered_again_if_invoice_has_been_changed(self):
+        tasks.create_pdf_for_all_invoices()
+        factories.InvoiceItemFactory(invoice=self.invoices[0], unit_price=10)
+        tasks.create_pdf_for_all_invoices()
+        self.assertEqual(
+            self.mock_pdfkit.from_string.call_count, len(self.invoices) + 1
+        )
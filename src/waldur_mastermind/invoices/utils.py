@@ -1,5 +1,6 @@
 import base64
 import datetime
+import hashlib
 import logging
 import re
 from calendar import monthrange
@@ -7,6 +8,7 @@ from decimal import Decimal
 
 import pdfkit
 from django.conf import settings
+from django.core.files.base import ContentFile
 from django.db.models import Sum
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -115,9 +117,17 @@ def create_invoice_pdf(invoice):
         items=all_items,
     )
     html = render_to_string('invoices/invoice.html', context)
+    file_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+    if invoice.file and invoice.file_hash == file_hash:
+        # PDF is not rendered again if content of invoice has not been changed
+        return
+
     pdf = pdfkit.from_string(html, False)
-    invoice.file = str(base64.b64encode(pdf), 'utf-8')
-    invoice.save()
+    if invoice.file:
+        invoice.file.delete(save=False)
+    invoice.file.save(invoice.get_filename(), ContentFile(pdf), save=False)
+    invoice.file_hash = file_hash
+    invoice.save(update_fields=['file', 'file_hash'])
 
 
 def get_price_per_day(price, unit):
@@ -220,14 +220,14 @@ class InvoiceViewSet(core_views.ReadOnlyActionsViewSet):
             key = f'{current_month.year}-{current_month.month}'
             row = customer_periods[key] = {}
             subtotal = 0
-            for invoice in invoices.filter(customer_id__in=majors):
-                value = is_accounting_mode and invoice.price or invoice.total
+            field = is_accounting_mode and 'cached_price' or 'cached_total'
+            for customer_uuid, value in invoices.filter(
+                customer_id__in=majors
+            ).values_list('customer__uuid', field):
                 subtotal += value
-                row[invoice.customer.uuid.hex] = value
-            other_periods[key] = sum(
-                is_accounting_mode and invoice.price or invoice.total
-                for invoice in invoices.filter(customer_id__in=minors)
-            )
+                row[customer_uuid.hex] = value
+            others = invoices.filter(customer_id__in=minors).aggregate(value=Sum(field))
+            other_periods[key] = others['value'] or 0
             total_periods[key] = subtotal + other_periods[key]
             current_month += relativedelta(months=1)
 
@@ -29,6 +29,9 @@ class MarketplaceExtension(WaldurExtension):
             'price: {{component.price|floatformat }};'
             '{% endfor %}',
             'OFFERING_LINK_TEMPLATE': 'https://www.example.com/#/marketplace-offering-public/{offering_uuid}/',
+            # Maximum number of order items of the same offering processed concurrently
+            'ORDER_ITEM_OFFERING_CONCURRENCY': 10,
+            'ORDER_ITEM_SLOT_TIMEOUT': 60 * 60,
         }
 
     @staticmethod
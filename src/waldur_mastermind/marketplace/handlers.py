@@ -79,17 +79,7 @@ def complete_order_when_all_items_are_done(sender, instance, created=False, **kw
     if instance.order.state != models.Order.States.EXECUTING:
         return
 
-    order = instance.order
-    # check if there are any non-finished OrderItems left and finish order if none is found
-    if (
-        models.OrderItem.objects.filter(order=order)
-        .exclude(state__in=models.OrderItem.States.TERMINAL_STATES)
-        .exists()
-    ):
-        return
-
-    order.complete()
-    order.save(update_fields=['state'])
+    utils.complete_order_if_all_items_are_done(instance.order)
 
 
 def update_category_quota_when_offering_is_created(
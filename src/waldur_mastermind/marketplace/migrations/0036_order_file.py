@@ -0,0 +1,55 @@
+import base64
+
+from django.core.files.base import ContentFile
+from django.db import migrations, models
+
+
+def move_files_to_storage(apps, schema_editor):
+    Order = apps.get_model('marketplace', 'Order')
+    orders = Order.objects.exclude(_file='').only('id', 'uuid', '_file')
+    for order in orders.iterator():
+        content = base64.b64decode(order._file)
+        order.file.save(
+            'marketplace_order_{}.pdf'.format(order.uuid),
+            ContentFile(content),
+            save=False,
+        )
+        order.save(update_fields=['file'])
+
+
+def move_files_to_database(apps, schema_editor):
+    Order = apps.get_model('marketplace', 'Order')
+    orders = Order.objects.exclude(file='').only('id', 'file')
+    for order in orders.iterator():
+        with order.file.open('rb') as pdf_file:
+            order._file = str(base64.b64encode(pdf_file.read()), 'utf-8')
+        order.save(update_fields=['_file'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0035_offeringpermission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='file',
+            field=models.FileField(
+                blank=True, editable=False, upload_to='marketplace_orders'
+            ),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='file_hash',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                help_text='Hash of rendered content of PDF file.',
+                max_length=64,
+            ),
+        ),
+        migrations.RunPython(move_files_to_storage, move_files_to_database),
+        migrations.RemoveField(model_name='order', name='_file',),
+    ]
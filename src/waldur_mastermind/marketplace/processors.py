@@ -57,6 +57,11 @@ def copy_attributes(fields, order_item):
 
 
 class BaseOrderItemProcessor:
+    # If plugin does not provide service function, internal API request is issued
+    # to plugin view in-process and user is authenticated directly.
+    # Set it to True in order to authenticate internal API request with user token.
+    use_token = False
+
     def __init__(self, order_item):
         self.order_item = order_item
 
@@ -113,10 +118,11 @@ class CreateResourceProcessor(AbstractCreateResourceProcessor):
 
     Order item processing flow looks as following:
     1) Convert order item to HTTP POST request data expected by DRF serializer.
-    2) Issue internal API request to DRF viewset.
-    3) Extract Django model for created resource from HTTP response.
-    4) Create marketplace resource object from order item and plugin resource.
-    5) Store link from order item to the resource.
+    2) Create plugin resource using plugin service function. If plugin
+       does not provide it, issue internal API request to DRF viewset and
+       extract Django model for created resource from HTTP response.
+    3) Create marketplace resource object from order item and plugin resource.
+    4) Store link from order item to the resource.
 
     Therefore this class implements template method design pattern.
     """
@@ -129,9 +135,18 @@ class CreateResourceProcessor(AbstractCreateResourceProcessor):
         serializer.is_valid(raise_exception=True)
 
     def send_request(self, user):
-        post_data = self.get_post_data()
+        return self.create_resource(user, self.get_post_data())
+
+    def create_resource(self, user, post_data):
+        """
+        This method creates plugin resource on behalf of the user and returns it.
+        Plugin should override it in order to call its service function directly.
+        Otherwise internal API request is issued to DRF viewset.
+        """
         view = self.get_viewset().as_view({'post': 'create'})
-        response = common_utils.create_request(view, user, post_data)
+        response = common_utils.create_request(
+            view, user, post_data, use_token=self.use_token
+        )
         if response.status_code != status.HTTP_201_CREATED:
             raise serializers.ValidationError(response.data)
 
@@ -243,9 +258,18 @@ class AbstractUpdateResourceProcessor(BaseOrderItemProcessor):
 
 class UpdateResourceProcessor(AbstractUpdateResourceProcessor):
     def send_request(self, user):
+        self.update_resource(user, self.get_resource(), self.get_post_data())
+
+    def update_resource(self, user, resource, payload):
+        """
+        This method updates plugin resource on behalf of the user.
+        Plugin should override it in order to call its service function directly.
+        Otherwise internal API request is issued to DRF view.
+        """
         view = self.get_view()
-        payload = self.get_post_data()
-        response = common_utils.create_request(view, user, payload)
+        response = common_utils.create_request(
+            view, user, payload, use_token=self.use_token
+        )
         if response.status_code != status.HTTP_202_ACCEPTED:
             raise serializers.ValidationError(response.data)
 
@@ -310,10 +334,23 @@ class DeleteResourceProcessor(AbstractDeleteResourceProcessor):
     viewset = NotImplementedError
 
     def send_request(self, user, resource):
+        return self.delete_resource(user, resource)
+
+    def delete_resource(self, user, resource):
+        """
+        This method deletes plugin resource on behalf of the user.
+        It returns True if resource has been deleted and False if deletion has been scheduled.
+        Plugin should override it in order to call its service function directly.
+        Otherwise internal API request is issued to DRF viewset.
+        """
         view = self.get_viewset().as_view({'delete': 'destroy'})
         delete_attributes = self.order_item.attributes
         response = common_utils.delete_request(
-            view, user, uuid=resource.uuid.hex, query_params=delete_attributes
+            view,
+            user,
+            uuid=resource.uuid.hex,
+            query_params=delete_attributes,
+            use_token=self.use_token,
         )
         if response.status_code not in (
             status.HTTP_204_NO_CONTENT,
@@ -1,6 +1,6 @@
 import logging
 
-from celery import shared_task
+from celery import chord, group, shared_task
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
@@ -12,12 +12,14 @@ from waldur_core.core import utils as core_utils
 from waldur_core.structure import models as structure_models
 from waldur_mastermind.common.utils import create_request
 from waldur_mastermind.invoices import utils as invoice_utils
-from waldur_mastermind.marketplace.utils import process_order_item
 
 from . import exceptions, models, utils, views
 
 logger = logging.getLogger(__name__)
 
+# Number of orders rendered to PDF by single task
+PDF_CHUNK_SIZE = 50
+
 
 def approve_order(order, user):
     order.approve()
@@ -33,12 +35,64 @@ def approve_order(order, user):
     transaction.on_commit(lambda: create_order_pdf.delay(order.pk))
 
 
-@shared_task(name='marketplace.process_order')
-def process_order(serialized_order, serialized_user):
+@shared_task(
+    name='marketplace.process_order', bind=True, max_retries=720, default_retry_delay=5,
+)
+def process_order(self, serialized_order, serialized_user):
     order = core_utils.deserialize_instance(serialized_order)
+    items = list(order.items.all())
+
+    if len(items) == 1:
+        # There is nothing to parallelize, so single item is processed in place
+        user = core_utils.deserialize_instance(serialized_user)
+        _process_order_item(self, items[0], user)
+        return
+
+    # Each order item is processed in separate task, so that
+    # items are processed concurrently and failed item does not block others.
+    header = [
+        process_order_item.si(core_utils.serialize_instance(item), serialized_user)
+        for item in items
+    ]
+    chord(header)(complete_order.si(serialized_order))
+
+
+@shared_task(
+    name='marketplace.process_order_item',
+    bind=True,
+    max_retries=720,
+    default_retry_delay=5,
+)
+def process_order_item(self, serialized_order_item, serialized_user):
+    order_item = core_utils.deserialize_instance(serialized_order_item)
     user = core_utils.deserialize_instance(serialized_user)
-    for item in order.items.all():
-        process_order_item(item, user)
+    _process_order_item(self, order_item, user)
+
+
+def _process_order_item(task, order_item, user):
+    """ Process order item if offering has free slot, otherwise retry the task """
+    semaphore = utils.get_offering_semaphore(order_item.offering)
+
+    if not semaphore.acquire(task.request.id):
+        if task.request.retries < task.max_retries:
+            task.retry()
+        order_item.error_message = (
+            'Order item has not been processed because offering is busy.'
+        )
+        order_item.set_state_erred()
+        order_item.save(update_fields=['state', 'error_message'])
+        return
+
+    try:
+        utils.process_order_item(order_item, user)
+    finally:
+        semaphore.release(task.request.id)
+
+
+@shared_task(name='marketplace.complete_order')
+def complete_order(serialized_order):
+    order = core_utils.deserialize_instance(serialized_order)
+    utils.complete_order_if_all_items_are_done(order)
 
 
 @shared_task(name='marketplace.create_screenshot_thumbnail')
@@ -77,11 +131,20 @@ def create_order_pdf(order_id):
 
 
 @shared_task
-def create_pdf_for_all():
-    for order in models.Order.objects.all():
+def create_pdf_for_orders(order_ids):
+    for order in models.Order.objects.filter(id__in=order_ids):
         utils.create_order_pdf(order)
 
 
+@shared_task
+def create_pdf_for_all():
+    order_ids = list(models.Order.objects.values_list('id', flat=True))
+    group(
+        create_pdf_for_orders.si(chunk)
+        for chunk in core_utils.chunks(order_ids, PDF_CHUNK_SIZE)
+    ).apply_async()
+
+
 def filter_aggregate_by_scope(queryset, scope):
     scope_path = None
 
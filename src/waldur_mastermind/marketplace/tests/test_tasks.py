@@ -1,11 +1,13 @@
 import datetime
+from unittest import mock
 
 from django.core import mail
+from django.core.cache import cache
 from rest_framework import test
 
 from waldur_core.core import utils as core_utils
 from waldur_core.structure.tests import fixtures as structure_fixtures
-from waldur_mastermind.marketplace import exceptions, models, tasks
+from waldur_mastermind.marketplace import exceptions, models, tasks, utils
 
 from . import factories
 
@@ -89,3 +91,78 @@ class TerminateResource(test.APITransactionTestCase):
             core_utils.serialize_instance(self.resource),
             core_utils.serialize_instance(self.user),
         )
+
+
+class ProcessOrderTest(test.APITransactionTestCase):
+    def setUp(self):
+        self.fixture = structure_fixtures.ProjectFixture()
+        self.order = factories.OrderFactory(
+            project=self.fixture.project, state=models.Order.States.EXECUTING
+        )
+        self.offering = factories.OfferingFactory()
+        self.serialized_order = core_utils.serialize_instance(self.order)
+        self.serialized_user = core_utils.serialize_instance(self.fixture.staff)
+
+    def tearDown(self):
+        cache.clear()
+
+    @mock.patch('waldur_mastermind.marketplace.tasks.chord')
+    def test_order_items_are_processed_in_separate_tasks(self, chord):
+        factories.OrderItemFactory.create_batch(
+            3, order=self.order, offering=self.offering
+        )
+        tasks.process_order(self.serialized_order, self.serialized_user)
+        header = chord.call_args[0][0]
+        self.assertEqual(len(header), 3)
+        chord.return_value.assert_called_once_with(
+            tasks.complete_order.si(self.serialized_order)
+        )
+
+    @mock.patch('waldur_mastermind.marketplace.utils.process_order_item')
+    def test_order_item_is_not_processed_if_offering_is_busy(self, process_order_item):
+        order_item = factories.OrderItemFactory(
+            order=self.order, offering=self.offering
+        )
+        semaphore = utils.get_offering_semaphore(self.offering)
+        for index in range(semaphore.limit):
+            semaphore.acquire('task-%s' % index)
+
+        tasks.process_order_item.apply(
+            args=(core_utils.serialize_instance(order_item), self.serialized_user),
+            retries=tasks.process_order_item.max_retries,
+        )
+
+        order_item.refresh_from_db()
+        self.assertEqual(order_item.state, models.OrderItem.States.ERRED)
+        self.assertEqual(process_order_item.call_count, 0)
+
+    @mock.patch('waldur_mastermind.marketplace.utils.process_order_item')
+    def test_single_order_item_is_not_processed_if_offering_is_busy(
+        self, process_order_item
+    ):
+        order_item = factories.OrderItemFactory(
+            order=self.order, offering=self.offering
+        )
+        semaphore = utils.get_offering_semaphore(self.offering)
+        for index in range(semaphore.limit):
+            semaphore.acquire('task-%s' % index)
+
+        tasks.process_order.apply(
+            args=(self.serialized_order, self.serialized_user),
+            retries=tasks.process_order.max_retries,
+        )
+
+        order_item.refresh_from_db()
+        self.assertEqual(order_item.state, models.OrderItem.States.ERRED)
+        self.assertEqual(process_order_item.call_count, 0)
+
+    def test_order_is_completed_when_all_items_are_done(self):
+        factories.OrderItemFactory.create_batch(
+            2,
+            order=self.order,
+            offering=self.offering,
+            state=models.OrderItem.States.DONE,
+        )
+        tasks.complete_order(self.serialized_order)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.state, models.Order.States.DONE)
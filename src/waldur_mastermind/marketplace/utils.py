@@ -1,5 +1,6 @@
 import base64
 import datetime
+import hashlib
 import os
 from io import BytesIO
 
@@ -10,6 +11,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage as storage
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
@@ -64,6 +66,35 @@ def process_order_item(order_item, user):
         order_item.save(update_fields=['state', 'error_message'])
 
 
+def get_offering_semaphore(offering):
+    """ Limit number of order items of the offering which are processed concurrently """
+    return core_utils.CacheSemaphore(
+        'marketplace_offering:%s' % offering.pk,
+        settings.WALDUR_MARKETPLACE['ORDER_ITEM_OFFERING_CONCURRENCY'],
+        settings.WALDUR_MARKETPLACE['ORDER_ITEM_SLOT_TIMEOUT'],
+    )
+
+
+def complete_order_if_all_items_are_done(order):
+    # Order is locked so that concurrently finished order items are serialized
+    # and the last one observes terminal states of all others.
+    with transaction.atomic():
+        order = models.Order.objects.select_for_update().get(pk=order.pk)
+        if order.state != models.Order.States.EXECUTING:
+            return
+
+        # check if there are any non-finished OrderItems left and finish order if none is found
+        if (
+            models.OrderItem.objects.filter(order=order)
+            .exclude(state__in=models.OrderItem.States.TERMINAL_STATES)
+            .exists()
+        ):
+            return
+
+        order.complete()
+        order.save(update_fields=['state'])
+
+
 def validate_order_item(order_item, request):
     processor = get_order_item_processor(order_item)
     if processor:
@@ -119,9 +150,17 @@ def create_order_pdf(order):
         deployment_logo=deployment_logo,
     )
     html = render_to_string('marketplace/order.html', context)
+    file_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+    if order.file and order.file_hash == file_hash:
+        # PDF is not rendered again if content of order has not been changed
+        return
+
     pdf = pdfkit.from_string(html, False)
-    order.file = str(base64.b64encode(pdf), 'utf-8')
-    order.save()
+    if order.file:
+        order.file.delete(save=False)
+    order.file.save(order.get_filename(), ContentFile(pdf), save=False)
+    order.file_hash = file_hash
+    order.save(update_fields=['file', 'file_hash'])
 
 
 def import_resource_metadata(resource):
@@ -1,3 +1,4 @@
+from waldur_azure import services as azure_services
 from waldur_azure import views as azure_views
 from waldur_mastermind.marketplace import processors
 
@@ -12,10 +13,17 @@ class VirtualMachineCreateProcessor(processors.BaseCreateResourceProcessor):
         'location',
     )
 
+    def create_resource(self, user, post_data):
+        return azure_services.create_virtual_machine(user, post_data)
+
 
 class VirtualMachineDeleteProcessor(processors.DeleteResourceProcessor):
     viewset = azure_views.VirtualMachineViewSet
 
+    def delete_resource(self, user, resource):
+        azure_services.delete_virtual_machine(user, resource)
+        return False
+
 
 class SQLServerCreateProcessor(processors.BaseCreateResourceProcessor):
     viewset = azure_views.SQLServerViewSet
@@ -26,6 +34,13 @@ class SQLServerCreateProcessor(processors.BaseCreateResourceProcessor):
         'location',
     )
 
+    def create_resource(self, user, post_data):
+        return azure_services.create_sql_server(user, post_data)
+
 
 class SQLServerDeleteProcessor(processors.DeleteResourceProcessor):
     viewset = azure_views.SQLServerViewSet
+
+    def delete_resource(self, user, resource):
+        azure_services.delete_sql_server(user, resource)
+        return False
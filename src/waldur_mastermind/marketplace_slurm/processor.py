@@ -1,4 +1,5 @@
 from waldur_mastermind.marketplace import processors
+from waldur_slurm import services as slurm_services
 from waldur_slurm import views as slurm_views
 
 
@@ -10,6 +11,13 @@ class CreateAllocationProcessor(processors.BaseCreateResourceProcessor):
         'description',
     )
 
+    def create_resource(self, user, post_data):
+        return slurm_services.create_allocation(user, post_data)
+
 
 class DeleteAllocationProcessor(processors.DeleteResourceProcessor):
     viewset = slurm_views.AllocationViewSet
+
+    def delete_resource(self, user, resource):
+        slurm_services.delete_allocation(user, resource)
+        return False
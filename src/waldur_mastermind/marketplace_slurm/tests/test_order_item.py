@@ -1,7 +1,11 @@
+from unittest import mock
+
 from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import test
+from rest_framework.authtoken.models import Token
 
 from waldur_core.core import utils as core_utils
+from waldur_core.logging import models as logging_models
 from waldur_mastermind.marketplace import models as marketplace_models
 from waldur_mastermind.marketplace import tasks as marketplace_tasks
 from waldur_mastermind.marketplace.plugins import manager
@@ -60,6 +64,27 @@ class AllocationCreateTest(test.APITransactionTestCase):
             self.order_item.state, marketplace_models.OrderItem.States.EXECUTING
         )
 
+    def test_api_token_is_not_created_for_internal_request(self):
+        self.trigger_creation()
+        self.assertFalse(Token.objects.filter(user=self.fixture.staff).exists())
+
+    @mock.patch('waldur_mastermind.common.utils.create_request')
+    def test_allocation_is_created_without_internal_request(self, create_request):
+        self.trigger_creation()
+        self.assertFalse(create_request.called)
+        self.assertTrue(
+            slurm_models.Allocation.objects.filter(
+                name=self.order_item.attributes['name']
+            ).exists()
+        )
+
+    def test_user_is_stored_in_event_context_for_internal_request(self):
+        self.trigger_creation()
+        event = logging_models.Event.objects.get(
+            event_type='resource_creation_scheduled'
+        )
+        self.assertEqual(event.context['user_username'], self.fixture.staff.username)
+
     def test_not_create_allocation_if_scope_is_invalid(self):
         self.offering.scope = None
         self.offering.save()
@@ -137,6 +162,13 @@ class AllocationDeleteTest(test.APITransactionTestCase):
             self.allocation.state, slurm_models.Allocation.States.DELETION_SCHEDULED
         )
 
+    def test_deletion_is_not_scheduled_if_user_is_not_owner(self):
+        self.trigger_deletion(self.fixture.admin)
+        self.assertEqual(
+            self.order_item.state, marketplace_models.OrderItem.States.ERRED
+        )
+        self.assertEqual(self.allocation.state, slurm_models.Allocation.States.OK)
+
     def test_deletion_is_completed(self):
         self.trigger_deletion()
         self.allocation.delete()
@@ -152,9 +184,9 @@ class AllocationDeleteTest(test.APITransactionTestCase):
         )
         self.assertRaises(ObjectDoesNotExist, self.allocation.refresh_from_db)
 
-    def trigger_deletion(self):
+    def trigger_deletion(self, user=None):
         serialized_order = core_utils.serialize_instance(self.order_item.order)
-        serialized_user = core_utils.serialize_instance(self.fixture.staff)
+        serialized_user = core_utils.serialize_instance(user or self.fixture.staff)
         marketplace_tasks.process_order(serialized_order, serialized_user)
 
         self.order_item.refresh_from_db()
@@ -1,3 +1,4 @@
+import collections
 import logging
 import re
 from itertools import groupby
@@ -12,7 +13,11 @@ from keystoneclient import exceptions as keystone_exceptions
 from neutronclient.client import exceptions as neutron_exceptions
 from novaclient import exceptions as nova_exceptions
 
-from waldur_core.core.utils import create_batch_fetcher
+from waldur_core.core.utils import (
+    create_batch_fetcher,
+    fetch_concurrently,
+    log_duration,
+)
 from waldur_core.structure import SupportedServices, log_backend_action
 from waldur_core.structure.utils import (
     handle_resource_not_found,
@@ -61,12 +66,68 @@ class OpenStackBackend(BaseOpenStackBackend):
         self.pull_tenants()
 
     def pull_subresources(self):
-        self.pull_security_groups()
-        self.pull_floating_ips()
-        self.pull_networks()
-        self.pull_subnets()
-        self.pull_routers()
-        self.pull_ports()
+        """
+        Backend data for all tenants is fetched concurrently first,
+        then it is reconciled with database sequentially.
+        """
+        tenants = list(self._get_active_tenants())
+        network_tenants = list(self._get_network_tenants())
+        tenant_ids = [tenant.backend_id for tenant in tenants]
+        network_tenant_ids = [tenant.backend_id for tenant in network_tenants]
+
+        with log_duration(
+            logger, 'Fetching of OpenStack subresources for %s', self.settings
+        ):
+            backend_data = fetch_concurrently(
+                {
+                    'security_groups': lambda: self.list_security_groups(tenant_ids),
+                    'floating_ips': lambda: self.list_floatingips(tenant_ids),
+                    'networks': lambda: self.list_networks(network_tenant_ids),
+                    'subnets': self.list_subnets,
+                    'routers': lambda: self.list_routers_with_ports(tenant_ids),
+                    'ports': lambda: self.list_ports(tenant_ids),
+                }
+            )
+
+        stages = (
+            (
+                'security groups',
+                lambda: self.pull_security_groups(
+                    tenants, backend_data['security_groups']
+                ),
+            ),
+            (
+                'floating IPs',
+                lambda: self.pull_floating_ips(tenants, backend_data['floating_ips']),
+            ),
+            (
+                'networks',
+                lambda: self._pull_networks(network_tenants, backend_data['networks']),
+            ),
+            (
+                'subnets',
+                lambda: self.pull_subnets(backend_subnets=backend_data['subnets']),
+            ),
+            ('routers', lambda: self.pull_routers(tenants, backend_data['routers'])),
+            ('ports', lambda: self.pull_ports(tenants, backend_data['ports'])),
+        )
+        for name, stage in stages:
+            with log_duration(
+                logger, 'Reconciliation of OpenStack %s for %s', name, self.settings
+            ):
+                stage()
+
+    def _get_active_tenants(self):
+        return models.Tenant.objects.filter(
+            state=models.Tenant.States.OK,
+            service_project_link__service__settings=self.settings,
+        )
+
+    def _get_network_tenants(self):
+        return models.Tenant.objects.exclude(backend_id='').filter(
+            state__in=[models.Tenant.States.OK, models.Tenant.States.UPDATING],
+            service_project_link__service__settings=self.settings,
+        )
 
     def pull_tenants(self):
         keystone = self.keystone_admin_client
@@ -265,17 +326,15 @@ class OpenStackBackend(BaseOpenStackBackend):
         ):
             self.pull_tenant_quotas(tenant)
 
-    def pull_floating_ips(self, tenants=None):
+    def pull_floating_ips(self, tenants=None, backend_floating_ips=None):
         if tenants is None:
-            tenants = models.Tenant.objects.filter(
-                state=models.Tenant.States.OK,
-                service_project_link__service__settings=self.settings,
-            ).prefetch_related('floating_ips')
+            tenants = self._get_active_tenants().prefetch_related('floating_ips')
         tenant_mappings = {tenant.backend_id: tenant for tenant in tenants}
         if not tenant_mappings:
             return
 
-        backend_floating_ips = self.list_floatingips(list(tenant_mappings.keys()))
+        if backend_floating_ips is None:
+            backend_floating_ips = self.list_floatingips(list(tenant_mappings.keys()))
 
         tenant_floating_ips = dict()
         for tenant_id, floating_ips in groupby(
@@ -365,20 +424,17 @@ class OpenStackBackend(BaseOpenStackBackend):
 
         return floating_ip
 
-    def pull_security_groups(self, tenants=None):
-
+    def pull_security_groups(self, tenants=None, backend_security_groups=None):
         if tenants is None:
-            tenants = models.Tenant.objects.filter(
-                state=models.Tenant.States.OK,
-                service_project_link__service__settings=self.settings,
-            ).prefetch_related('security_groups')
+            tenants = self._get_active_tenants().prefetch_related('security_groups')
         tenant_mappings = {tenant.backend_id: tenant for tenant in tenants}
         if not tenant_mappings:
             return
 
-        backend_security_groups = self.list_security_groups(
-            list(tenant_mappings.keys())
-        )
+        if backend_security_groups is None:
+            backend_security_groups = self.list_security_groups(
+                list(tenant_mappings.keys())
+            )
 
         tenant_security_groups = dict()
         for tenant_id, security_groups in groupby(
@@ -488,39 +544,70 @@ class OpenStackBackend(BaseOpenStackBackend):
 
         return security_group
 
-    def pull_routers(self):
-        for tenant in models.Tenant.objects.filter(
-            state=models.Tenant.States.OK,
-            service_project_link__service__settings=self.settings,
-        ):
-            self.pull_tenant_routers(tenant)
+    def pull_routers(self, tenants=None, backend_routers=None):
+        if tenants is None:
+            tenants = list(self._get_active_tenants())
+        if not tenants:
+            return
+        if backend_routers is None:
+            backend_routers = self.list_routers_with_ports(
+                [tenant.backend_id for tenant in tenants]
+            )
+        tenant_routers = collections.defaultdict(list)
+        for backend_router in backend_routers:
+            tenant_routers[backend_router['tenant_id']].append(backend_router)
+        for tenant in tenants:
+            self._update_tenant_routers(tenant, tenant_routers[tenant.backend_id])
 
     def pull_tenant_routers(self, tenant):
+        backend_routers = self.list_routers_with_ports([tenant.backend_id])
+        self._update_tenant_routers(tenant, backend_routers)
+
+    @method_decorator(create_batch_fetcher)
+    def list_routers(self, tenants):
         neutron = self.neutron_admin_client
+        try:
+            return neutron.list_routers(tenant_id=tenants)['routers']
+        except neutron_exceptions.NeutronClientException as e:
+            raise OpenStackBackendError(e)
 
+    @method_decorator(create_batch_fetcher)
+    def list_router_ports(self, routers):
+        neutron = self.neutron_admin_client
         try:
-            backend_routers = neutron.list_routers(tenant_id=tenant.backend_id)[
-                'routers'
-            ]
+            return neutron.list_ports(device_id=routers)['ports']
         except neutron_exceptions.NeutronClientException as e:
             raise OpenStackBackendError(e)
 
+    def list_routers_with_ports(self, tenants):
+        """
+        Return routers of given tenants. Fixed IPs of router ports
+        are stored in "fixed_ips" field of each router.
+        """
+        if not tenants:
+            return []
+        backend_routers = self.list_routers(tenants)
+        if not backend_routers:
+            return backend_routers
+        router_ports = self.list_router_ports(
+            [backend_router['id'] for backend_router in backend_routers]
+        )
+        fixed_ips = collections.defaultdict(list)
+        for port in router_ports:
+            for fixed_ip in port['fixed_ips']:
+                fixed_ips[port['device_id']].append(fixed_ip['ip_address'])
         for backend_router in backend_routers:
-            backend_id = backend_router['id']
-            try:
-                ports = neutron.list_ports(device_id=backend_id)['ports']
-                fixed_ips = []
-                for port in ports:
-                    for fixed_ip in port['fixed_ips']:
-                        fixed_ips.append(fixed_ip['ip_address'])
-            except neutron_exceptions.NeutronClientException as e:
-                raise OpenStackBackendError(e)
+            backend_router['fixed_ips'] = fixed_ips[backend_router['id']]
+        return backend_routers
 
+    def _update_tenant_routers(self, tenant, backend_routers):
+        for backend_router in backend_routers:
+            backend_id = backend_router['id']
             defaults = {
                 'name': backend_router['name'],
                 'description': backend_router['description'],
                 'routes': backend_router['routes'],
-                'fixed_ips': fixed_ips,
+                'fixed_ips': backend_router['fixed_ips'],
                 'service_project_link': tenant.service_project_link,
                 'state': models.Router.States.OK,
             }
@@ -542,21 +629,32 @@ class OpenStackBackend(BaseOpenStackBackend):
         )
         stale_routers.delete()
 
-    def pull_ports(self):
-        for tenant in models.Tenant.objects.filter(
-            state=models.Tenant.States.OK,
-            service_project_link__service__settings=self.settings,
-        ):
-            self.pull_tenant_ports(tenant)
+    def pull_ports(self, tenants=None, backend_ports=None):
+        if tenants is None:
+            tenants = list(self._get_active_tenants())
+        if not tenants:
+            return
+        if backend_ports is None:
+            backend_ports = self.list_ports([tenant.backend_id for tenant in tenants])
+        tenant_ports = collections.defaultdict(list)
+        for backend_port in backend_ports:
+            tenant_ports[backend_port['tenant_id']].append(backend_port)
+        for tenant in tenants:
+            self._update_tenant_ports(tenant, tenant_ports[tenant.backend_id])
 
     def pull_tenant_ports(self, tenant):
-        neutron = self.neutron_admin_client
+        backend_ports = self.list_ports([tenant.backend_id])
+        self._update_tenant_ports(tenant, backend_ports)
 
+    @method_decorator(create_batch_fetcher)
+    def list_ports(self, tenants):
+        neutron = self.neutron_admin_client
         try:
-            backend_ports = neutron.list_ports(tenant_id=tenant.backend_id)['ports']
+            return neutron.list_ports(tenant_id=tenants)['ports']
         except neutron_exceptions.NeutronClientException as e:
             raise OpenStackBackendError(e)
 
+    def _update_tenant_ports(self, tenant, backend_ports):
         networks = models.Network.objects.filter(tenant=tenant)
         network_mappings = {network.backend_id: network for network in networks}
 
@@ -593,23 +691,16 @@ class OpenStackBackend(BaseOpenStackBackend):
         stale_ports.delete()
 
     def pull_networks(self):
-        tenants = (
-            models.Tenant.objects.exclude(backend_id='')
-            .filter(
-                state__in=[models.Tenant.States.OK, models.Tenant.States.UPDATING],
-                service_project_link__service__settings=self.settings,
-            )
-            .prefetch_related('networks')
-        )
-
+        tenants = self._get_network_tenants().prefetch_related('networks')
         self._pull_networks(tenants)
 
     def _pull_tenant_networks(self, tenant):
         return self._pull_networks([tenant])
 
-    def _pull_networks(self, tenants):
+    def _pull_networks(self, tenants, backend_networks=None):
         tenant_mappings = {tenant.backend_id: tenant for tenant in tenants}
-        backend_networks = self.list_networks(list(tenant_mappings.keys()))
+        if backend_networks is None:
+            backend_networks = self.list_networks(list(tenant_mappings.keys()))
 
         networks = []
         with transaction.atomic():
@@ -681,7 +772,7 @@ class OpenStackBackend(BaseOpenStackBackend):
 
         return network
 
-    def pull_subnets(self, tenant=None, network=None):
+    def pull_subnets(self, tenant=None, network=None, backend_subnets=None):
         neutron = self.neutron_admin_client
 
         if tenant:
@@ -697,20 +788,20 @@ class OpenStackBackend(BaseOpenStackBackend):
         if not network_mappings:
             return
 
-        try:
-            if tenant:
-                backend_subnets = neutron.list_subnets(tenant_id=tenant.backend_id)[
-                    'subnets'
-                ]
-            elif network:
-                backend_subnets = neutron.list_subnets(network_id=network.backend_id)[
-                    'subnets'
-                ]
-            else:
-                # We can't filter subnets by network IDs because it exceeds maximum request length
-                backend_subnets = neutron.list_subnets()['subnets']
-        except neutron_exceptions.NeutronClientException as e:
-            raise OpenStackBackendError(e)
+        if backend_subnets is None:
+            try:
+                if tenant:
+                    backend_subnets = neutron.list_subnets(tenant_id=tenant.backend_id)[
+                        'subnets'
+                    ]
+                elif network:
+                    backend_subnets = neutron.list_subnets(
+                        network_id=network.backend_id
+                    )['subnets']
+                else:
+                    backend_subnets = self.list_subnets()
+            except neutron_exceptions.NeutronClientException as e:
+                raise OpenStackBackendError(e)
 
         subnet_uuids = []
         with transaction.atomic():
@@ -749,6 +840,14 @@ class OpenStackBackend(BaseOpenStackBackend):
             ).exclude(uuid__in=subnet_uuids)
             stale_subnets.delete()
 
+    def list_subnets(self):
+        neutron = self.neutron_admin_client
+        try:
+            # We can't filter subnets by network IDs because it exceeds maximum request length
+            return neutron.list_subnets()['subnets']
+        except neutron_exceptions.NeutronClientException as e:
+            raise OpenStackBackendError(e)
+
     @log_backend_action()
     def import_tenant_subnets(self, tenant):
         self.pull_subnets(tenant)
@@ -27,6 +27,7 @@ class ServiceUsageAggregatorQuotaField(UsageAggregatorQuotaField):
             get_children=lambda service: Tenant.objects.filter(
                 service_project_link__service=service
             ),
+            path_to_scope='service_project_link__service',
             **kwargs
         )
 
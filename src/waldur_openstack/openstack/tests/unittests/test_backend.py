@@ -424,6 +424,48 @@ class PullSubnetsTest(BaseBackendTestCase):
         self.assertEqual(subnet.name, 'subnet-1')
 
 
+class PullRoutersTest(BaseBackendTestCase):
+    def setUp(self):
+        super(PullRoutersTest, self).setUp()
+        self.mocked_neutron().list_routers.return_value = {
+            'routers': [
+                {
+                    'tenant_id': self.tenant.backend_id,
+                    'id': 'router_id',
+                    'name': 'Router',
+                    'description': '',
+                    'routes': [],
+                }
+            ]
+        }
+        self.mocked_neutron().list_ports.return_value = {
+            'ports': [
+                {'device_id': 'router_id', 'fixed_ips': [{'ip_address': '10.0.0.1'}]},
+                {'device_id': 'router_id', 'fixed_ips': [{'ip_address': '10.0.0.2'}]},
+            ]
+        }
+
+    def test_router_ports_are_fetched_in_single_request(self):
+        self.backend.pull_routers()
+
+        router = models.Router.objects.get(tenant=self.tenant, backend_id='router_id')
+        self.assertEqual(router.fixed_ips, ['10.0.0.1', '10.0.0.2'])
+        self.mocked_neutron().list_ports.assert_called_once_with(
+            device_id=['router_id']
+        )
+
+    def test_stale_routers_are_deleted(self):
+        models.Router.objects.create(
+            tenant=self.tenant,
+            service_project_link=self.tenant.service_project_link,
+            backend_id='stale_router',
+        )
+        self.backend.pull_routers()
+        self.assertFalse(
+            models.Router.objects.filter(backend_id='stale_router').exists()
+        )
+
+
 class CreateOrUpdateTenantUserTest(BaseBackendTestCase):
     def test_change_tenant_user_password_is_called_if_user_exists(self):
         self.mocked_keystone().users.find.return_value = self.fixture.owner
@@ -3,6 +3,7 @@ import hashlib
 import json
 import logging
 import re
+import threading
 
 from cinderclient import exceptions as cinder_exceptions
 from cinderclient.v2 import client as cinder_client
@@ -181,6 +182,8 @@ class BaseOpenStackBackend(ServiceBackend):
     def __init__(self, settings, tenant_id=None):
         self.settings = settings
         self.tenant_id = tenant_id
+        # Clients are shared by threads which fetch data concurrently
+        self._client_lock = threading.Lock()
 
     def _get_cached_session_key(self, admin):
         if not admin and not self.tenant_id:
@@ -216,11 +219,20 @@ class BaseOpenStackBackend(ServiceBackend):
         if not self.settings.uuid:
             return OpenStackClient(**credentials)
 
+        with self._client_lock:
+            client = self._get_client(credentials, admin)
+
+        if name:
+            return getattr(client, name)
+        else:
+            return client
+
+    def _get_client(self, credentials, admin):
         client = None
         attr_name = 'admin_session' if admin else 'session'
         key = self._get_cached_session_key(admin)
         if hasattr(self, attr_name):  # try to get client from object
-            client = getattr(self, attr_name)
+            return getattr(self, attr_name)
         elif key in cache:  # try to get session from cache
             session = cache.get(key)
             # Cache miss is signified by a return value of None
@@ -232,13 +244,11 @@ class BaseOpenStackBackend(ServiceBackend):
 
         if client is None:  # create new token if session is not cached or expired
             client = OpenStackClient(**credentials)
-            setattr(self, attr_name, client)  # Cache client in the object
             cache.set(key, dict(client.session), 10 * 60 * 60)  # Add session to cache
 
-        if name:
-            return getattr(client, name)
-        else:
-            return client
+        # Cache client in the object so that keystone session is reused
+        setattr(self, attr_name, client)
+        return client
 
     def __getattr__(self, name):
         clients = 'keystone', 'nova', 'neutron', 'cinder', 'glance'
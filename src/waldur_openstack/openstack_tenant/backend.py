@@ -1,3 +1,4 @@
+import collections
 import logging
 import re
 
@@ -12,6 +13,7 @@ from novaclient import exceptions as nova_exceptions
 
 from waldur_core.structure import log_backend_action
 from waldur_core.structure.utils import (
+    ChangeSet,
     handle_resource_not_found,
     handle_resource_update_success,
     update_pulled_fields,
@@ -87,9 +89,13 @@ class InternalIPSynchronizer:
         """
         Prepare mapping from device and subnet ID to local internal IP model.
         """
-        pending_internal_ips = models.InternalIP.objects.filter(
-            subnet__settings=self.settings, backend_id=None
-        ).exclude(instance__isnull=True)
+        pending_internal_ips = (
+            models.InternalIP.objects.filter(
+                subnet__settings=self.settings, backend_id=None
+            )
+            .exclude(instance__isnull=True)
+            .select_related('instance', 'subnet')
+        )
         return {
             (ip.instance.backend_id, ip.subnet.backend_id): ip
             for ip in pending_internal_ips
@@ -129,6 +135,7 @@ class InternalIPSynchronizer:
 
     @transaction.atomic
     def execute(self):
+        changes = ChangeSet(models.InternalIP)
         for remote_ip in self.remote_ips:
 
             # Check if related subnet exists.
@@ -163,27 +170,29 @@ class InternalIPSynchronizer:
                 local_ip.subnet = subnet
                 local_ip.settings = subnet.settings
                 local_ip.instance = instance
-                local_ip.save()
+                changes.create(local_ip)
             else:
-                if local_ip.instance != instance:
+                if local_ip.instance_id != (instance and instance.pk):
                     logger.info(
                         'About to reassign internal IP from %s to %s',
-                        local_ip.instance,
+                        local_ip.instance_id,
                         instance,
                     )
-                    local_ip.instance = instance
-                    local_ip.save()
+                    changes.set_values(local_ip, instance=instance)
 
                 # Update backend ID for pending internal IP.
                 update_pulled_fields(
                     local_ip,
                     remote_ip,
                     models.InternalIP.get_backend_fields() + ('backend_id',),
+                    changes,
                 )
 
         if self.stale_ips:
             logger.info('About to remove stale internal IPs: %s', self.stale_ips)
-            models.InternalIP.objects.filter(pk__in=self.stale_ips).delete()
+            changes.delete(models.InternalIP.objects.filter(pk__in=self.stale_ips))
+
+        return changes.apply()
 
 
 class OpenStackTenantBackend(BaseOpenStackBackend):
@@ -192,6 +201,12 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
         'console_type': 'novnc',
     }
 
+    # Pending runtime state polls of the same tenant are done using single backend call
+    batch_pull_methods = {
+        'pull_instance_runtime_state': 'pull_instances_runtime_state',
+        'pull_volume_runtime_state': 'pull_volumes_runtime_state',
+    }
+
     def __init__(self, settings):
         super(OpenStackTenantBackend, self).__init__(
             settings, settings.options['tenant_id']
@@ -229,16 +244,18 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             backend_volume.backend_id: backend_volume
             for backend_volume in backend_volumes
         }
+        changes = ChangeSet(models.Volume)
         for volume in volumes:
             try:
                 backend_volume = backend_volumes_map[volume.backend_id]
             except KeyError:
-                handle_resource_not_found(volume)
+                handle_resource_not_found(volume, changes)
             else:
                 update_pulled_fields(
-                    volume, backend_volume, models.Volume.get_backend_fields()
+                    volume, backend_volume, models.Volume.get_backend_fields(), changes
                 )
-                handle_resource_update_success(volume)
+                handle_resource_update_success(volume, changes)
+        return changes.apply()
 
     def pull_snapshots(self):
         backend_snapshots = self.get_snapshots()
@@ -250,16 +267,21 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             backend_snapshot.backend_id: backend_snapshot
             for backend_snapshot in backend_snapshots
         }
+        changes = ChangeSet(models.Snapshot)
         for snapshot in snapshots:
             try:
                 backend_snapshot = backend_snapshots_map[snapshot.backend_id]
             except KeyError:
-                handle_resource_not_found(snapshot)
+                handle_resource_not_found(snapshot, changes)
             else:
                 update_pulled_fields(
-                    snapshot, backend_snapshot, models.Snapshot.get_backend_fields()
+                    snapshot,
+                    backend_snapshot,
+                    models.Snapshot.get_backend_fields(),
+                    changes,
                 )
-                handle_resource_update_success(snapshot)
+                handle_resource_update_success(snapshot, changes)
+        return changes.apply()
 
     def pull_instances(self):
         backend_instances = self.get_instances()
@@ -271,18 +293,21 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             backend_instance.backend_id: backend_instance
             for backend_instance in backend_instances
         }
+        changes = ChangeSet(models.Instance)
+        existing_instances = []
         for instance in instances:
             try:
                 backend_instance = backend_instances_map[instance.backend_id]
             except KeyError:
-                handle_resource_not_found(instance)
+                handle_resource_not_found(instance, changes)
             else:
-                self.update_instance_fields(instance, backend_instance)
-                # XXX: can be optimized after https://goo.gl/BZKo8Y will be resolved.
-                self.pull_instance_security_groups(instance)
-                handle_resource_update_success(instance)
+                self.update_instance_fields(instance, backend_instance, changes)
+                handle_resource_update_success(instance, changes)
+                existing_instances.append(instance)
+        self.pull_instances_security_groups(existing_instances)
+        return changes.apply()
 
-    def update_instance_fields(self, instance, backend_instance):
+    def update_instance_fields(self, instance, backend_instance, changes=None):
         # Preserve flavor fields in Waldur database if flavor is deleted in OpenStack
         fields = set(models.Instance.get_backend_fields())
         flavor_fields = {'flavor_name', 'flavor_disk', 'ram', 'cores', 'disk'}
@@ -290,7 +315,7 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             fields = fields - flavor_fields
         fields = list(fields)
 
-        update_pulled_fields(instance, backend_instance, fields)
+        update_pulled_fields(instance, backend_instance, fields, changes)
 
     def pull_flavors(self):
         nova = self.nova_client
@@ -854,6 +879,26 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
                 volume.runtime_state = backend_volume.status
                 volume.save(update_fields=['runtime_state'])
 
+    def pull_volumes_runtime_state(self, volumes):
+        """ Pull runtime state of several volumes using single backend call """
+        cinder = self.cinder_client
+        try:
+            backend_volumes = cinder.volumes.list()
+        except cinder_exceptions.ClientException as e:
+            raise OpenStackBackendError(e)
+        statuses = {
+            backend_volume.id: backend_volume.status
+            for backend_volume in backend_volumes
+        }
+        for volume in volumes:
+            status = statuses.get(volume.backend_id)
+            if status is None:
+                # Volume is not listed if it has been deleted or it is not accessible
+                self.pull_volume_runtime_state(volume)
+            elif status != volume.runtime_state:
+                volume.runtime_state = status
+                volume.save(update_fields=['runtime_state'])
+
     @log_backend_action('check is volume deleted')
     def is_volume_deleted(self, volume):
         cinder = self.cinder_client
@@ -1736,6 +1781,76 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             else:
                 instance.security_groups.add(security_group)
 
+    def get_instances_security_groups(self):
+        """
+        Return mapping from backend ID of instance to backend IDs of its security groups.
+        Security groups are collected from all ports of instance using single Neutron call.
+        """
+        neutron = self.neutron_client
+        try:
+            ports = neutron.list_ports(tenant_id=self.tenant_id)['ports']
+        except neutron_exceptions.NeutronClientException as e:
+            raise OpenStackBackendError(e)
+
+        instances_security_groups = collections.defaultdict(set)
+        for port in ports:
+            if port['device_owner'].startswith('compute:'):
+                instances_security_groups[port['device_id']].update(
+                    port.get('security_groups', [])
+                )
+        return instances_security_groups
+
+    def pull_instances_security_groups(self, instances):
+        """
+        Synchronize security groups of all instances using constant number of
+        backend calls and database queries.
+        """
+        if not instances:
+            return
+        backend_groups = self.get_instances_security_groups()
+        security_groups = dict(
+            models.SecurityGroup.objects.filter(settings=self.settings)
+            .exclude(backend_id='')
+            .values_list('backend_id', 'id')
+        )
+        known_group_ids = set(security_groups.values())
+        Membership = models.Instance.security_groups.through
+        instances_map = {instance.pk: instance for instance in instances}
+        current_links = collections.defaultdict(dict)
+        for link_id, instance_id, group_id in Membership.objects.filter(
+            instance_id__in=instances_map.keys()
+        ).values_list('id', 'instance_id', 'securitygroup_id'):
+            current_links[instance_id][group_id] = link_id
+
+        stale_links = []
+        new_links = []
+        for instance_id, instance in instances_map.items():
+            group_ids = set()
+            for backend_id in backend_groups.get(instance.backend_id, []):
+                try:
+                    group_ids.add(security_groups[backend_id])
+                except KeyError:
+                    logger.error(
+                        'Security group with id %s does not exist at Waldur. '
+                        'Settings ID: %s' % (backend_id, self.settings.id)
+                    )
+            links = current_links[instance_id]
+            # Security groups which are not created at backend yet are kept
+            stale_links.extend(
+                link_id
+                for group_id, link_id in links.items()
+                if group_id in known_group_ids and group_id not in group_ids
+            )
+            new_links.extend(
+                Membership(instance_id=instance_id, securitygroup_id=group_id)
+                for group_id in group_ids - set(links)
+            )
+
+        if stale_links:
+            Membership.objects.filter(id__in=stale_links).delete()
+        if new_links:
+            Membership.objects.bulk_create(new_links)
+
     @log_backend_action()
     def push_instance_security_groups(self, instance):
         nova = self.nova_client
@@ -1857,6 +1972,28 @@ class OpenStackTenantBackend(BaseOpenStackBackend):
             backend_instance = nova.servers.get(instance.backend_id)
         except nova_exceptions.ClientException as e:
             raise OpenStackBackendError(e)
+        self._update_instance_runtime_state(instance, backend_instance)
+
+    def pull_instances_runtime_state(self, instances):
+        """ Pull runtime state of several instances using single backend call """
+        nova = self.nova_client
+        try:
+            backend_instances = nova.servers.list()
+        except nova_exceptions.ClientException as e:
+            raise OpenStackBackendError(e)
+        backend_instances = {
+            backend_instance.id: backend_instance
+            for backend_instance in backend_instances
+        }
+        for instance in instances:
+            backend_instance = backend_instances.get(instance.backend_id)
+            if backend_instance:
+                self._update_instance_runtime_state(instance, backend_instance)
+            else:
+                # Instance is not listed if it has been deleted or it is not accessible
+                self.pull_instance_runtime_state(instance)
+
+    def _update_instance_runtime_state(self, instance, backend_instance):
         if backend_instance.status != instance.runtime_state:
             instance.runtime_state = backend_instance.status
             instance.save(update_fields=['runtime_state'])
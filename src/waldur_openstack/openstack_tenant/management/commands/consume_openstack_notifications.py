@@ -0,0 +1,37 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ...utils import handle_notification
+
+
+class Command(BaseCommand):
+    help = (
+        "Read Nova and Cinder notifications as JSON lines from file or standard input "
+        "and check runtime state of affected resources without waiting for next poll."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', help='Path to file with notifications, default is stdin.'
+        )
+
+    def handle(self, *args, **options):
+        stream = open(options['path']) if options['path'] else sys.stdin
+        count = 0
+        try:
+            for line in stream:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    notification = json.loads(line)
+                except ValueError:
+                    self.stderr.write('Skipping invalid notification: %s' % line)
+                    continue
+                count += handle_notification(notification)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write('Resources checked early: %s' % count)
@@ -783,6 +783,57 @@ class PullInstanceTest(BaseBackendTest):
         self.assertEqual(instance.error_message, 'Waldur error.')
 
 
+class PullInstancesSecurityGroupsTest(BaseBackendTest):
+    def setUp(self):
+        super(PullInstancesSecurityGroupsTest, self).setUp()
+        self.instance = self.fixture.instance
+        self.old_group = factories.SecurityGroupFactory(
+            settings=self.settings, backend_id='old_group'
+        )
+        self.new_group = factories.SecurityGroupFactory(
+            settings=self.settings, backend_id='new_group'
+        )
+        self.instance.security_groups.add(self.old_group)
+        self.neutron_client_mock.list_ports.return_value = {
+            'ports': [
+                {
+                    'device_id': self.instance.backend_id,
+                    'device_owner': 'compute:nova',
+                    'security_groups': ['new_group', 'missing_group'],
+                }
+            ]
+        }
+
+    def test_security_groups_are_synchronized(self):
+        self.tenant_backend.pull_instances_security_groups([self.instance])
+
+        self.assertEqual(list(self.instance.security_groups.all()), [self.new_group])
+
+    def test_security_groups_are_pulled_using_single_backend_call(self):
+        other_instance = factories.InstanceFactory(
+            service_project_link=self.fixture.spl
+        )
+        self.tenant_backend.pull_instances_security_groups(
+            [self.instance, other_instance]
+        )
+
+        self.neutron_client_mock.list_ports.assert_called_once()
+        self.assertEqual(other_instance.security_groups.count(), 0)
+        self.nova_client_mock.servers.list_security_group.assert_not_called()
+
+    def test_pending_security_group_is_not_removed(self):
+        pending_group = factories.SecurityGroupFactory(
+            settings=self.settings, backend_id=''
+        )
+        self.instance.security_groups.add(pending_group)
+
+        self.tenant_backend.pull_instances_security_groups([self.instance])
+
+        self.assertTrue(
+            self.instance.security_groups.filter(pk=pending_group.pk).exists()
+        )
+
+
 class PullInstanceInternalIpsTest(BaseBackendTest):
     def setup_neutron(self, port_id, device_id, subnet_id):
         self.neutron_client_mock.list_ports.return_value = {
@@ -1,3 +1,6 @@
+import json
+
+
 def get_valid_availability_zones(instance):
     """
     Fetch valid availability zones for instance or volume from shared settings.
@@ -6,3 +9,33 @@ def get_valid_availability_zones(instance):
     if tenant:
         return tenant.service_settings.options.get('valid_availability_zones') or {}
     return {}
+
+
+NOTIFICATION_RESOURCES = {
+    'compute.instance.': ('Instance', 'instance_id', 'pull_instance_runtime_state'),
+    'volume.': ('Volume', 'volume_id', 'pull_volume_runtime_state'),
+}
+
+
+def handle_notification(notification):
+    """
+    Wake up pending runtime state polls of resource referred by
+    Nova or Cinder notification, such as "compute.instance.update".
+    Returns number of resources which have been checked early.
+    """
+    from waldur_core.core.tasks import PollScheduler
+
+    from . import models
+
+    if 'oslo.message' in notification:
+        # Notification is wrapped in messaging envelope
+        notification = json.loads(notification['oslo.message'])
+
+    event_type = notification.get('event_type') or ''
+    payload = notification.get('payload') or {}
+    for prefix, (model_name, id_field, method) in NOTIFICATION_RESOURCES.items():
+        if event_type.startswith(prefix) and payload.get(id_field):
+            model = getattr(models, model_name)
+            resources = model.objects.filter(backend_id=payload[id_field])
+            return sum(PollScheduler.notify(resource, method) for resource in resources)
+    return 0
@@ -13,7 +13,7 @@ from waldur_core.core import utils as core_utils
 from waldur_core.media.utils import guess_image_extension
 from waldur_core.structure import ServiceBackend
 from waldur_core.structure.models import ServiceSettings
-from waldur_core.structure.utils import update_pulled_fields
+from waldur_core.structure.utils import ChangeSet, update_pulled_fields
 from waldur_mastermind.common.utils import parse_datetime
 from waldur_rancher.enums import (
     LONGHORN_NAME,
@@ -871,13 +871,18 @@ class RancherBackend(ServiceBackend):
             'runtime_state',
             'scale',
         }
+        changes = ChangeSet(models.Workload, send_created_signals=False)
         for workload_id in existing_workloads:
             local_workload = local_workload_map[workload_id]
             remote_workload = remote_workload_map[workload_id]
-            update_pulled_fields(local_workload, remote_workload, pulled_fields)
+            update_pulled_fields(
+                local_workload, remote_workload, pulled_fields, changes
+            )
 
-        models.Workload.objects.bulk_create(new_workloads)
-        local_workloads.filter(backend_id__in=stale_workloads).delete()
+        for new_workload in new_workloads:
+            changes.create(new_workload)
+        changes.delete(local_workloads.filter(backend_id__in=stale_workloads))
+        return changes.apply()
 
     def remote_workload_to_local(self, remote_workload, project, local_namespaces_map):
         return models.Workload(
@@ -956,13 +961,16 @@ class RancherBackend(ServiceBackend):
             'max_replicas',
             'metrics',
         }
+        changes = ChangeSet(models.HPA, send_created_signals=False)
         for hpa_id in existing_hpas:
             local_hpa = local_hpa_map[hpa_id]
             remote_hpa = remote_hpa_map[hpa_id]
-            update_pulled_fields(local_hpa, remote_hpa, pulled_fields)
+            update_pulled_fields(local_hpa, remote_hpa, pulled_fields, changes)
 
-        models.HPA.objects.bulk_create(new_hpas)
-        local_hpas.filter(backend_id__in=stale_hpas).delete()
+        for new_hpa in new_hpas:
+            changes.create(new_hpa)
+        changes.delete(local_hpas.filter(backend_id__in=stale_hpas))
+        return changes.apply()
 
     def remote_hpa_to_local(self, remote_hpa, local_workloads_map):
         workload = local_workloads_map[remote_hpa['workloadId']]
@@ -1067,13 +1075,16 @@ class RancherBackend(ServiceBackend):
             'runtime_state',
             'answers',
         }
+        changes = ChangeSet(models.Application, send_created_signals=False)
         for app_id in existing_apps:
             local_app = local_app_map[app_id]
             remote_app = remote_app_map[app_id]
-            update_pulled_fields(local_app, remote_app, pulled_fields)
+            update_pulled_fields(local_app, remote_app, pulled_fields, changes)
 
-        models.Application.objects.bulk_create(new_apps)
-        local_apps.filter(backend_id__in=stale_apps).delete()
+        for new_app in new_apps:
+            changes.create(new_app)
+        changes.delete(local_apps.filter(backend_id__in=stale_apps))
+        return changes.apply()
 
     def remote_app_to_local(self, remote_app, rancher_project, local_namespaces_map):
         parts = urlparse(remote_app['externalId'])
@@ -1291,13 +1302,16 @@ class RancherBackend(ServiceBackend):
             'runtime_state',
             'rules',
         }
+        changes = ChangeSet(models.Ingress, send_created_signals=False)
         for ingress_id in existing_ingresses:
             local_ingress = local_ingress_map[ingress_id]
             remote_ingress = remote_ingress_map[ingress_id]
-            update_pulled_fields(local_ingress, remote_ingress, pulled_fields)
+            update_pulled_fields(local_ingress, remote_ingress, pulled_fields, changes)
 
-        models.Ingress.objects.bulk_create(new_ingresses)
-        local_ingresses.filter(backend_id__in=stale_ingresses).delete()
+        for new_ingress in new_ingresses:
+            changes.create(new_ingress)
+        changes.delete(local_ingresses.filter(backend_id__in=stale_ingresses))
+        return changes.apply()
 
     def remote_ingress_to_local(self, remote_ingress, project, local_namespaces_map):
         namespace = local_namespaces_map.get(remote_ingress['namespaceId'])
@@ -1371,24 +1385,17 @@ class RancherBackend(ServiceBackend):
         ]
 
         existing_services = remote_service_ids & local_service_ids
+        changes = ChangeSet(models.Service)
         for service_id in existing_services:
             local_service = local_service_map[service_id]
             remote_service = remote_service_map[service_id]
-            update_fields = set()
-            if remote_service['name'] != local_service.name:
-                local_service.name = remote_service['name']
-                update_fields.add('name')
-            if remote_service['state'] != local_service.runtime_state:
-                local_service.runtime_state = remote_service['state']
-                update_fields.add('runtime_state')
-            if remote_service.get('selector') != local_service.selector:
-                local_service.selector = remote_service.get('selector')
-                update_fields.add('selector')
-            if remote_service['clusterIp'] != local_service.cluster_ip:
-                local_service.cluster_ip = remote_service['clusterIp']
-                update_fields.add('cluster_ip')
-            if update_fields:
-                local_service.save(update_fields=update_fields)
+            changes.set_values(
+                local_service,
+                name=remote_service['name'],
+                runtime_state=remote_service['state'],
+                selector=remote_service.get('selector'),
+                cluster_ip=remote_service['clusterIp'],
+            )
 
             local_service_workload_map = {
                 workload.backend_id: workload
@@ -1431,14 +1438,20 @@ class RancherBackend(ServiceBackend):
                 selector=remote_service.get('selector'),
                 state=models.Service.States.OK,
             )
-            local_service.save()
+            changes.create(local_service)
+
+        changes.delete(local_services.filter(backend_id__in=stale_services))
+        stats = changes.apply()
+
+        # Target workloads of new services are set after services are created
+        for local_service in changes.created:
+            remote_service = remote_service_map[local_service.backend_id]
             workloads = [
                 local_workloads_map[workload_id]
                 for workload_id in remote_service.get('targetWorkloadIds', [])
             ]
             local_service.target_workloads.set(workloads)
-
-        local_services.filter(backend_id__in=stale_services).delete()
+        return stats
 
     def get_service_yaml(self, service: models.Service):
         return self.client.get_service_yaml(
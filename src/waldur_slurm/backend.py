@@ -1,22 +1,33 @@
 import logging
-import operator
 import re
-from functools import reduce
 
 from django.conf import settings as django_settings
 from django.db import transaction
 from django.utils import timezone
 
+from waldur_core.core import utils as core_utils
 from waldur_core.structure import ServiceBackend, ServiceBackendError
+from waldur_core.structure import utils as structure_utils
 from waldur_freeipa import models as freeipa_models
 from waldur_slurm.client import SlurmClient
 from waldur_slurm.client_moab import MoabClient
+from waldur_slurm.parser import SlurmUsageReport
 from waldur_slurm.structures import Quotas
 
-from . import base, models
+from . import base, models, utils
 
 logger = logging.getLogger(__name__)
 
+
+def get_quotas(usage):
+    return Quotas(
+        cpu=usage.cpu_usage,
+        gpu=usage.gpu_usage,
+        ram=usage.ram_usage,
+        deposit=usage.deposit_usage,
+    )
+
+
 ## Class to connect Slurm backend to waldur
 class SlurmBackend(ServiceBackend):
     def __init__(self, settings):
@@ -55,10 +66,28 @@ class SlurmBackend(ServiceBackend):
             for profile in freeipa_models.Profile.objects.all()
         }
 
+        usernames = []
         for user in allocation.service_project_link.project.customer.get_users():
             username = freeipa_profiles.get(user)
             if username:
-                self.add_user(allocation, username.lower())
+                usernames.append(username.lower())
+
+        if not usernames:
+            return
+
+        account = self.get_allocation_account(allocation)
+        default_account = self.settings.options.get('default_account')
+        existing = {
+            association.user
+            for association in self.client.list_associations(usernames, [account])
+        }
+        self.client.create_associations(
+            [
+                (username, account, default_account)
+                for username in usernames
+                if username not in existing
+            ]
+        )
 
     def create_allocation(self, allocation):
         project = allocation.service_project_link.project
@@ -106,10 +135,7 @@ class SlurmBackend(ServiceBackend):
         ):
             self.delete_customer(project.customer)
 
-    def add_user(self, allocation, username):
-        """
-        Create association between user and SLURM account if it does not exist yet.
-        """
+    def get_allocation_account(self, allocation):
         account = allocation.backend_id
 
         if not account.strip():
@@ -117,6 +143,13 @@ class SlurmBackend(ServiceBackend):
                 'Empty backend_id for allocation: %s' % allocation
             )
 
+        return account
+
+    def add_user(self, allocation, username):
+        """
+        Create association between user and SLURM account if it does not exist yet.
+        """
+        account = self.get_allocation_account(allocation)
         default_account = self.settings.options.get('default_account')
         if not self.client.get_association(username, account):
             self.client.create_association(username, account, default_account)
@@ -125,16 +158,50 @@ class SlurmBackend(ServiceBackend):
         """
         Delete association between user and SLURM account if it exists.
         """
-        account = allocation.backend_id
-
-        if not account.strip():
-            raise ServiceBackendError(
-                'Empty backend_id for allocation: %s' % allocation
-            )
-
+        account = self.get_allocation_account(allocation)
         if self.client.get_association(username, account):
             self.client.delete_association(username, account)
 
+    def add_user_to_allocations(self, username, allocations):
+        """
+        Create associations between user and SLURM accounts which do not exist yet.
+        Missing associations are created using single remote invocation.
+        """
+        accounts = [
+            self.get_allocation_account(allocation) for allocation in allocations
+        ]
+        if not accounts:
+            return
+        default_account = self.settings.options.get('default_account')
+        existing = {
+            association.account
+            for association in self.client.list_associations([username], accounts)
+        }
+        self.client.create_associations(
+            [
+                (username, account, default_account)
+                for account in accounts
+                if account not in existing
+            ]
+        )
+
+    def delete_user_from_allocations(self, username, allocations):
+        """
+        Delete existing associations between user and SLURM accounts.
+        """
+        accounts = [
+            self.get_allocation_account(allocation) for allocation in allocations
+        ]
+        if not accounts:
+            return
+        existing = {
+            association.account
+            for association in self.client.list_associations([username], accounts)
+        }
+        self.client.delete_associations(
+            [(username, account) for account in accounts if account in existing]
+        )
+
     def set_resource_limits(self, allocation):
         # TODO: add default limits configuration (https://opennode.atlassian.net/browse/WAL-3037)
         default_limits = django_settings.WALDUR_SLURM['DEFAULT_LIMITS']
@@ -154,6 +221,10 @@ class SlurmBackend(ServiceBackend):
             if allocation.backend_id
         }
 
+        if self.client.incremental_usage:
+            self.sync_usage_incrementally(waldur_allocations)
+            return
+
         report = self.get_usage_report(waldur_allocations.keys())
         for account, usage in report.items():
             allocation = waldur_allocations.get(account)
@@ -165,6 +236,58 @@ class SlurmBackend(ServiceBackend):
                 continue
             self._update_quotas(allocation, usage)
 
+    @transaction.atomic()
+    def sync_usage_incrementally(self, waldur_allocations):
+        """
+        Fetch usage of jobs which have been running since last synchronization
+        and add it to the usage which has been already accounted.
+        Usage of current month is imported completely during first synchronization.
+
+        Watermark row is locked for the duration of synchronization and it is
+        advanced in the same transaction as usage, so that usage is not
+        accounted twice if synchronization fails or runs concurrently.
+        """
+        watermark, created = models.UsageWatermark.objects.get_or_create(
+            settings=self.settings, defaults={'timestamp': timezone.now()}
+        )
+        watermark = models.UsageWatermark.objects.select_for_update().get(
+            pk=watermark.pk
+        )
+
+        if created:
+            now = watermark.timestamp
+            periods = [(core_utils.month_start(now), now)]
+        else:
+            # Current time is taken after lock is acquired, so that
+            # watermark is not moved backwards by concurrent synchronization.
+            now = timezone.now()
+            periods = utils.split_by_months(watermark.timestamp, now)
+
+        for start, end in periods:
+            report = self.get_usage_report(waldur_allocations.keys(), start, end)
+            for account, usage in report.items():
+                allocation = waldur_allocations.get(account)
+                if not allocation:
+                    logger.debug(
+                        'Skipping usage report for account %s because it is not managed under Waldur',
+                        account,
+                    )
+                    continue
+                if created:
+                    self._update_quotas(allocation, usage)
+                else:
+                    self._add_quotas(allocation, usage, start)
+
+        watermark.timestamp = now
+        watermark.save(update_fields=['timestamp'])
+
+    def get_usage_watermark(self):
+        return (
+            models.UsageWatermark.objects.filter(settings=self.settings)
+            .values_list('timestamp', flat=True)
+            .first()
+        )
+
     def pull_allocation(self, allocation):
         account = allocation.backend_id
 
@@ -173,7 +296,14 @@ class SlurmBackend(ServiceBackend):
                 'Empty backend_id for allocation: %s' % allocation
             )
 
-        report = self.get_usage_report([account])
+        start, end = None, None
+        if self.client.incremental_usage:
+            # Usage is not fetched beyond watermark because otherwise
+            # it would be accounted twice during next synchronization.
+            start = core_utils.month_start(timezone.now())
+            end = max(start, self.get_usage_watermark() or timezone.now())
+
+        report = self.get_usage_report([account], start, end)
         usage = report.get(account)
         if not usage:
             usage = {'TOTAL_ACCOUNT_USAGE': Quotas()}
@@ -181,18 +311,17 @@ class SlurmBackend(ServiceBackend):
         limits = self.get_allocation_limits(account)
         self._update_limits(allocation, limits)
 
-    def get_usage_report(self, accounts):
-        report = {}
-        lines = self.client.get_usage_report(accounts)
+    def get_usage_report(self, accounts, start=None, end=None):
+        lines = self.client.get_usage_report(accounts, start, end)
+        if isinstance(lines, SlurmUsageReport):
+            return lines.aggregate()
 
+        report = {}
         for line in lines:
-            report.setdefault(line.account, {}).setdefault(line.user, Quotas())
-            report[line.account][line.user] += line.quotas
-
-        for usage in report.values():
-            quotas = usage.values()
-            total = reduce(operator.add, quotas)
-            usage['TOTAL_ACCOUNT_USAGE'] = total
+            quotas = line.quotas
+            usage = report.setdefault(line.account, {'TOTAL_ACCOUNT_USAGE': Quotas()})
+            usage[line.user] = usage.get(line.user, Quotas()) + quotas
+            usage['TOTAL_ACCOUNT_USAGE'] += quotas
 
         return report
 
@@ -225,12 +354,6 @@ class SlurmBackend(ServiceBackend):
             update_fields=['cpu_usage', 'gpu_usage', 'ram_usage', 'deposit_usage']
         )
 
-        usernames = usage.keys()
-        usermap = {
-            profile.username: profile.user
-            for profile in freeipa_models.Profile.objects.filter(username__in=usernames)
-        }
-
         allocation_usage, _ = models.AllocationUsage.objects.update_or_create(
             allocation=allocation,
             year=timezone.now().year,
@@ -242,19 +365,77 @@ class SlurmBackend(ServiceBackend):
                 'deposit_usage': quotas.deposit,
             },
         )
+        self._update_user_usage(allocation_usage, usage)
+
+    @transaction.atomic()
+    def _add_quotas(self, allocation, usage, date):
+        """
+        Add usage of the period to monthly usage of the allocation.
+        """
+        quotas = usage.pop('TOTAL_ACCOUNT_USAGE')
+        (
+            allocation_usage,
+            _,
+        ) = models.AllocationUsage.objects.select_for_update().get_or_create(
+            allocation=allocation, year=date.year, month=date.month
+        )
+        total = get_quotas(allocation_usage) + quotas
+        allocation_usage.cpu_usage = total.cpu
+        allocation_usage.gpu_usage = total.gpu
+        allocation_usage.ram_usage = total.ram
+        allocation_usage.deposit_usage = total.deposit
+        allocation_usage.save()
+
+        now = timezone.localtime()
+        if (date.year, date.month) == (now.year, now.month):
+            allocation.cpu_usage = total.cpu
+            allocation.gpu_usage = total.gpu
+            allocation.ram_usage = total.ram
+            allocation.deposit_usage = total.deposit
+            allocation.save(
+                update_fields=['cpu_usage', 'gpu_usage', 'ram_usage', 'deposit_usage']
+            )
+
+        self._update_user_usage(allocation_usage, usage, increment=True)
 
+    def _update_user_usage(self, allocation_usage, usage, increment=False):
+        usermap = {
+            profile.username: profile.user
+            for profile in freeipa_models.Profile.objects.filter(
+                username__in=usage.keys()
+            )
+        }
+        existing = {
+            user_usage.username: user_usage
+            for user_usage in models.AllocationUserUsage.objects.filter(
+                allocation_usage=allocation_usage, username__in=usage.keys()
+            )
+        }
+
+        changes = structure_utils.ChangeSet(models.AllocationUserUsage)
         for username, quotas in usage.items():
-            models.AllocationUserUsage.objects.update_or_create(
-                allocation_usage=allocation_usage,
+            user_usage = existing.get(username)
+            if not user_usage:
+                user_usage = models.AllocationUserUsage(
+                    allocation_usage=allocation_usage, username=username
+                )
+            elif increment:
+                quotas = get_quotas(user_usage) + quotas
+
+            values = dict(
                 user=usermap.get(username),
-                username=username,
-                defaults={
-                    'cpu_usage': quotas.cpu,
-                    'gpu_usage': quotas.gpu,
-                    'ram_usage': quotas.ram,
-                    'deposit_usage': quotas.deposit,
-                },
+                cpu_usage=quotas.cpu,
+                gpu_usage=quotas.gpu,
+                ram_usage=quotas.ram,
+                deposit_usage=quotas.deposit,
             )
+            if user_usage.pk:
+                changes.set_values(user_usage, **values)
+            else:
+                for field, value in values.items():
+                    setattr(user_usage, field, value)
+                changes.create(user_usage)
+        changes.apply()
 
     def create_customer(self, customer):
         customer_name = self.get_customer_name(customer)
@@ -1,19 +1,30 @@
 import abc
+import fcntl
+import hashlib
 import logging
+import os
+import re
 import subprocess  # noqa: S404
 
+from django.conf import settings
 from django.utils.functional import cached_property
 
-from .structures import Quotas
+from .structures import CommandResult, Quotas
 
 logger = logging.getLogger(__name__)
 
+BATCH_MARKER = '__WALDUR_BATCH_RESULT__'
+BATCH_MARKER_RE = re.compile(r'^(.*)%s:(\d+)$' % BATCH_MARKER)
+
 
 class BatchError(Exception):
     pass
 
 
 class BaseBatchClient(metaclass=abc.ABCMeta):
+    # Whether usage report can be fetched for arbitrary period
+    incremental_usage = False
+
     def __init__(self, hostname, key_path, username='root', port=22, use_sudo=False):
         self.hostname = hostname
         self.key_path = key_path
@@ -101,36 +112,136 @@ class BaseBatchClient(metaclass=abc.ABCMeta):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def get_usage_report(self, accounts):
+    def get_usage_report(self, accounts, start=None, end=None):
         """
         Get usages records.
         :param accounts: list[string]
-        :return: list[BaseReportLine]
+        :param start: [datetime] start of period. Current month is used by default.
+        :param end: [datetime] end of period. Supported only if incremental_usage is set.
+        :return: iterable[BaseReportLine] or parser.SlurmUsageReport
         """
         raise NotImplementedError()
 
-    def execute_command(self, command):
-        server = '%s@%s' % (self.username, self.hostname)
-        port = str(self.port)
-        if self.use_sudo:
-            account_command = ['sudo']
-        else:
-            account_command = []
+    def list_associations(self, users, accounts):
+        """
+        Get associations of users and accounts.
+        :param users: list[string] user names
+        :param accounts: list[string] account names
+        :return: list[structures.Association object]
+        """
+        associations = []
+        for user in users:
+            for account in accounts:
+                association = self.get_association(user, account)
+                if association:
+                    associations.append(association)
+        return associations
+
+    def create_associations(self, associations):
+        """
+        Create associations of users and accounts.
+        :param associations: list[tuple(username, account, default_account)]
+        :return: None
+        """
+        for username, account, default_account in associations:
+            self.create_association(username, account, default_account)
 
-        account_command.extend(command)
-        ssh_command = [
-            'ssh',
+    def delete_associations(self, associations):
+        """
+        Delete associations of users and accounts.
+        :param associations: list[tuple(username, account)]
+        :return: None
+        """
+        for username, account in associations:
+            self.delete_association(username, account)
+
+    def _get_ssh_options(self):
+        return [
             '-o',
             'UserKnownHostsFile=/dev/null',
             '-o',
             'StrictHostKeyChecking=no',
-            server,
             '-p',
-            port,
+            str(self.port),
             '-i',
             self.key_path,
-            ' '.join(account_command),
         ]
+
+    def _get_destination(self):
+        return '%s@%s' % (self.username, self.hostname)
+
+    def get_ssh_command(self, remote_command):
+        ssh_command = ['ssh'] + self._get_ssh_options()
+        # Connection to cluster host is kept open by OpenSSH control master
+        # so that subsequent commands are multiplexed over the same channel.
+        # Master is started separately, so that it does not inherit output pipes.
+        if settings.WALDUR_SLURM['SSH_CONTROL_PERSIST']:
+            ssh_command.extend(
+                [
+                    '-o',
+                    'ControlMaster=no',
+                    '-o',
+                    'ControlPath=%s' % settings.WALDUR_SLURM['SSH_CONTROL_PATH'],
+                ]
+            )
+        ssh_command.extend([self._get_destination(), remote_command])
+        return ssh_command
+
+    def get_control_master_command(self, *args):
+        return (
+            ['ssh']
+            + self._get_ssh_options()
+            + [
+                '-o',
+                'ControlPath=%s' % settings.WALDUR_SLURM['SSH_CONTROL_PATH'],
+                '-o',
+                'ControlPersist=%s' % settings.WALDUR_SLURM['SSH_CONTROL_PERSIST'],
+            ]
+            + list(args)
+            + [self._get_destination()]
+        )
+
+    def _get_control_master_lock_path(self):
+        destination = '%s:%s' % (self._get_destination(), self.port)
+        digest = hashlib.sha256(destination.encode('utf-8')).hexdigest()
+        directory = os.path.dirname(settings.WALDUR_SLURM['SSH_CONTROL_PATH'])
+        return os.path.join(directory, 'waldur-ssh-%s.lock' % digest)
+
+    def _start_control_master(self):
+        """
+        Start control master in background unless it is already running.
+        Its standard streams are detached, otherwise subprocess which has started it
+        would wait for end of output of master process instead of its own command.
+        If master is not started, command falls back to regular SSH connection.
+        """
+        devnull = {
+            'stdin': subprocess.DEVNULL,
+            'stdout': subprocess.DEVNULL,
+            'stderr': subprocess.DEVNULL,
+        }
+        # Lock prevents concurrent workers from starting duplicate masters
+        with open(self._get_control_master_lock_path(), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            check_command = self.get_control_master_command('-O', 'check')
+            if subprocess.call(check_command, **devnull) == 0:  # noqa: S603
+                return
+            master_command = self.get_control_master_command('-f', '-N', '-M')
+            logger.debug('Starting SSH control master: %s', ' '.join(master_command))
+            if subprocess.call(master_command, **devnull) != 0:  # noqa: S603
+                logger.warning(
+                    'Unable to start SSH control master for %s.',
+                    self._get_destination(),
+                )
+
+    def _format_command(self, command):
+        if self.use_sudo:
+            command = ['sudo'] + list(command)
+        return ' '.join(command)
+
+    def _run(self, remote_command):
+        if settings.WALDUR_SLURM['SSH_CONTROL_PERSIST']:
+            self._start_control_master()
+        ssh_command = self.get_ssh_command(remote_command)
         try:
             logger.debug('Executing SSH command: %s', ' '.join(ssh_command))
             return subprocess.check_output(  # noqa: S603
@@ -138,12 +249,52 @@ class BaseBatchClient(metaclass=abc.ABCMeta):
             )
         except subprocess.CalledProcessError as e:
             logger.exception('Failed to execute command "%s".', ssh_command)
-            stdout = e.output or ''
-            lines = stdout.splitlines()
-            if len(lines) > 0 and lines[0].startswith('Warning: Permanently added'):
-                lines = lines[1:]
-            stdout = '\n'.join(lines)
-            raise BatchError(stdout)
+            raise BatchError(self._strip_warning(e.output or ''))
+
+    def _strip_warning(self, output):
+        lines = output.splitlines()
+        if len(lines) > 0 and lines[0].startswith('Warning: Permanently added'):
+            lines = lines[1:]
+        return '\n'.join(lines)
+
+    def execute_command(self, command):
+        return self._run(self._format_command(command))
+
+    def execute_commands(self, commands):
+        """
+        Execute several commands using single remote invocation.
+        Each command is followed by marker line with its exit status
+        so that output is split back into per-command results.
+        :param commands: list[list[string]]
+        :return: list[structures.CommandResult object]
+        """
+        if not commands:
+            return []
+
+        script = '\n'.join(
+            '%s 2>&1; echo "%s:$?"' % (self._format_command(command), BATCH_MARKER)
+            for command in commands
+        )
+        output = self._strip_warning(self._run(script))
+
+        results = []
+        lines = []
+        for line in output.splitlines():
+            match = BATCH_MARKER_RE.match(line)
+            if not match:
+                lines.append(line)
+                continue
+            if match.group(1):
+                lines.append(match.group(1))
+            results.append(CommandResult('\n'.join(lines), int(match.group(2))))
+            lines = []
+
+        if len(results) != len(commands):
+            raise BatchError(
+                'Unable to parse output of batch command. Expected %s results, got %s.'
+                % (len(commands), len(results))
+            )
+        return results
 
 
 class BaseReportLine(metaclass=abc.ABCMeta):
@@ -2,9 +2,9 @@ import logging
 import re
 
 from waldur_slurm.base import BaseBatchClient, BatchError
-from waldur_slurm.parser import SlurmAssociationLine, SlurmReportLine
+from waldur_slurm.parser import SlurmAssociationLine, SlurmUsageReport
 from waldur_slurm.structures import Account, Association
-from waldur_slurm.utils import format_current_month
+from waldur_slurm.utils import format_current_month, format_datetime
 
 
 class SlurmError(BatchError):
@@ -13,13 +13,15 @@ class SlurmError(BatchError):
 
 logger = logging.getLogger(__name__)
 
-## Class to define Slurm Config and Policies
+
 class SlurmClient(BaseBatchClient):
     """
     This class implements Python client for SLURM.
     See also: https://slurm.schedmd.com/sacctmgr.html
     """
 
+    incremental_usage = True
+
     def list_accounts(self):
         output = self._execute_command(['list', 'account'])
         return [
@@ -115,21 +117,72 @@ class SlurmClient(BaseBatchClient):
             ]
         )
 
-    def get_usage_report(self, accounts):
-        month_start, month_end = format_current_month()
+    def list_associations(self, users, accounts):
+        output = self._execute_command(
+            [
+                'show',
+                'association',
+                'where',
+                'user=%s' % ','.join(users),
+                'account=%s' % ','.join(accounts),
+            ],
+            immediate=False,
+        )
+        return [
+            self._parse_association(line) for line in output.splitlines() if '|' in line
+        ]
+
+    def create_associations(self, associations):
+        self._execute_commands(
+            [
+                [
+                    'add',
+                    'user',
+                    username,
+                    'account=%s' % account,
+                    'DefaultAccount=%s' % (default_account or ''),
+                ]
+                for username, account, default_account in associations
+            ]
+        )
+
+    def delete_associations(self, associations):
+        self._execute_commands(
+            [
+                [
+                    'remove',
+                    'user',
+                    'where',
+                    'name=%s' % username,
+                    'and',
+                    'account=%s' % account,
+                ]
+                for username, account in associations
+            ]
+        )
+
+    def get_usage_report(self, accounts, start=None, end=None):
+        """
+        Jobs are truncated to the period so that elapsed time of job
+        running across several periods is accounted in each of them.
+        """
+        if start and end:
+            start, end = format_datetime(start), format_datetime(end)
+        else:
+            start, end = format_current_month()
 
         args = [
             '--noconvert',
             '--truncate',
             '--allocations',
             '--allusers',
-            '--starttime=%s' % month_start,
-            '--endtime=%s' % month_end,
+            '--starttime=%s' % start,
+            '--endtime=%s' % end,
             '--accounts=%s' % ','.join(accounts),
             '--format=Account,ReqTRES,Elapsed,User',
         ]
         output = self._execute_command(args, 'sacct', immediate=False)
-        return [SlurmReportLine(line) for line in output.splitlines() if '|' in line]
+        return SlurmUsageReport.parse(output)
 
     def get_resource_limits(self, account):
         args = [
@@ -144,9 +197,29 @@ class SlurmClient(BaseBatchClient):
             SlurmAssociationLine(line) for line in output.splitlines() if '|' in line
         ]
 
-    def _execute_command(self, command, command_name='sacctmgr', immediate=True):
+    def _get_command(self, command, command_name='sacctmgr', immediate=True):
         account_command = [command_name, '--parsable2', '--noheader']
         if immediate:
             account_command.append('--immediate')
         account_command.extend(command)
-        return self.execute_command(account_command)
+        return account_command
+
+    def _execute_command(self, command, command_name='sacctmgr', immediate=True):
+        return self.execute_command(self._get_command(command, command_name, immediate))
+
+    def _execute_commands(self, commands):
+        """
+        Execute sacctmgr commands using single SSH invocation.
+        All commands are executed even if some of them have failed.
+        """
+        results = self.execute_commands(
+            [self._get_command(command) for command in commands]
+        )
+        errors = [
+            '%s: %s' % (' '.join(command), result.output)
+            for command, result in zip(commands, results)
+            if result.returncode != 0
+        ]
+        if errors:
+            raise SlurmError('\n'.join(errors))
+        return [result.output for result in results]
@@ -92,7 +92,7 @@ class MoabClient(BaseBatchClient):
         }
         return self.execute_command(command.split())
 
-    def get_usage_report(self, accounts):
+    def get_usage_report(self, accounts, start=None, end=None):
         template = (
             'mam-list-usagerecords --raw --quiet --show '
             'Account,Processors,GPUs,Memory,Duration,User,Charge,Nodes '
@@ -9,6 +9,10 @@ class SlurmExtension(WaldurExtension):
             'PROJECT_PREFIX': 'waldur_project_',
             'ALLOCATION_PREFIX': 'waldur_allocation_',
             'PRIVATE_KEY_PATH': '/etc/waldur/id_rsa',
+            # Number of seconds SSH connection to cluster host is kept open
+            # after last command. Set to 0 in order to disable multiplexing.
+            'SSH_CONTROL_PERSIST': 600,
+            'SSH_CONTROL_PATH': '/tmp/waldur-ssh-%C',  # noqa: S108
             'DEFAULT_LIMITS': {
                 'CPU': 16000,  # Measured unit is CPU-hours
                 'GPU': 400,  # Measured unit is GPU-hours
@@ -0,0 +1,36 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('structure', '0016_customerpermissionreview'),
+        ('waldur_slurm', '0015_allocation_error_traceback'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsageWatermark',
+            fields=[
+                (
+                    'id',
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('timestamp', models.DateTimeField()),
+                (
+                    'settings',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='structure.ServiceSettings',
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -141,3 +141,18 @@ class AllocationUserUsage(slurm_mixins.UsageMixin):
 
     def __repr__(self) -> str:
         return self.__str__()
+
+
+class UsageWatermark(models.Model):
+    """
+    Point in time up to which usage of jobs of the cluster has been accounted.
+    Only usage of jobs running after it is fetched during next synchronization.
+    """
+
+    settings = models.OneToOneField(
+        to=structure_models.ServiceSettings, on_delete=models.CASCADE, related_name='+',
+    )
+    timestamp = models.DateTimeField()
+
+    def __str__(self):
+        return "%s: %s" % (self.settings, self.timestamp)
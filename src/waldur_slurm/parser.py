@@ -1,4 +1,5 @@
-import datetime
+import array
+import io
 import logging
 
 from django.utils.functional import cached_property
@@ -6,6 +7,7 @@ from django.utils.functional import cached_property
 from waldur_core.core import utils as core_utils
 
 from .base import BaseReportLine
+from .structures import Quotas
 
 logger = logging.getLogger(__name__)
 
@@ -14,45 +16,30 @@ def parse_duration(value):
     """
     Returns duration in minutes as an integer number.
     For example 00:01:00 is equal to 1
+    Supported formats are [DD-]HH:MM:SS[.ffffff] and MM:SS.
     """
-    days_sep = '-'
-    us_sep = '.'
-    simple_fmt = '%H:%M:%S'
-    days_fmt = '%d-%H:%M:%S'
-    us_fmt = '%H:%M:%S.%f'
-    days_us_fmt = '%d-%H:%M:%S.%f'
-
-    if days_sep not in value:
-        if us_sep in value:  # Simple time with microseconds
-            dt = datetime.datetime.strptime(value, us_fmt)
-            delta = datetime.timedelta(
-                hours=dt.hour,
-                minutes=dt.minute,
-                seconds=dt.second,
-                microseconds=dt.microsecond,
-            )
-        else:  # Simple time
-            dt = datetime.datetime.strptime(value, simple_fmt)
-            delta = datetime.timedelta(
-                hours=dt.hour, minutes=dt.minute, seconds=dt.second
-            )
-    else:
-        if us_sep in value:  # Simple time with microseconds and days
-            dt = datetime.datetime.strptime(value, days_us_fmt)
-            delta = datetime.timedelta(
-                days=dt.day,
-                hours=dt.hour,
-                minutes=dt.minute,
-                seconds=dt.second,
-                microseconds=dt.microsecond,
-            )
-        else:  # Simple time with days
-            dt = datetime.datetime.strptime(value, days_fmt)
-            delta = datetime.timedelta(
-                days=dt.day, hours=dt.hour, minutes=dt.minute, seconds=dt.second
-            )
-
-    return int(delta.total_seconds()) // 60
+    days = 0
+    if '-' in value:
+        days, value = value.split('-', 1)
+        days = int(days)
+    value = value.split('.', 1)[0]
+    seconds = 0
+    for part in value.split(':'):
+        seconds = seconds * 60 + int(part)
+    return (days * 86400 + seconds) // 60
+
+
+def parse_tres_value(value):
+    """
+    Fast path of core_utils.parse_int for values such as 51200M.
+    """
+    unit = core_utils.UNITS.get(value[-1:])
+    try:
+        if unit:
+            return int(value[:-1]) * unit
+        return int(value)
+    except ValueError:
+        return core_utils.parse_int(value)
 
 
 class SlurmReportLine(BaseReportLine):
@@ -120,3 +107,105 @@ class SlurmAssociationLine(SlurmReportLine):
     @cached_property
     def resource_limits(self):
         return self._resources
+
+
+class SlurmUsageReport:
+    """
+    Columnar representation of sacct report.
+    Each job is stored as a row of typed arrays instead of separate object
+    so that report with millions of jobs is parsed and aggregated quickly.
+    """
+
+    TRES_COLUMNS = {
+        'cpu': 'cpu',
+        'gres/gpu': 'gpu',
+        'mem': 'ram',
+        'node': 'node',
+    }
+
+    def __init__(self):
+        self.names = []
+        self.accounts = array.array('L')
+        self.users = array.array('L')
+        self.cpu = array.array('q')
+        self.gpu = array.array('q')
+        self.ram = array.array('q')
+        self.node = array.array('q')
+        self.duration = array.array('q')
+
+    def __len__(self):
+        return len(self.accounts)
+
+    @classmethod
+    def parse(cls, output):
+        """
+        Parse output of sacct --parsable2 --format=Account,ReqTRES,Elapsed,User
+        """
+        report = cls()
+        codes = {}
+        columns = {
+            key: getattr(report, column) for key, column in cls.TRES_COLUMNS.items()
+        }
+
+        for line in io.StringIO(output):
+            if '|' not in line:
+                continue
+            parts = line.rstrip('\n').split('|')
+            account = parts[0].strip()
+            user = parts[3]
+            for name, column in ((account, report.accounts), (user, report.users)):
+                code = codes.get(name)
+                if code is None:
+                    code = codes[name] = len(report.names)
+                    report.names.append(name)
+                column.append(code)
+
+            values = dict.fromkeys(columns, 0)
+            if parts[1]:
+                for pair in parts[1].split(','):
+                    key, _, value = pair.partition('=')
+                    if key in values:
+                        values[key] = parse_tres_value(value)
+            for key, column in columns.items():
+                column.append(values[key])
+            report.duration.append(parse_duration(parts[2]))
+
+        # Memory is converted from Bytes to MB
+        report.ram = array.array('q', (value // 2 ** 20 for value in report.ram))
+        return report
+
+    def aggregate(self):
+        """
+        Aggregate usage per account and user in one pass.
+        :return: dict[account, dict[user, structures.Quotas]] including
+        total account usage stored as TOTAL_ACCOUNT_USAGE.
+        """
+        totals = {}
+        rows = zip(
+            self.accounts,
+            self.users,
+            self.cpu,
+            self.gpu,
+            self.ram,
+            self.node,
+            self.duration,
+        )
+        for account, user, cpu, gpu, ram, node, duration in rows:
+            factor = duration * node
+            usage = totals.get((account, user))
+            if usage is None:
+                totals[(account, user)] = [cpu * factor, gpu * factor, ram * factor]
+            else:
+                usage[0] += cpu * factor
+                usage[1] += gpu * factor
+                usage[2] += ram * factor
+
+        report = {}
+        for (account, user), (cpu, gpu, ram) in totals.items():
+            usage = report.setdefault(
+                self.names[account], {'TOTAL_ACCOUNT_USAGE': Quotas()}
+            )
+            quotas = Quotas(cpu, gpu, ram)
+            usage[self.names[user]] = quotas
+            usage['TOTAL_ACCOUNT_USAGE'] += quotas
+        return report
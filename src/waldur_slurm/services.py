@@ -0,0 +1,22 @@
+from waldur_core.structure import permissions as structure_permissions
+from waldur_core.structure import services as structure_services
+
+from . import executors, serializers
+
+
+def create_allocation(user, data):
+    return structure_services.create_resource(
+        user,
+        serializers.AllocationSerializer,
+        executors.AllocationCreateExecutor,
+        data,
+    )
+
+
+def delete_allocation(user, allocation):
+    structure_services.delete_resource(
+        user,
+        allocation,
+        executors.AllocationDeleteExecutor,
+        checks=[structure_permissions.is_owner],
+    )
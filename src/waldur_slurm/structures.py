@@ -2,6 +2,7 @@ import collections
 
 Account = collections.namedtuple('Account', ['name', 'description', 'organization'])
 Association = collections.namedtuple('Association', ['account', 'user', 'value'])
+CommandResult = collections.namedtuple('CommandResult', ['output', 'returncode'])
 
 
 class Quotas:
@@ -1,3 +1,4 @@
+import collections
 import itertools
 
 from celery import shared_task
@@ -45,18 +46,38 @@ def get_structure_allocations(structure):
         return []
 
 
+def group_allocations_by_settings(allocations):
+    """
+    Group allocations by service settings so that associations
+    for each cluster are processed in batch.
+    """
+    groups = collections.defaultdict(dict)
+    for allocation in allocations:
+        settings = allocation.service_project_link.service.settings
+        groups[settings][allocation.pk] = allocation
+    return [list(group.values()) for group in groups.values()]
+
+
+def add_user_to_allocations(username, allocations):
+    for group in group_allocations_by_settings(allocations):
+        group[0].get_backend().add_user_to_allocations(username, group)
+
+
+def delete_user_from_allocations(username, allocations):
+    for group in group_allocations_by_settings(allocations):
+        group[0].get_backend().delete_user_from_allocations(username, group)
+
+
 @shared_task(name='waldur_slurm.add_user')
 def add_user(serialized_profile):
     profile = core_utils.deserialize_instance(serialized_profile)
-    for allocation in get_user_allocations(profile.user):
-        allocation.get_backend().add_user(allocation, profile.username)
+    add_user_to_allocations(profile.username, get_user_allocations(profile.user))
 
 
 @shared_task(name='waldur_slurm.delete_user')
 def delete_user(serialized_profile):
     profile = core_utils.deserialize_instance(serialized_profile)
-    for allocation in get_user_allocations(profile.user):
-        allocation.get_backend().delete_user(allocation, profile.username)
+    delete_user_from_allocations(profile.username, get_user_allocations(profile.user))
 
 
 @shared_task(name='waldur_slurm.process_role_granted')
@@ -65,9 +86,7 @@ def process_role_granted(serialized_profile, serialized_structure):
     structure = core_utils.deserialize_instance(serialized_structure)
 
     allocations = get_structure_allocations(structure)
-
-    for allocation in allocations:
-        allocation.get_backend().add_user(allocation, profile.username)
+    add_user_to_allocations(profile.username, allocations)
 
 
 @shared_task(name='waldur_slurm.process_role_revoked')
@@ -76,9 +95,7 @@ def process_role_revoked(serialized_profile, serialized_structure):
     structure = core_utils.deserialize_instance(serialized_structure)
 
     allocations = get_structure_allocations(structure)
-
-    for allocation in allocations:
-        allocation.get_backend().delete_user(allocation, profile.username)
+    delete_user_from_allocations(profile.username, allocations)
 
 
 @shared_task(name='waldur_slurm.add_allocation_users')
@@ -104,6 +104,12 @@ class BackendTest(TestCase):
             'UserKnownHostsFile=/dev/null',
             '-o',
             'StrictHostKeyChecking=no',
+            '-o',
+            'ControlMaster=auto',
+            '-o',
+            'ControlPath=/tmp/waldur-ssh-%C',
+            '-o',
+            'ControlPersist=600',
             'root@localhost',
             '-p',
             '22',
@@ -203,6 +209,91 @@ class BackendTest(TestCase):
             self.assertEqual(self.allocation.ram_limit, ram_limit_old)
 
 
+@freeze_time('2017-10-16')
+@mock.patch('subprocess.check_output')
+class IncrementalUsageTest(TestCase):
+    def setUp(self):
+        self.fixture = fixtures.SlurmFixture()
+        self.allocation = self.fixture.allocation
+        self.backend = self.allocation.get_backend()
+        freeipa_models.Profile.objects.create(
+            user=self.fixture.manager, username='user1'
+        )
+
+    def sync(self, check_output):
+        check_output.return_value = VALID_REPORT.replace(
+            'allocation1', self.allocation.backend_id
+        )
+        self.backend.sync_usage()
+        self.allocation.refresh_from_db()
+
+    def test_usage_of_new_jobs_is_added_to_accounted_usage(self, check_output):
+        self.sync(check_output)
+        with freeze_time('2017-10-17'):
+            self.sync(check_output)
+
+        self.assertEqual(self.allocation.cpu_usage, 2 * (1 + 2 * 2 * 2))
+        allocation_usage = models.AllocationUsage.objects.get(
+            allocation=self.allocation, year=2017, month=10
+        )
+        self.assertEqual(allocation_usage.cpu_usage, 2 * (1 + 2 * 2 * 2))
+        user_usage = models.AllocationUserUsage.objects.get(
+            allocation_usage=allocation_usage, username='user1'
+        )
+        self.assertEqual(user_usage.cpu_usage, 2)
+        self.assertEqual(user_usage.user, self.fixture.manager)
+
+    def test_only_jobs_running_after_watermark_are_fetched(self, check_output):
+        self.sync(check_output)
+        with freeze_time('2017-10-17'):
+            self.sync(check_output)
+
+        command = check_output.call_args[0][0][-1]
+        self.assertIn('--starttime=2017-10-16T00:00:00', command)
+        self.assertIn('--endtime=2017-10-17T00:00:00', command)
+        watermark = models.UsageWatermark.objects.get(
+            settings=self.fixture.service.settings
+        )
+        self.assertEqual(watermark.timestamp.day, 17)
+
+    def test_usage_is_split_by_months(self, check_output):
+        self.sync(check_output)
+        with freeze_time('2017-11-02'):
+            self.sync(check_output)
+
+        self.assertEqual(check_output.call_count, 3)
+        october = models.AllocationUsage.objects.get(
+            allocation=self.allocation, month=10
+        )
+        november = models.AllocationUsage.objects.get(
+            allocation=self.allocation, month=11
+        )
+        self.assertEqual(october.cpu_usage, 2 * (1 + 2 * 2 * 2))
+        self.assertEqual(november.cpu_usage, 1 + 2 * 2 * 2)
+        self.assertEqual(self.allocation.cpu_usage, 1 + 2 * 2 * 2)
+
+    def test_usage_is_not_accounted_twice_if_synchronization_fails(self, check_output):
+        self.sync(check_output)
+        report = VALID_REPORT.replace('allocation1', self.allocation.backend_id)
+        with freeze_time('2017-11-02'):
+            # Report of the second period is not available
+            check_output.side_effect = [report, Exception('sacct has failed')]
+            with self.assertRaises(Exception):
+                self.backend.sync_usage()
+
+            check_output.side_effect = None
+            self.sync(check_output)
+
+        october = models.AllocationUsage.objects.get(
+            allocation=self.allocation, month=10
+        )
+        self.assertEqual(october.cpu_usage, 2 * (1 + 2 * 2 * 2))
+        watermark = models.UsageWatermark.objects.get(
+            settings=self.fixture.service.settings
+        )
+        self.assertEqual(watermark.timestamp.month, 11)
+
+
 class BackendMOABTest(TestCase):
     def setUp(self):
         self.fixture = fixtures.SlurmFixture()
@@ -0,0 +1,71 @@
+import threading
+
+from django.test import TestCase
+
+from waldur_slurm.client import SlurmClient, SlurmError
+
+from . import utils
+
+
+class SlurmClientBatchTest(TestCase):
+    def setUp(self):
+        self.client = SlurmClient(hostname='cluster', key_path='/etc/waldur/id_rsa')
+
+    def test_commands_are_executed_using_single_ssh_invocation(self):
+        with utils.FakeSSH() as ssh:
+            self.client.create_associations(
+                [('user1', 'account1', 'default'), ('user2', 'account1', 'default')]
+            )
+            self.assertEqual(len(ssh.commands), 1)
+            self.assertIn('ControlPath=%s' % ssh.control_path, ssh.commands[0])
+
+    def test_output_is_split_per_command(self):
+        with utils.FakeSSH():
+            results = self.client.execute_commands(
+                [['sacctmgr', 'show', 'user1'], ['sacctmgr', 'show', 'user2']]
+            )
+        self.assertEqual(
+            [result.output for result in results], ['show|user1', 'show|user2']
+        )
+        self.assertEqual([result.returncode for result in results], [0, 0])
+
+    def test_failed_command_does_not_prevent_execution_of_other_commands(self):
+        with utils.FakeSSH():
+            results = self.client.execute_commands(
+                [['sacctmgr', 'fail'], ['sacctmgr', 'show', 'user2']]
+            )
+        self.assertEqual(results[0].returncode, 1)
+        self.assertEqual(results[1].output, 'show|user2')
+
+    def test_error_is_raised_if_batched_sacctmgr_command_fails(self):
+        with utils.FakeSSH():
+            with self.assertRaises(SlurmError) as e:
+                self.client.create_associations(
+                    [('fail', 'account1', ''), ('user2', 'account1', '')]
+                )
+        self.assertIn('Invalid user', str(e.exception))
+        self.assertNotIn('user2', str(e.exception))
+
+    @utils.override_plugin_settings(SSH_CONTROL_PERSIST=0)
+    def test_multiplexing_can_be_disabled(self):
+        with utils.FakeSSH() as ssh:
+            self.client.execute_command(['sacctmgr', 'show'])
+            self.assertEqual(len(ssh.calls), 1)
+            self.assertNotIn('ControlPath=%s' % ssh.control_path, ssh.calls[0])
+
+    def test_control_master_is_started_once(self):
+        with utils.FakeSSH() as ssh:
+            self.client.execute_command(['sacctmgr', 'show', 'user1'])
+            self.client.execute_command(['sacctmgr', 'show', 'user2'])
+            masters = [call for call in ssh.calls if '-M' in call]
+            self.assertEqual(len(masters), 1)
+            self.assertEqual(len(ssh.commands), 2)
+
+    def test_command_does_not_wait_for_control_master(self):
+        thread = threading.Thread(
+            target=self.client.execute_command, args=[['sacctmgr', 'show']]
+        )
+        with utils.FakeSSH():
+            thread.start()
+            thread.join(timeout=10)
+            self.assertFalse(thread.is_alive())
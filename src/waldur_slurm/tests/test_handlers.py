@@ -52,11 +52,11 @@ class SlurmAssociationSynchronizationTest(TransactionTestCase):
         self.customer.add_user(self.user, structure_models.CustomerRole.OWNER)
 
         with mock.patch('waldur_slurm.backend.SlurmClient') as mock_client:
-            mock_client().get_association.return_value = False
+            mock_client().list_associations.return_value = []
             tasks.add_user(self.serialized_profile)
             account = allocation.backend_id
-            mock_client().create_association.assert_called_once_with(
-                self.freeipa_profile.username, account, 'waldur_user'
+            mock_client().create_associations.assert_called_once_with(
+                [(self.freeipa_profile.username, account, 'waldur_user')]
             )
 
     def test_when_project_manager_role_is_granted_profile_is_synchronized(self):
@@ -79,9 +79,9 @@ class SlurmAssociationSynchronizationTest(TransactionTestCase):
         self.project.add_user(self.user, structure_models.ProjectRole.MANAGER)
 
         with mock.patch('waldur_slurm.backend.SlurmClient') as mock_client:
-            mock_client().get_association.return_value = False
+            mock_client().list_associations.return_value = []
             tasks.add_user(self.serialized_profile)
             account = allocation.backend_id
-            mock_client().create_association.assert_called_once_with(
-                self.freeipa_profile.username, account, 'waldur_user'
+            mock_client().create_associations.assert_called_once_with(
+                [(self.freeipa_profile.username, account, 'waldur_user')]
             )
@@ -2,7 +2,7 @@ from unittest import mock
 
 from django.test import TestCase
 
-from waldur_slurm.parser import parse_duration
+from waldur_slurm.parser import SlurmUsageReport, parse_duration
 from waldur_slurm.tests import fixtures
 
 VALID_ALLOCATION = 'allocation1'
@@ -77,3 +77,25 @@ class ParserTest(TestCase):
         duration = parse_duration(duration_line)
         expected_duration = 1
         self.assertEqual(duration, expected_duration)
+
+    def test_duration_with_more_than_month_of_days_is_supported(self):
+        self.assertEqual(parse_duration('45-00:00:00'), 45 * 24 * 60)
+
+
+class SlurmUsageReportTest(TestCase):
+    def setUp(self):
+        self.report = SlurmUsageReport.parse(VALID_REPORT + REPORT_WITHOUT_GPU)
+
+    def test_report_is_parsed_into_columns(self):
+        self.assertEqual(len(self.report), 4)
+        self.assertEqual(list(self.report.cpu), [1, 2, 1, 2])
+        self.assertEqual(list(self.report.gpu), [1, 2, 0, 0])
+        self.assertEqual(list(self.report.ram), [51200] * 4)
+        self.assertEqual(list(self.report.duration), [1, 2, 1, 2])
+
+    def test_usage_is_aggregated_per_account_and_user(self):
+        usage = self.report.aggregate()[VALID_ALLOCATION]
+        self.assertEqual(usage['user1'].cpu, 2)
+        self.assertEqual(usage['user2'].cpu, 2 * 2 * 2 * 2)
+        self.assertEqual(usage['TOTAL_ACCOUNT_USAGE'].cpu, 2 * (1 + 2 * 2 * 2))
+        self.assertEqual(usage['TOTAL_ACCOUNT_USAGE'].gpu, 1 + 2 * 2 * 2)
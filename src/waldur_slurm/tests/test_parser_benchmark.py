@@ -0,0 +1,112 @@
+import datetime
+import logging
+import operator
+import os
+import random
+import time
+import unittest
+from functools import reduce
+from unittest import mock
+
+from waldur_slurm import parser
+from waldur_slurm.parser import SlurmReportLine, SlurmUsageReport
+from waldur_slurm.structures import Quotas
+
+logger = logging.getLogger(__name__)
+
+LINES_COUNT = 1000000
+
+
+def legacy_parse_duration(value):
+    """ Duration decoder based on strptime which has been used before """
+    if '-' in value:
+        fmt = '%d-%H:%M:%S.%f' if '.' in value else '%d-%H:%M:%S'
+    else:
+        fmt = '%H:%M:%S.%f' if '.' in value else '%H:%M:%S'
+    dt = datetime.datetime.strptime(value, fmt)
+    delta = datetime.timedelta(
+        days=dt.day if '-' in value else 0,
+        hours=dt.hour,
+        minutes=dt.minute,
+        seconds=dt.second,
+        microseconds=dt.microsecond,
+    )
+    return int(delta.total_seconds()) // 60
+
+
+def legacy_aggregate(output):
+    report = {}
+    lines = [SlurmReportLine(line) for line in output.splitlines() if '|' in line]
+    for line in lines:
+        report.setdefault(line.account, {}).setdefault(line.user, Quotas())
+        report[line.account][line.user] += line.quotas
+
+    for usage in report.values():
+        usage['TOTAL_ACCOUNT_USAGE'] = reduce(operator.add, usage.values())
+    return report
+
+
+def generate_report(count):
+    rnd = random.Random(42)
+    durations = ('00:%02d:%02d', '%02d:%02d:00.000001', '1%d-0%d:00:00')
+    lines = []
+    for _ in range(count):
+        tres = 'cpu=%s,mem=%sM,node=%s' % (
+            rnd.randint(1, 64),
+            rnd.randint(1, 512) * 1024,
+            rnd.randint(1, 4),
+        )
+        if rnd.random() < 0.3:
+            tres += ',gres/gpu=%s,gres/gpu:tesla=1' % rnd.randint(1, 4)
+        duration = rnd.choice(durations) % (rnd.randint(0, 9), rnd.randint(0, 9))
+        lines.append(
+            'allocation%s|%s|%s|user%s|'
+            % (rnd.randint(1, 50), tres, duration, rnd.randint(1, 500))
+        )
+    return '\n'.join(lines)
+
+
+@unittest.skipUnless(
+    os.environ.get('WALDUR_BENCHMARK'), 'Set WALDUR_BENCHMARK=1 to run benchmarks.'
+)
+class SlurmUsageReportBenchmark(unittest.TestCase):
+    """
+    Compare parsing and aggregation of sacct report using report line objects
+    with columnar parser.
+    """
+
+    def setUp(self):
+        self.output = generate_report(LINES_COUNT)
+
+    def measure(self, func):
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started
+
+    def test_benchmark(self):
+        with mock.patch.object(parser, 'parse_duration', legacy_parse_duration):
+            legacy_report, legacy_time = self.measure(
+                lambda: legacy_aggregate(self.output)
+            )
+        report, columnar_time = self.measure(
+            lambda: SlurmUsageReport.parse(self.output).aggregate()
+        )
+
+        self.assertEqual(report.keys(), legacy_report.keys())
+        for account, usage in report.items():
+            for user, quotas in usage.items():
+                expected = legacy_report[account][user]
+                self.assertEqual(
+                    (quotas.cpu, quotas.gpu, quotas.ram),
+                    (expected.cpu, expected.gpu, expected.ram),
+                )
+
+        speedup = legacy_time / columnar_time
+        logger.info(
+            'Lines: %s. Report lines: %.2fs. Columnar: %.2fs. Speed-up: %.1fx.',
+            LINES_COUNT,
+            legacy_time,
+            columnar_time,
+            speedup,
+        )
+        self.assertGreater(speedup, 1)
@@ -1,4 +1,9 @@
 import copy
+import json
+import os
+import sys
+import tempfile
+from unittest import mock
 
 from django.conf import settings
 from django.test import override_settings
@@ -8,3 +13,93 @@ def override_plugin_settings(**kwargs):
     os_settings = copy.deepcopy(settings.WALDUR_SLURM)
     os_settings.update(kwargs)
     return override_settings(WALDUR_SLURM=os_settings)
+
+
+FAKE_SSH = """#!%(python)s
+import json
+import os
+import subprocess
+import sys
+
+args = sys.argv[1:]
+with open(%(log)r, 'a') as log:
+    log.write(json.dumps(args) + '\\n')
+
+options = [arg.split('=', 1) for arg in args if '=' in arg]
+control_path = dict(options).get('ControlPath')
+
+if '-O' in args:
+    sys.exit(0 if os.path.exists(control_path) else 255)
+
+if '-M' in args:
+    open(control_path, 'w').close()
+    # Like real master, background process inherits standard streams
+    # and keeps running until its control socket is removed.
+    subprocess.Popen([
+        sys.executable,
+        '-c',
+        'import os, time\\nwhile os.path.exists(%%r): time.sleep(0.1)' %% control_path,
+    ])
+    sys.exit(0)
+
+# Remote command is executed by local shell instead of SSH daemon
+sys.exit(subprocess.call(['sh', '-c', args[-1]]))
+"""
+
+FAKE_SACCTMGR = """#!%(python)s
+import sys
+
+args = sys.argv[1:]
+if 'fail' in ' '.join(args):
+    print('sacctmgr: error: Invalid user')
+    sys.exit(1)
+print('|'.join(args))
+"""
+
+
+class FakeSSH:
+    """
+    Replace ssh executable with script which runs remote command locally.
+    Command line arguments of each SSH invocation are stored in calls attribute.
+    Control master is emulated by background process which lives until exit.
+    """
+
+    def __enter__(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.directory.name, 'ssh.log')
+        context = {'python': sys.executable, 'log': self.log}
+        for name, template in (('ssh', FAKE_SSH), ('sacctmgr', FAKE_SACCTMGR)):
+            path = os.path.join(self.directory.name, name)
+            with open(path, 'w') as script:
+                script.write(template % context)
+            os.chmod(path, 0o755)  # noqa: S103
+
+        path = os.pathsep.join([self.directory.name, os.environ.get('PATH', '')])
+        self.env_patcher = mock.patch.dict(os.environ, {'PATH': path})
+        self.env_patcher.start()
+
+        self.control_path = os.path.join(self.directory.name, 'master')
+        self.settings_patcher = override_plugin_settings(
+            SSH_CONTROL_PATH=self.control_path
+        )
+        self.settings_patcher.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.settings_patcher.disable()
+        self.env_patcher.stop()
+        self.directory.cleanup()
+
+    @property
+    def calls(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log) as log:
+            return [json.loads(line) for line in log]
+
+    @property
+    def commands(self):
+        """
+        Arguments of SSH invocations which have executed remote command.
+        """
+        return [call for call in self.calls if '-O' not in call and '-M' not in call]
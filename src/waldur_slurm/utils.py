@@ -1,3 +1,5 @@
+import datetime
+
 from django.utils import timezone
 
 from waldur_core.core import utils as core_utils
@@ -18,3 +20,20 @@ def format_current_month():
     month_start = core_utils.month_start(today).strftime('%Y-%m-%d')
     month_end = core_utils.month_end(today).strftime('%Y-%m-%d')
     return month_start, month_end
+
+
+def format_datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def split_by_months(start, end):
+    """
+    Split period into parts which do not cross month boundaries.
+    """
+    periods = []
+    start = timezone.localtime(start)
+    while start < end:
+        next_month = core_utils.month_end(start) + datetime.timedelta(microseconds=1)
+        periods.append((start, min(next_month, end)))
+        start = next_month
+    return periods
@@ -4,6 +4,7 @@ from decimal import Decimal
 
 import pyzabbix
 from django.conf import settings as django_settings
+from django.core.cache import cache
 from django.db import DatabaseError, connections
 from django.utils import timezone
 from requests.exceptions import RequestException
@@ -68,6 +69,9 @@ class ZabbixBackend(ServiceBackend):
 
     TREND_DELAY_SECONDS = 60 * 60  # One hour
     HISTORY_DELAY_SECONDS = 15 * 60
+    STATS_CACHE_TIMEOUT = getattr(django_settings, 'WALDUR_ZABBIX', {}).get(
+        'STATS_CACHE_TIMEOUT', 60
+    )
 
     def __init__(self, settings):
         self.settings = settings
@@ -712,69 +716,153 @@ class ZabbixBackend(ServiceBackend):
         return api
 
     def get_item_stats(self, hostid, item, points):
+        return self.get_items_stats(hostid, [item], points)[item.key]
+
+    def get_items_stats(self, hostid, items, points):
+        """
+        Get values of host items at given points using single query to Zabbix DB.
+
+        Item values are downsampled by Zabbix DB: values are averaged within buckets
+        of the same size as interval between points but not less than item delay.
+        Values stored in table "history" are used for the points within item
+        history retention period, hourly values from table "trends" are used otherwise.
+        Bucket values are cached for a short time.
+
+        Output format:
+            {
+                <item1.key>: [<value at point1>, <value at point2>, ...],
+                ...
+            }
+        """
+        points = list(points)
+        ordered = sorted(points)
+        gaps = [
+            int(end - start)
+            for start, end in zip(ordered[:-1], ordered[1:])
+            if end > start
+        ]
+        step = min(gaps) if gaps else 1
+        trends_start = {
+            item.key: datetime_to_timestamp(
+                timezone.now() - timedelta(days=item.history)
+            )
+            for item in items
+        }
+
+        # Each point is mapped to bucket of history or trends table
+        point_buckets = {}
+        for item in items:
+            history_table, trend_table = self._get_stats_tables(item)
+            history_size = max(step, item.delay or self.HISTORY_DELAY_SECONDS, 1)
+            trend_size = max(step, self.TREND_DELAY_SECONDS)
+            point_buckets[item.key] = [
+                (history_table, history_size, point // history_size)
+                if point > trends_start[item.key]
+                else (trend_table, trend_size, point // trend_size)
+                for point in points
+            ]
+
+        cache_keys = {
+            (key, bucket): self._get_stats_cache_key(hostid, key, *bucket)
+            for key, buckets in point_buckets.items()
+            for bucket in buckets
+        }
+        values = {
+            cache_key: value
+            for cache_key, (value,) in cache.get_many(cache_keys.values()).items()
+        }
+
+        missing = [
+            (key, bucket)
+            for (key, bucket), cache_key in cache_keys.items()
+            if cache_key not in values
+        ]
+        if missing:
+            fetched = self._get_buckets_values(hostid, missing)
+            computed = {
+                cache_keys[(key, bucket)]: fetched.get((key,) + bucket)
+                for key, bucket in missing
+            }
+            cache.set_many(
+                {cache_key: (value,) for cache_key, value in computed.items()},
+                timeout=self.STATS_CACHE_TIMEOUT,
+            )
+            values.update(computed)
+
+        items_map = {item.key: item for item in items}
+        stats = {}
+        for key, buckets in point_buckets.items():
+            item = items_map[key]
+            stats[key] = []
+            for bucket in buckets:
+                value = values[cache_keys[(key, bucket)]]
+                if value is not None and item.is_byte():
+                    value = self.b2mb(value)
+                stats[key].append(value)
+        return stats
+
+    def _get_stats_tables(self, item):
         if item.value_type == models.Item.ValueTypes.FLOAT:
-            history_table = 'history'
-            trend_table = 'trends'
+            return 'history', 'trends'
         elif item.value_type == models.Item.ValueTypes.INTEGER:
-            # Integer value
-            history_table = 'history_uint'
-            trend_table = 'trends_uint'
+            return 'history_uint', 'trends_uint'
         else:
             raise ZabbixBackendError(
                 'Cannot get statistics for non-numerical item %s' % item.key
             )
 
-        history_retention_days = item.history
-        history_delay_seconds = item.delay or self.HISTORY_DELAY_SECONDS
-        trend_delay_seconds = self.TREND_DELAY_SECONDS
-
-        trends_start_date = datetime_to_timestamp(
-            timezone.now() - timedelta(days=history_retention_days)
-        )
-
-        points = points[::-1]
-        history_cursor = self._get_history(
-            item.key,
+    def _get_stats_cache_key(self, hostid, item_key, table, size, bucket):
+        return 'zabbix_item_stats:%s:%s:%s:%s:%s:%s' % (
+            self.settings.uuid.hex,
             hostid,
-            history_table,
-            points[-1] - history_delay_seconds,
-            points[0],
-        )
-        trends_cursor = self._get_history(
-            item.key, hostid, trend_table, points[-1] - trend_delay_seconds, points[0]
+            item_key,
+            table,
+            size,
+            bucket,
         )
 
-        values = []
-        if points[0] > trends_start_date:
-            next_value = history_cursor.fetchone()
-        else:
-            next_value = trends_cursor.fetchone()
-
-        for end, start in zip(points[:-1], points[1:]):
-            if start > trends_start_date:
-                interval = history_delay_seconds
-            else:
-                interval = trend_delay_seconds
-
-            value = None
-            while True:
-                if next_value is None:
-                    break
-                time, value = next_value
-                if item.is_byte():
-                    value = self.b2mb(value)
-
-                if time <= end:
-                    if end - time < interval or time > start:
-                        break
-                else:
-                    if start > trends_start_date:
-                        next_value = history_cursor.fetchone()
-                    else:
-                        next_value = trends_cursor.fetchone()
+    def _get_buckets_values(self, hostid, buckets):
+        """
+        Execute single query to Zabbix DB to get average item values grouped by buckets.
+        Buckets are grouped by table and size so that each group is fetched by
+        one subquery.
+        :param buckets: list of (item_key, (table, size, bucket))
+        :return: dict {(item_key, table, size, bucket): value}
+        """
+        groups = {}
+        for key, (table, size, bucket) in buckets:
+            keys, low, high = groups.get((table, size), (set(), bucket, bucket))
+            keys.add(key)
+            groups[(table, size)] = (keys, min(low, bucket), max(high, bucket))
+
+        subqueries = []
+        parameters = []
+        for (table, size), (keys, low, high) in groups.items():
+            subqueries.append(
+                'SELECT %s, %s, items.key_, clock DIV %s, AVG({value}) '
+                'FROM {table} history, items '
+                'WHERE history.itemid = items.itemid '
+                'AND items.hostid = %s '
+                'AND items.key_ IN ({keys}) '
+                'AND clock >= %s '
+                'AND clock < %s '
+                'GROUP BY items.key_, clock DIV %s'.format(
+                    table=table,
+                    value=table.startswith('history') and 'value' or 'value_avg',
+                    keys=', '.join(['%s'] * len(keys)),
+                )
+            )
+            parameters.extend(
+                [table, size, size, hostid]
+                + sorted(keys)
+                + [low * size, (high + 1) * size, size]
+            )
 
-            values.append(value)
-        return values[::-1]
+        cursor = self._execute_query(' UNION ALL '.join(subqueries), parameters)
+        return {
+            (key, table, int(size), int(bucket)): value
+            for table, size, key, bucket, value in cursor.fetchall()
+        }
 
     def get_items_aggregated_values(
         self, host, items, start_timestamp, end_timestamp, method='MAX'
@@ -831,60 +919,31 @@ class ZabbixBackend(ServiceBackend):
     def b2mb(self, value):
         return value / 1024 / 1024
 
-    def _get_history(self, item_key, hostid, table, start_timestamp, end_timestamp):
-        """
-        Execute query to zabbix db to get item values from history
-        """
-        query = (
-            'SELECT clock time, %(value_path)s value '
-            'FROM %(table)s history, items '
-            'WHERE history.itemid = items.itemid '
-            'AND items.key_ = "%(item_key)s" '
-            'AND items.hostid = %(hostid)s '
-            'AND clock > %(start_timestamp)s '
-            'AND clock < %(end_timestamp)s '
-            'ORDER BY clock DESC'
-        )
-        parameters = {
-            'table': table,
-            'item_key': item_key,
-            'hostid': hostid,
-            'start_timestamp': start_timestamp,
-            'end_timestamp': end_timestamp,
-            'value_path': table.startswith('history') and 'value' or 'value_avg',
-        }
-        query = query % parameters
-
-        return self._execute_query(query)
-
     def _get_aggregated_values(
         self, hostid, item_keys, start_timestamp, end_timestamp, table, method='MAX'
     ):
         """
         Execute query to zabbix DB to get item aggregated historical value.
         """
+        if method not in ('MIN', 'MAX'):
+            raise ZabbixBackendError('Unsupported aggregation method %s' % method)
+
         # XXX: This query is really slow with a lot of item_keys, need to speed up it with index.
         query = (
-            'SELECT items.key_, %(method)s(value) '
-            'FROM hosts, items, %(table)s history '
-            'WHERE items.hostid = %(hostid)s AND hosts.hostid = %(hostid)s AND history.itemid = items.itemid '
-            'AND items.key_ IN (%(item_keys)s) '
-            'AND clock >= %(start_timestamp)s '
-            'AND clock <= %(end_timestamp)s '
+            'SELECT items.key_, {method}(value) '
+            'FROM hosts, items, {table} history '
+            'WHERE items.hostid = %s AND hosts.hostid = %s AND history.itemid = items.itemid '
+            'AND items.key_ IN ({item_keys}) '
+            'AND clock >= %s '
+            'AND clock <= %s '
             'GROUP BY items.key_'
+        ).format(
+            method=method, table=table, item_keys=', '.join(['%s'] * len(item_keys)),
         )
-
-        parameters = {
-            'method': method,
-            'table': table,
-            'hostid': hostid,
-            'item_keys': ', '.join(['"%s"' % key for key in item_keys]),
-            'start_timestamp': start_timestamp,
-            'end_timestamp': end_timestamp,
-        }
-
-        query = query % parameters
-        return self._execute_query(query)
+        parameters = (
+            [hostid, hostid] + list(item_keys) + [start_timestamp, end_timestamp]
+        )
+        return self._execute_query(query, parameters)
 
     def _get_db_connection(self, force=False):
         host = self.database_parameters['host']
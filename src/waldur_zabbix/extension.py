@@ -9,6 +9,8 @@ class ZabbixExtension(WaldurExtension):
                 'SMS_EMAIL_FROM': None,
                 'SMS_EMAIL_RCPT': None,
             },
+            # Number of seconds downsampled item values are cached for
+            'STATS_CACHE_TIMEOUT': 60,
             'TRIGGER_FIELDS': (
                 # matching trigger object fields and TriggerResponseSerializer fields
                 # https://www.zabbix.com/documentation/3.4/manual/api/reference/trigger/object
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from waldur_core.core.utils import datetime_to_timestamp
+from waldur_core.structure.models import ServiceSettings
+
+from .. import models
+from ..apps import ZabbixConfig
+from ..backend import ZabbixBackend
+
+
+@mock.patch.object(ZabbixBackend, '_execute_query')
+class ItemStatsTest(TestCase):
+    def setUp(self):
+        settings = ServiceSettings(type=ZabbixConfig.service_name)
+        self.backend = settings.get_backend()
+        self.cpu = models.Item(
+            key='cpu', value_type=models.Item.ValueTypes.FLOAT, history=7, delay=60
+        )
+        self.memory = models.Item(
+            key='memory',
+            value_type=models.Item.ValueTypes.INTEGER,
+            units='B',
+            history=7,
+            delay=60,
+        )
+        now = datetime_to_timestamp(timezone.now()) // 600 * 600
+        self.points = [now - 1200, now - 600, now]
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_rows(self):
+        return [
+            ('history', 600, 'cpu', self.points[0] // 600, 10.0),
+            ('history', 600, 'cpu', self.points[2] // 600, 30.0),
+            ('history_uint', 600, 'memory', self.points[1] // 600, 2 * 1024 * 1024),
+        ]
+
+    def test_values_of_all_items_are_fetched_in_single_query(self, execute_query):
+        execute_query().fetchall.return_value = self.get_rows()
+        execute_query.reset_mock()
+
+        stats = self.backend.get_items_stats(
+            'host-id', [self.cpu, self.memory], self.points
+        )
+
+        self.assertEqual(execute_query.call_count, 1)
+        self.assertEqual(stats['cpu'], [10.0, None, 30.0])
+        self.assertEqual(stats['memory'], [None, 2, None])
+
+    def test_query_is_parameterized(self, execute_query):
+        execute_query().fetchall.return_value = []
+        execute_query.reset_mock()
+
+        self.backend.get_items_stats('host-id', [self.cpu], self.points)
+
+        query, parameters = execute_query.call_args[0]
+        self.assertIn('GROUP BY items.key_, clock DIV %s', query)
+        self.assertNotIn('host-id', query)
+        self.assertIn('host-id', parameters)
+
+    def test_bucket_values_are_cached(self, execute_query):
+        execute_query().fetchall.return_value = self.get_rows()
+        execute_query.reset_mock()
+
+        self.backend.get_items_stats('host-id', [self.cpu], self.points)
+        stats = self.backend.get_items_stats('host-id', [self.cpu], self.points)
+
+        self.assertEqual(execute_query.call_count, 1)
+        self.assertEqual(stats['cpu'], [10.0, None, 30.0])
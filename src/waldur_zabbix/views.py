@@ -224,13 +224,14 @@ class HostViewSet(structure_views.ResourceViewSet):
             )
         points = self._get_points(request)
 
+        hosts_stats = [
+            host.get_backend().get_items_stats(host.backend_id, items, points)
+            for host in hosts
+        ]
         stats = []
         for item in items:
             values = self._sum_rows(
-                [
-                    host.get_backend().get_item_stats(host.backend_id, item, points)
-                    for host in hosts
-                ]
+                [host_stats[item.key] for host_stats in hosts_stats]
             )
 
             for point, value in zip(points, values):
@@ -253,8 +254,7 @@ class HostViewSet(structure_views.ResourceViewSet):
         }
         serializer = HistorySerializer(data={k: v for k, v in mapped.items() if v})
         serializer.is_valid(raise_exception=True)
-        points = map(datetime_to_timestamp, serializer.get_filter_data())
-        return points
+        return [datetime_to_timestamp(point) for point in serializer.get_filter_data()]
 
     def _sum_rows(self, rows):
         """